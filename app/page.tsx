@@ -1,10 +1,10 @@
-import { getPosts } from '@/lib/api';
+import { getFeedPage } from '@/lib/api';
 import { PostGrid } from '@/components/PostGrid';
 import { Header } from '@/components/Header';
 
 export default async function Home() {
-  // Fetch initial posts using Server Component
-  const data = await getPosts(1, 20, 'newest');
+  // Fetch initial posts using Server Component (from the feed snapshot if available)
+  const data = await getFeedPage(1, 'newest');
 
   return (
     <div className="min-h-screen bg-gradient-to-b from-pink-50 via-blue-50 to-purple-50">
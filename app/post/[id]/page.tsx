@@ -1,10 +1,11 @@
-import { getPost } from '@/lib/api';
+import { getPost, getRelatedPosts } from '@/lib/api';
 import Image from 'next/image';
 import Link from 'next/link';
 import { notFound } from 'next/navigation';
 import type { Metadata } from 'next';
 import { Header } from '@/components/Header';
 import { Comments } from '@/components/Comments';
+import { PostCard } from '@/components/PostCard';
 
 type Props = {
   params: Promise<{
@@ -52,6 +53,8 @@ export default async function PostPage({ params }: Props) {
     notFound();
   }
 
+  const relatedPosts = await getRelatedPosts(id);
+
   return (
     <div className="min-h-screen bg-gradient-to-b from-pink-50 via-white to-blue-50">
       <Header />
@@ -155,6 +158,18 @@ export default async function PostPage({ params }: Props) {
           </div>
         </article>
 
+        {/* Related posts */}
+        {relatedPosts.length > 0 && (
+          <section className="mt-8">
+            <h2 className="text-lg font-bold text-gray-900 mb-4">More like this</h2>
+            <div className="grid grid-cols-1 gap-6 sm:grid-cols-2 lg:grid-cols-3">
+              {relatedPosts.map((relatedPost) => (
+                <PostCard key={relatedPost.id} post={relatedPost} />
+              ))}
+            </div>
+          </section>
+        )}
+
         {/* Share Your Own Story CTA */}
         <div className="mt-6 text-center pb-4">
           <p className="text-gray-600 mb-3 text-sm">Have your own story to share?</p>
@@ -0,0 +1,106 @@
+"""Admin API endpoints"""
+
+import asyncio
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse, StreamingResponse
+
+from app.config import settings
+from app.middleware.admin_auth import require_admin
+from app.services import get_supabase_client
+from app.services.export import EXPORTABLE_TABLES, export_table
+from app.services.profiler import get_slow_request_tracer, profile
+
+router = APIRouter(
+    prefix="/api/admin", tags=["admin"], dependencies=[Depends(require_admin)]
+)
+
+
+@router.get("/export/{table}")
+def export(table: str, since: Optional[datetime] = None, gzip: bool = False):
+    """
+    Stream a full or incremental dump of a table as NDJSON
+
+    Path Parameters:
+    - table: posts | comments
+
+    Query Parameters:
+    - since: Only rows created or updated at/after this ISO timestamp
+    - gzip: Gzip-compress the stream (default: false)
+    """
+    if table not in EXPORTABLE_TABLES:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Table must be one of: {', '.join(EXPORTABLE_TABLES)}",
+        )
+
+    filename = f"{table}.ndjson.gz" if gzip else f"{table}.ndjson"
+
+    # Sync generator: Starlette iterates it in a worker thread, so the blocking
+    # Supabase calls never run on the event loop
+    return StreamingResponse(
+        export_table(get_supabase_client(), table, since, compress=gzip),
+        media_type="application/gzip" if gzip else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/profile")
+async def run_profile(
+    seconds: float = Query(10.0, gt=0, le=60),
+    interval_ms: float = Query(10.0, ge=1, le=1000),
+    idle: bool = False,
+):
+    """
+    Sample every thread for a few seconds and return collapsed stacks
+
+    The response is flame-graph input (flamegraph.pl, speedscope, ...). The
+    sampler stretches its interval as needed to stay under
+    PROFILER_MAX_OVERHEAD. Only one profile runs at a time.
+
+    Query Parameters:
+    - seconds: How long to sample (max 60)
+    - interval_ms: Target time between samples (default: 10)
+    - idle: Include threads blocked waiting for work (default: false)
+    """
+    try:
+        result = await asyncio.to_thread(
+            profile,
+            seconds,
+            interval_ms / 1000,
+            settings.profiler_max_overhead,
+            idle,
+        )
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    filename = f"profile-{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}.collapsed"
+    return PlainTextResponse(
+        result.collapsed(),
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Profile-Samples": str(result.samples),
+            "X-Profile-Overhead": f"{result.overhead:.4f}",
+        },
+    )
+
+
+@router.get("/profile/slow")
+async def slow_requests():
+    """
+    Stack samples of recent slow requests on routes listed in PROFILE_SLOW_ROUTES
+
+    Each trace's "collapsed" field is flame-graph input.
+    """
+    tracer = get_slow_request_tracer()
+    if tracer is None:
+        raise HTTPException(
+            status_code=404, detail="Slow request tracing is disabled (set PROFILE_SLOW_ROUTES)"
+        )
+    return {
+        "routes": sorted(tracer.routes),
+        "threshold_ms": tracer.threshold_ms,
+        "traces": tracer.recent(),
+    }
@@ -9,17 +9,37 @@ from app.models import (
     CommentPaginationInfo,
 )
 from app.services import get_supabase_client
+from app.services.feed_cache import get_feed_cache
+from app.utils.serialization import (
+    COMMENT_FIELDS,
+    parse_fields,
+    comment_projection,
+    comment_row_to_dict,
+    fast_list_response,
+)
+from app.config import settings
 from typing import Optional
+import logging
 import math
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/api/comments", tags=["comments"])
 
 
+def _invalidate_feed_cache() -> None:
+    feed_cache = get_feed_cache()
+    if feed_cache is not None:
+        feed_cache.invalidate()
+
+
 @router.get("/post/{post_id}", response_model=CommentsListResponse)
 async def get_post_comments(
     post_id: str,
     page: int = 1,
     limit: int = 20,
+    fields: Optional[str] = None,
+    compact: bool = False,
 ):
     """
     Get comments for a specific post with pagination
@@ -27,6 +47,8 @@ async def get_post_comments(
     Query Parameters:
     - page: Page number (default: 1)
     - limit: Comments per page (default: 20, max: 50)
+    - fields: Comma-separated subset of comment fields to return (default: all)
+    - compact: Omit fields whose value is null (default: false)
     """
     # Validate pagination params
     if page < 1:
@@ -37,6 +59,11 @@ async def get_post_comments(
             status_code=400, detail="Limit must be between 1 and 50"
         )
 
+    try:
+        selected_fields = parse_fields(fields, COMMENT_FIELDS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     try:
         supabase = get_supabase_client()
 
@@ -46,17 +73,17 @@ async def get_post_comments(
         # Get total count
         count_result = (
             supabase.table("comments")
-            .select("*", count="exact")
+            .select("id", count="exact")
             .eq("post_id", post_id)
             .eq("is_deleted", False)
             .execute()
         )
         total_count = count_result.count or 0
 
-        # Get comments with user info (join with users table)
+        # Get comments with user info (join with users table only if needed)
         result = (
             supabase.table("comments")
-            .select("*, users(username, display_name, avatar_url)")
+            .select(comment_projection(selected_fields))
             .eq("post_id", post_id)
             .eq("is_deleted", False)
             .order("created_at", desc=False)  # Oldest first
@@ -64,6 +91,19 @@ async def get_post_comments(
             .execute()
         )
 
+        # Calculate pagination info
+        total_pages = math.ceil(total_count / limit)
+
+        if settings.fast_serialization or fields or compact:
+            return fast_list_response(
+                "comments",
+                [
+                    comment_row_to_dict(comment, selected_fields, compact)
+                    for comment in result.data
+                ],
+                {"page": page, "limit": limit, "total": total_count, "pages": total_pages},
+            )
+
         # Transform data
         comments = []
         for comment in result.data:
@@ -83,9 +123,6 @@ async def get_post_comments(
                 )
             )
 
-        # Calculate pagination info
-        total_pages = math.ceil(total_count / limit)
-
         return CommentsListResponse(
             comments=comments,
             pagination=CommentPaginationInfo(
@@ -98,8 +135,8 @@ async def get_post_comments(
 
     except HTTPException:
         raise
-    except Exception as e:
-        print(f"Error fetching comments: {e}")
+    except Exception:
+        logger.exception("Error fetching comments")
         raise HTTPException(status_code=500, detail="Failed to fetch comments")
 
 
@@ -134,6 +171,9 @@ async def create_comment(comment_data: CommentCreate):
 
         comment = result.data[0]
 
+        # comments_count changed: cached feed pages are stale
+        _invalidate_feed_cache()
+
         # Get user data
         user_result = (
             supabase.table("users")
@@ -159,8 +199,8 @@ async def create_comment(comment_data: CommentCreate):
 
     except HTTPException:
         raise
-    except Exception as e:
-        print(f"Error creating comment: {e}")
+    except Exception:
+        logger.exception("Error creating comment")
         raise HTTPException(status_code=500, detail="Failed to create comment")
 
 
@@ -201,10 +241,11 @@ async def delete_comment(comment_id: str, user_id: str):
         if not result.data:
             raise HTTPException(status_code=500, detail="Failed to delete comment")
 
+        _invalidate_feed_cache()
         return None
 
     except HTTPException:
         raise
-    except Exception as e:
-        print(f"Error deleting comment: {e}")
+    except Exception:
+        logger.exception("Error deleting comment")
         raise HTTPException(status_code=500, detail="Failed to delete comment")
@@ -0,0 +1,79 @@
+"""Image proxy endpoint, serving bucket images from a local disk cache"""
+
+import logging
+import os
+from typing import Optional, Tuple
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import FileResponse
+
+from app.config import settings
+from app.services.image_cache import (
+    IMAGE_NAME_PATTERN,
+    ImageCache,
+    ImageNotFoundError,
+    get_image_cache,
+)
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["images"])
+
+
+async def _get_cached_file(
+    cache: ImageCache, name: str, width: Optional[int]
+) -> Tuple[str, os.stat_result]:
+    """Get an image's cached file, once more if it was evicted meanwhile"""
+    path, _ = await cache.get(name, width)
+    try:
+        return path, os.stat(path)
+    except FileNotFoundError:
+        return await cache.get(name, width)
+
+
+@router.get("/img/{name}")
+async def get_image(name: str, request: Request, w: Optional[int] = None):
+    """
+    Serve an image from the storage bucket through the local disk cache
+
+    Path Parameters:
+    - name: Image file name, e.g. "<uuid>.png"
+
+    Query Parameters:
+    - w: Desired width in pixels; rounded up to one of IMAGE_PROXY_WIDTHS
+      (the original is served when larger than all of them)
+
+    Supports conditional requests (If-None-Match) and byte ranges.
+    """
+    if not IMAGE_NAME_PATTERN.match(name):
+        raise HTTPException(status_code=404, detail="Image not found")
+    if w is not None and w < 1:
+        raise HTTPException(status_code=400, detail="Width must be >= 1")
+
+    cache = get_image_cache()
+    width = cache.snap_width(w) if w is not None else None
+    try:
+        path, stat = await _get_cached_file(cache, name, width)
+    except ImageNotFoundError:
+        raise HTTPException(status_code=404, detail="Image not found")
+    except Exception:
+        logger.exception("Error fetching image %s", name)
+        raise HTTPException(status_code=502, detail="Failed to fetch image")
+
+    response = FileResponse(
+        path,
+        stat_result=stat,
+        headers={"Cache-Control": f"public, max-age={settings.image_proxy_max_age}"},
+    )
+
+    etag = response.headers["etag"]
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (
+        if_none_match.strip() == "*"
+        or etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    ):
+        return Response(
+            status_code=304,
+            headers={"ETag": etag, "Cache-Control": response.headers["cache-control"]},
+        )
+    return response
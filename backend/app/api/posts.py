@@ -1,72 +1,194 @@
 """Posts API endpoints"""
 
-from fastapi import APIRouter, HTTPException, status, Request, Depends
+from fastapi import APIRouter, HTTPException, status, Request, Response
 from app.models import PostCreate, PostSave, PostResponse, PostsListResponse, PaginationInfo, ImageGenerationResponse
 from app.services import get_image_generator, get_storage_service, get_supabase_client
-from app.utils import validate_post_text, validate_author_name, sanitize_text, sanitize_author_name
-from app.middleware.rate_limiter import rate_limit_post_creation
-from typing import Optional
+from app.utils import clean_post_input
+from app.utils.serialization import (
+    POST_FIELDS,
+    parse_fields,
+    post_projection,
+    post_row_to_dict,
+    fast_list_response,
+)
+from app.utils.compression import cached_json_response, json_response
+from app.utils.cursors import encode_cursor, decode_cursor
+from app.middleware.rate_limiter import get_client_ip
+from app.services.admission import AdmissionRejectedError, get_generation_admission
+from app.services.spam_index import get_prompt_index
+from app.services.idempotency import (
+    IdempotencyAbortedError,
+    IdempotencyConflictError,
+    IdempotencyStoreFullError,
+    fingerprint,
+    get_idempotency_store,
+)
+from app.services.metrics import cache_requests, rate_limit_rejections, stage
+from app.services.feed_cache import get_feed_cache, post_key, posts_page_key
+from app.services.feed import SORT_COLUMNS, query_posts_page
+from app.services.feed_snapshots import get_feed_snapshotter
+from app.config import settings
+from fastapi.responses import ORJSONResponse
+from datetime import datetime
+from typing import Awaitable, Callable, Optional, TypeVar
+from uuid import UUID
+import asyncio
+import logging
 import math
+import orjson
+
+# Cursor for an empty table: sorts before every real (updated_at, id)
+EPOCH_CURSOR = ("1970-01-01T00:00:00+00:00", "00000000-0000-0000-0000-000000000000")
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/posts", tags=["posts"])
 
+T = TypeVar("T")
+
+
+async def _run_idempotent(
+    request: Request,
+    response: Response,
+    scope: str,
+    payload: tuple,
+    operation: Callable[[], Awaitable[T]],
+) -> T:
+    """
+    Run an operation once per Idempotency-Key header (if the client sent one)
+
+    A retry with the same key gets the original result (with an
+    Idempotent-Replayed header) or waits for the original request to finish.
+    Keys are not scoped per client IP, since mobile clients often retry from
+    another address; reusing a key with a different payload is rejected with
+    422 instead, so a guessed key can only replay an identical request.
+    Deduplication is per worker process (see app.services.idempotency).
+    """
+    key = request.headers.get("Idempotency-Key")
+    if not key:
+        return await operation()
+
+    if len(key) > 255:
+        raise HTTPException(
+            status_code=400, detail="Idempotency-Key must be at most 255 characters"
+        )
+
+    try:
+        result, replayed = await get_idempotency_store().run(
+            f"{scope}:{key}", fingerprint(*payload), operation
+        )
+    except IdempotencyConflictError:
+        raise HTTPException(
+            status_code=422,
+            detail="Idempotency-Key was already used with a different request",
+        )
+    except IdempotencyAbortedError:
+        raise HTTPException(
+            status_code=409,
+            detail="The original request for this Idempotency-Key was aborted. Please retry.",
+        )
+    except IdempotencyStoreFullError:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many requests in progress. Please retry.",
+            headers={"Retry-After": "1"},
+        )
+
+    cache_requests.inc("idempotency", "hit" if replayed else "miss")
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
+
 
 @router.post("/generate", response_model=ImageGenerationResponse, status_code=status.HTTP_200_OK)
-async def generate_image(
-    post_data: PostCreate, request: Request, _: None = Depends(rate_limit_post_creation)
-):
+async def generate_image(post_data: PostCreate, request: Request, response: Response):
     """
     Generate an image without saving to database
 
+    Rate limited by RateLimitMiddleware before the body is read, then admitted
+    through the generation admission controller (per-client and global
+    concurrency caps with fair queueing).
+
+    Supports the Idempotency-Key header: retries with the same key return the
+    original result instead of generating again.
+
     Process:
-    1. Validate input
+    1. Validate input and reject floods of near-identical prompts
     2. Generate image using Google Gemini Imagen
     3. Upload image to R2
     4. Return image URL and data (without saving to DB)
     """
-    # Validate text
-    is_valid, error = validate_post_text(post_data.text)
-    if not is_valid:
-        raise HTTPException(status_code=400, detail=error)
-
-    # Validate author name if provided
-    if post_data.author_name:
-        is_valid, error = validate_author_name(post_data.author_name)
-        if not is_valid:
-            raise HTTPException(status_code=400, detail=error)
-
-    # Sanitize inputs
-    clean_text = sanitize_text(post_data.text)
-    clean_author = sanitize_author_name(post_data.author_name)
-
+    # Validate and sanitize inputs
     try:
-        # 1. Generate image
-        image_generator = get_image_generator()
-        image_bytes = await image_generator.generate_fatherhood_image(clean_text)
-
-        # 2. Upload to R2
-        storage = get_storage_service()
-        image_url = await storage.upload_image(image_bytes)
-
-        # 3. Return image URL and data (no DB save)
-        return ImageGenerationResponse(
-            image_url=image_url,
-            text=clean_text,
-            author_name=clean_author,
-        )
+        with stage("validate"):
+            clean_text, clean_author = clean_post_input(
+                post_data.text, post_data.author_name
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def generate() -> ImageGenerationResponse:
+        # Near-duplicate check runs before any generation quota is spent
+        cluster_size = get_prompt_index().add(clean_text)
+        cluster_header = {"X-Duplicate-Cluster-Size": str(cluster_size)}
+        if cluster_size > settings.duplicate_max_cluster:
+            rate_limit_rejections.inc("duplicate_prompt")
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail={
+                    "error": "Duplicate content",
+                    "message": "Very similar images were generated recently. Please try a different text.",
+                    "cluster_size": cluster_size,
+                },
+                headers=cluster_header,
+            )
+        response.headers.update(cluster_header)
+
+        try:
+            async with get_generation_admission().slot(get_client_ip(request)):
+                # 1. Generate image
+                image_generator = get_image_generator()
+                with stage("generate"):
+                    image_bytes = await image_generator.generate_fatherhood_image(clean_text)
+
+            # 2. Upload to R2
+            storage = get_storage_service()
+            with stage("upload"):
+                image_url = await storage.upload_image(image_bytes)
+
+            # 3. Return image URL and data (no DB save)
+            return ImageGenerationResponse(
+                image_url=image_url,
+                text=clean_text,
+                author_name=clean_author,
+            )
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"Error generating image: {e}")
-        raise HTTPException(status_code=500, detail="Failed to generate image")
+        except AdmissionRejectedError as e:
+            rate_limit_rejections.inc("generation_admission")
+            raise HTTPException(
+                status_code=e.status_code,
+                detail={"error": "Generation capacity exceeded", "message": e.message},
+                headers={"Retry-After": str(math.ceil(e.retry_after))},
+            )
+        except HTTPException:
+            raise
+        except Exception:
+            logger.exception("Error generating image")
+            raise HTTPException(status_code=500, detail="Failed to generate image")
+
+    return await _run_idempotent(
+        request, response, "generate", (clean_text, clean_author), generate
+    )
 
 
 @router.post("", response_model=PostResponse, status_code=status.HTTP_201_CREATED)
-async def create_post(post_data: PostSave):
+async def create_post(post_data: PostSave, request: Request, response: Response):
     """
     Save a post with pre-generated image to database
 
+    Supports the Idempotency-Key header: retries with the same key return the
+    originally created post instead of inserting a duplicate.
+
     Process:
     1. Validate input
     2. Save post to database
@@ -74,66 +196,94 @@ async def create_post(post_data: PostSave):
 
     Note: Image should be generated first using /api/generate endpoint
     """
-    # Validate text
-    is_valid, error = validate_post_text(post_data.text)
-    if not is_valid:
-        raise HTTPException(status_code=400, detail=error)
-
-    # Validate author name if provided
-    if post_data.author_name:
-        is_valid, error = validate_author_name(post_data.author_name)
-        if not is_valid:
-            raise HTTPException(status_code=400, detail=error)
-
-    # Sanitize inputs
-    clean_text = sanitize_text(post_data.text)
-    clean_author = sanitize_author_name(post_data.author_name)
-
+    # Validate and sanitize inputs
     try:
-        # Save to database
-        supabase = get_supabase_client()
-        result = (
-            supabase.table("posts")
-            .insert(
-                {
-                    "text": clean_text,
-                    "image_url": post_data.image_url,
-                    "author_name": clean_author,
-                }
+        with stage("validate"):
+            clean_text, clean_author = clean_post_input(
+                post_data.text, post_data.author_name
             )
-            .execute()
-        )
-
-        if not result.data:
-            raise HTTPException(
-                status_code=500, detail="Failed to save post to database"
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def save() -> PostResponse:
+        try:
+            # Save to database
+            supabase = get_supabase_client()
+            with stage("db_insert"):
+                result = (
+                    supabase.table("posts")
+                    .insert(
+                        {
+                            "text": clean_text,
+                            "image_url": post_data.image_url,
+                            "author_name": clean_author,
+                        }
+                    )
+                    .execute()
+                )
+
+            if not result.data:
+                raise HTTPException(
+                    status_code=500, detail="Failed to save post to database"
+                )
+
+            # New post: cached feed pages are now stale in every worker
+            feed_cache = get_feed_cache()
+            if feed_cache is not None:
+                feed_cache.invalidate()
+            snapshotter = get_feed_snapshotter()
+            if snapshotter is not None:
+                snapshotter.request_render()
+
+            post = result.data[0]
+
+            # Make the post show up in "related" results right away; the
+            # periodic catch-up covers it if this fails. In a worker thread:
+            # it takes the index's file lock (held by a running catch-up) and
+            # may grow and remap the files, or open them on first use.
+            try:
+                from app.services.related_index import get_related_index
+
+                await asyncio.to_thread(
+                    lambda: get_related_index().add(post["id"], post["text"])
+                )
+            except Exception:
+                logger.exception("Failed to index post for related posts")
+
+            # Return created post
+            return PostResponse(
+                id=post["id"],
+                text=post["text"],
+                image_url=post["image_url"],
+                author_name=post.get("author_name"),
+                likes_count=post.get("likes_count", 0),
+                comments_count=post.get("comments_count", 0),
+                created_at=post["created_at"],
             )
 
-        # Return created post
-        post = result.data[0]
-        return PostResponse(
-            id=post["id"],
-            text=post["text"],
-            image_url=post["image_url"],
-            author_name=post.get("author_name"),
-            likes_count=post.get("likes_count", 0),
-            comments_count=post.get("comments_count", 0),
-            created_at=post["created_at"],
-        )
+        except HTTPException:
+            raise
+        except Exception:
+            logger.exception("Error creating post")
+            raise HTTPException(status_code=500, detail="Failed to create post")
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        # Log error in production
-        print(f"Error creating post: {e}")
-        raise HTTPException(status_code=500, detail="Failed to create post")
+    return await _run_idempotent(
+        request,
+        response,
+        "create_post",
+        (clean_text, clean_author, post_data.image_url),
+        save,
+    )
 
 
 @router.get("", response_model=PostsListResponse)
 async def get_posts(
+    request: Request,
     page: int = 1,
     limit: int = 20,
     sort: str = "newest",
+    fields: Optional[str] = None,
+    compact: bool = False,
 ):
     """
     Get paginated list of posts
@@ -142,6 +292,10 @@ async def get_posts(
     - page: Page number (default: 1)
     - limit: Posts per page (default: 20, max: 50)
     - sort: Sort order - newest | oldest | popular (default: newest)
+    - fields: Comma-separated subset of post fields to return (default: all)
+    - compact: Omit fields whose value is null (default: false)
+
+    Responses are served from the shared feed cache when possible.
     """
     # Validate pagination params
     if page < 1:
@@ -152,43 +306,56 @@ async def get_posts(
             status_code=400, detail="Limit must be between 1 and 50"
         )
 
-    if sort not in ["newest", "oldest", "popular"]:
+    if sort not in SORT_COLUMNS:
         raise HTTPException(
             status_code=400, detail="Sort must be one of: newest, oldest, popular"
         )
 
     try:
-        supabase = get_supabase_client()
-
-        # Determine sort order
-        if sort == "newest":
-            order_by = "created_at.desc"
-        elif sort == "oldest":
-            order_by = "created_at.asc"
-        else:  # popular
-            order_by = "likes_count.desc"
+        selected_fields = parse_fields(fields, POST_FIELDS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    accept_encoding = request.headers.get("accept-encoding", "")
+    feed_cache = get_feed_cache()
+    if feed_cache is not None:
+        cache_key = posts_page_key(sort, page, limit, selected_fields, compact)
+        # Captured before querying, so a page read before an invalidation is
+        # never stored as fresh
+        generation = feed_cache.generation
+        cached = await cached_json_response(feed_cache, cache_key, accept_encoding)
+        cache_requests.inc("feed", "hit" if cached is not None else "miss")
+        if cached is not None:
+            return cached
 
-        # Calculate offset
-        offset = (page - 1) * limit
+    try:
+        supabase = get_supabase_client()
+        rows, pagination = query_posts_page(supabase, sort, page, limit, selected_fields)
 
-        # Get total count
-        count_result = (
-            supabase.table("posts")
-            .select("*", count="exact")
-            .eq("is_published", True)
-            .execute()
-        )
-        total_count = count_result.count or 0
+        if feed_cache is not None:
+            body = orjson.dumps(
+                {
+                    "posts": [
+                        post_row_to_dict(post, selected_fields, compact)
+                        for post in rows
+                    ],
+                    "pagination": pagination,
+                }
+            )
+            feed_cache.put(cache_key, body, generation)
+            return await json_response(
+                body, accept_encoding, feed_cache, cache_key, generation
+            )
 
-        # Get posts
-        result = (
-            supabase.table("posts")
-            .select("*")
-            .eq("is_published", True)
-            .order(order_by.split(".")[0], desc=(order_by.split(".")[1] == "desc"))
-            .range(offset, offset + limit - 1)
-            .execute()
-        )
+        if settings.fast_serialization or fields or compact:
+            return fast_list_response(
+                "posts",
+                [
+                    post_row_to_dict(post, selected_fields, compact)
+                    for post in rows
+                ],
+                pagination,
+            )
 
         posts = [
             PostResponse(
@@ -200,34 +367,215 @@ async def get_posts(
                 comments_count=post.get("comments_count", 0),
                 created_at=post["created_at"],
             )
-            for post in result.data
+            for post in rows
         ]
 
-        # Calculate pagination info
-        total_pages = math.ceil(total_count / limit)
-
         return PostsListResponse(
             posts=posts,
-            pagination=PaginationInfo(
-                page=page,
-                limit=limit,
-                total=total_count,
-                pages=total_pages,
-            ),
+            pagination=PaginationInfo(**pagination),
         )
 
     except HTTPException:
         raise
-    except Exception as e:
-        print(f"Error fetching posts: {e}")
+    except Exception:
+        logger.exception("Error fetching posts")
         raise HTTPException(status_code=500, detail="Failed to fetch posts")
 
 
+@router.get("/changes")
+async def get_post_changes(since: Optional[str] = None, limit: int = 50):
+    """
+    Get posts created or updated after a cursor, for cheap polling
+
+    Query Parameters:
+    - since: Cursor returned by a previous call. Without it, only the current
+      cursor is returned, so clients can start polling from "now"
+    - limit: Maximum changes per call (default: 50, max: 100)
+
+    Returns 304 with an empty body when nothing changed. Otherwise returns
+    `posts` (new or updated published posts), `removed` (ids of posts that were
+    unpublished), the next `cursor` and `has_more`.
+    """
+    if limit < 1 or limit > 100:
+        raise HTTPException(
+            status_code=400, detail="Limit must be between 1 and 100"
+        )
+
+    after = None
+    if since:
+        try:
+            after = decode_cursor(since, 2)
+            # Both values end up in a PostgREST filter, so only accept
+            # well-formed timestamps and UUIDs
+            datetime.fromisoformat(after[0])
+            UUID(after[1])
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    try:
+        supabase = get_supabase_client()
+
+        if after is None:
+            result = (
+                supabase.table("posts")
+                .select("id,updated_at")
+                .order("updated_at", desc=True)
+                .order("id", desc=True)
+                .limit(1)
+                .execute()
+            )
+            latest = result.data[0] if result.data else None
+            cursor = (
+                encode_cursor(latest["updated_at"], latest["id"])
+                if latest
+                else encode_cursor(*EPOCH_CURSOR)
+            )
+            return ORJSONResponse(
+                {"posts": [], "removed": [], "cursor": cursor, "has_more": False}
+            )
+
+        updated_at, last_id = after
+        result = (
+            supabase.table("posts")
+            .select(post_projection(POST_FIELDS + ("updated_at", "is_published")))
+            .or_(
+                f'updated_at.gt."{updated_at}",'
+                f'and(updated_at.eq."{updated_at}",id.gt.{last_id})'
+            )
+            .order("updated_at")
+            .order("id")
+            .limit(limit)
+            .execute()
+        )
+
+        if not result.data:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED)
+
+        last = result.data[-1]
+        return ORJSONResponse(
+            {
+                "posts": [
+                    post_row_to_dict(post)
+                    for post in result.data
+                    if post.get("is_published", True)
+                ],
+                "removed": [
+                    post["id"]
+                    for post in result.data
+                    if not post.get("is_published", True)
+                ],
+                "cursor": encode_cursor(last["updated_at"], last["id"]),
+                "has_more": len(result.data) == limit,
+            }
+        )
+
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("Error fetching post changes")
+        raise HTTPException(status_code=500, detail="Failed to fetch post changes")
+
+
+@router.get("/search")
+async def search_posts(request: Request, q: str, limit: int = 20, cursor: Optional[str] = None):
+    """
+    Full-text search over post texts and author names, best matches first
+
+    Query Parameters:
+    - q: Search query; supports "quoted phrases", -excluded words and "or"
+    - limit: Results per page (default: 20, max: 50)
+    - cursor: `next_cursor` from the previous page
+
+    Returns `posts` (each with its `rank`), `next_cursor` and `has_more`.
+    Served from the shared feed cache when possible.
+    """
+    query = " ".join(q.split()).lower()
+    if not query or len(query) > 100:
+        raise HTTPException(
+            status_code=400, detail="Query must be between 1 and 100 characters"
+        )
+
+    if limit < 1 or limit > 50:
+        raise HTTPException(
+            status_code=400, detail="Limit must be between 1 and 50"
+        )
+
+    after_rank, after_id = None, None
+    if cursor:
+        try:
+            after_rank, after_id = decode_cursor(cursor, 2)
+            after_rank = float(after_rank)
+            after_id = str(UUID(after_id))
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    accept_encoding = request.headers.get("accept-encoding", "")
+    feed_cache = get_feed_cache()
+    if feed_cache is not None:
+        cache_key = f"search:{query}:{limit}:{cursor or ''}"
+        generation = feed_cache.generation
+        cached = await cached_json_response(feed_cache, cache_key, accept_encoding)
+        cache_requests.inc("search", "hit" if cached is not None else "miss")
+        if cached is not None:
+            return cached
+
+    try:
+        supabase = get_supabase_client()
+        # One extra row tells us whether there is another page
+        result = await asyncio.to_thread(
+            lambda: supabase.rpc(
+                "search_posts",
+                {
+                    "query": query,
+                    "after_rank": after_rank,
+                    "after_id": after_id,
+                    "result_limit": limit + 1,
+                },
+            ).execute()
+        )
+    except Exception:
+        logger.exception("Error searching posts")
+        raise HTTPException(status_code=500, detail="Failed to search posts")
+
+    rows = result.data or []
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    body = orjson.dumps(
+        {
+            "posts": [
+                {**post_row_to_dict(post), "rank": post["rank"]} for post in rows
+            ],
+            "next_cursor": (
+                encode_cursor(rows[-1]["rank"], rows[-1]["id"]) if has_more else None
+            ),
+            "has_more": has_more,
+        }
+    )
+    if feed_cache is not None:
+        feed_cache.put(cache_key, body, generation)
+        return await json_response(
+            body, accept_encoding, feed_cache, cache_key, generation
+        )
+    return Response(body, media_type="application/json")
+
+
 @router.get("/{post_id}", response_model=PostResponse)
-async def get_post(post_id: str):
+async def get_post(post_id: str, request: Request):
     """
     Get a specific post by ID
+
+    Served from the shared feed cache when possible.
     """
+    accept_encoding = request.headers.get("accept-encoding", "")
+    feed_cache = get_feed_cache()
+    if feed_cache is not None:
+        cache_key = post_key(post_id)
+        generation = feed_cache.generation
+        cached = await cached_json_response(feed_cache, cache_key, accept_encoding)
+        cache_requests.inc("post", "hit" if cached is not None else "miss")
+        if cached is not None:
+            return cached
+
     try:
         supabase = get_supabase_client()
 
@@ -244,6 +592,13 @@ async def get_post(post_id: str):
 
         post = result.data[0]
 
+        if feed_cache is not None:
+            body = orjson.dumps(post_row_to_dict(post))
+            feed_cache.put(cache_key, body, generation)
+            return await json_response(
+                body, accept_encoding, feed_cache, cache_key, generation
+            )
+
         return PostResponse(
             id=post["id"],
             text=post["text"],
@@ -256,6 +611,97 @@ async def get_post(post_id: str):
 
     except HTTPException:
         raise
-    except Exception as e:
-        print(f"Error fetching post: {e}")
+    except Exception:
+        logger.exception("Error fetching post")
         raise HTTPException(status_code=500, detail="Failed to fetch post")
+
+
+@router.get("/{post_id}/related")
+async def get_related_posts(post_id: str, request: Request, limit: int = 6):
+    """
+    Get posts with similar text, most similar first
+
+    Query Parameters:
+    - limit: Number of posts (default: 6, max: 20)
+
+    Returns `posts`, each with a `score` (cosine similarity, 0-1).
+    Served from the shared feed cache when possible.
+    """
+    if limit < 1 or limit > 20:
+        raise HTTPException(
+            status_code=400, detail="Limit must be between 1 and 20"
+        )
+    try:
+        post_id = str(UUID(post_id))
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Post not found")
+
+    accept_encoding = request.headers.get("accept-encoding", "")
+    feed_cache = get_feed_cache()
+    if feed_cache is not None:
+        cache_key = f"related:{post_id}:{limit}"
+        generation = feed_cache.generation
+        cached = await cached_json_response(feed_cache, cache_key, accept_encoding)
+        cache_requests.inc("related", "hit" if cached is not None else "miss")
+        if cached is not None:
+            return cached
+
+    try:
+        # Imported here: it loads numpy, which nothing else on the import
+        # path of app.main needs
+        from app.services.related_index import get_related_index
+
+        index = get_related_index()
+        # Ask for extra candidates: some may be unpublished
+        candidates = limit * 2
+        matches = await asyncio.to_thread(index.related, post_id, candidates)
+
+        supabase = get_supabase_client()
+        if matches is None:
+            # Not indexed yet (created by another instance since the last catch-up)
+            result = await asyncio.to_thread(
+                lambda: supabase.table("posts")
+                .select("text")
+                .eq("id", post_id)
+                .eq("is_published", True)
+                .execute()
+            )
+            if not result.data:
+                raise HTTPException(status_code=404, detail="Post not found")
+            matches = await asyncio.to_thread(
+                index.related, post_id, candidates, result.data[0]["text"]
+            )
+
+        scores = dict(matches)
+        posts = []
+        if scores:
+            result = await asyncio.to_thread(
+                lambda: supabase.table("posts")
+                .select(post_projection(POST_FIELDS))
+                .in_("id", list(scores))
+                .eq("is_published", True)
+                .execute()
+            )
+            rows = sorted(result.data, key=lambda post: scores[post["id"]], reverse=True)
+            missing = scores.keys() - {post["id"] for post in rows}
+            if missing:
+                # Unpublished or deleted since they were indexed
+                await asyncio.to_thread(index.remove_many, missing)
+            posts = [
+                {**post_row_to_dict(post), "score": round(scores[post["id"]], 4)}
+                for post in rows[:limit]
+            ]
+
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("Error fetching related posts")
+        raise HTTPException(status_code=500, detail="Failed to fetch related posts")
+
+    body = orjson.dumps({"posts": posts})
+    if feed_cache is not None:
+        feed_cache.put(cache_key, body, generation)
+        return await json_response(
+            body, accept_encoding, feed_cache, cache_key, generation
+        )
+    return Response(body, media_type="application/json")
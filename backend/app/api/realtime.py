@@ -0,0 +1,95 @@
+"""Realtime API endpoints (Server-Sent Events)"""
+
+from uuid import UUID
+
+import orjson
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from app.services.broadcaster import (
+    POSTS_TOPIC,
+    Subscription,
+    comments_topic,
+    get_broadcaster,
+)
+
+router = APIRouter(prefix="/api/realtime", tags=["realtime"])
+
+# Seconds between keepalive comments on an idle stream
+KEEPALIVE_INTERVAL = 15.0
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # Disable proxy buffering
+}
+
+
+async def _event_stream(request: Request, subscription: Subscription):
+    """Yield SSE frames for a subscription until the client goes away"""
+    broadcaster = get_broadcaster()
+    try:
+        yield b"retry: 5000\n\n"
+        while True:
+            try:
+                event = await subscription.get(timeout=KEEPALIVE_INTERVAL)
+            except ConnectionAbortedError:
+                # Slow consumer was evicted; the client reconnects and resyncs
+                yield b"event: evicted\ndata: {}\n\n"
+                return
+
+            if event is None:
+                if await request.is_disconnected():
+                    return
+                yield b": keepalive\n\n"
+                continue
+
+            yield (
+                b"event: " + event["type"].encode() + b"\n"
+                b"data: " + orjson.dumps(event["data"]) + b"\n\n"
+            )
+    finally:
+        broadcaster.unsubscribe(subscription)
+
+
+def _subscribe(request: Request, topic: str) -> StreamingResponse:
+    try:
+        subscription = get_broadcaster().subscribe(topic)
+    except OverflowError:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many realtime subscriptions, please poll instead",
+            headers={"Retry-After": "30"},
+        )
+
+    return StreamingResponse(
+        _event_stream(request, subscription),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
+@router.get("/posts")
+async def stream_posts(request: Request):
+    """
+    Stream newly published posts
+
+    Emits `post` events whose data matches the PostResponse shape.
+    """
+    return _subscribe(request, POSTS_TOPIC)
+
+
+@router.get("/comments/{post_id}")
+async def stream_comments(post_id: str, request: Request):
+    """
+    Stream new comments on a post
+
+    Emits `comment` events whose data matches the CommentResponse shape.
+    """
+    # Every comments topic ends up in the shared poll's post_id filter, so
+    # only well-formed ids may subscribe
+    try:
+        post_id = str(UUID(post_id))
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Post not found")
+
+    return _subscribe(request, comments_topic(post_id))
@@ -0,0 +1,327 @@
+"""Generate images and posts in bulk from a CSV of phrases
+
+Usage:
+    python -m app.cli.bulk_generate phrases.csv
+    python -m app.cli.bulk_generate phrases.csv --concurrency 8 --rate 30 --batch-size 50
+
+The CSV needs a ``text`` column and may have ``author_name`` and ``id``
+columns. Progress is appended to a JSONL journal (``<csv>.journal.jsonl`` by
+default); running the same command again after a crash skips rows that were
+already inserted and inserts, without regenerating, rows whose image was
+already uploaded. Each post id is chosen here and journaled before the insert,
+which is an upsert on that id, so a crash between the insert and its journal
+entry can't create the post twice.
+
+Generation goes straight through ImageGenerator and StorageService, so the
+API rate limiter does not apply; ``--rate`` is the global budget instead.
+"""
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import logging
+import os
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import orjson
+
+from app.config import settings
+from app.services import get_image_generator, get_storage_service, get_supabase_client
+from app.services.feed_cache import get_feed_cache
+from app.utils import clean_post_input
+from app.utils.log import configure_logging
+
+logger = logging.getLogger("app.cli.bulk_generate")
+
+# Journal statuses
+GENERATED = "generated"  # Image uploaded and post id chosen, post not inserted yet
+INSERTED = "inserted"  # Done
+FAILED = "failed"  # Generation failed; retried on the next run
+INVALID = "invalid"  # Rejected by validation; never retried
+
+
+def read_rows(path: str) -> List[Dict[str, str]]:
+    """
+    Read the CSV and give each row a stable key
+
+    The key is the ``id`` column when present, otherwise a hash of the text
+    and author (numbered for repeated phrases), so it survives reordering.
+    """
+    rows = []
+    seen: Dict[str, int] = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            text = (row.get("text") or "").strip()
+            author_name = (row.get("author_name") or "").strip() or None
+            key = (row.get("id") or "").strip()
+            if not key:
+                digest = hashlib.sha1(f"{text}\0{author_name or ''}".encode()).hexdigest()[:16]
+                seen[digest] = seen.get(digest, 0) + 1
+                key = f"{digest}-{seen[digest]}"
+            rows.append({"key": key, "text": text, "author_name": author_name})
+    return rows
+
+
+class Journal:
+    """Append-only JSONL record of per-row progress; the last entry per key wins"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, dict] = {}
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                for line in f:
+                    try:
+                        entry = orjson.loads(line)
+                    except orjson.JSONDecodeError:
+                        continue  # Torn last line from a crash
+                    self.entries[entry["key"]] = entry
+        self._file = open(path, "ab")
+
+    def record(self, key: str, status: str, **fields) -> None:
+        entry = {"key": key, "status": status, "at": time.time(), **fields}
+        self.entries[key] = entry
+        self._file.write(orjson.dumps(entry) + b"\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def status(self, key: str) -> Optional[str]:
+        entry = self.entries.get(key)
+        return entry["status"] if entry else None
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class RateBudget:
+    """Spaces out operations so at most ``per_minute`` start per minute"""
+
+    def __init__(self, per_minute: float):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class Progress:
+    """Counts outcomes and logs throughput periodically"""
+
+    def __init__(self, total: int, interval_seconds: float = 15.0):
+        self.total = total
+        self.interval_seconds = interval_seconds
+        self.generated = 0
+        self.inserted = 0
+        self.failed = 0
+        self.started = time.monotonic()
+
+    def summary(self) -> str:
+        elapsed = time.monotonic() - self.started
+        per_minute = self.generated / elapsed * 60 if elapsed > 0 else 0.0
+        remaining = self.total - self.generated - self.failed
+        eta = f"{remaining / per_minute:.1f} min" if per_minute > 0 else "-"
+        return (
+            f"generated {self.generated}/{self.total}, inserted {self.inserted}, "
+            f"failed {self.failed}, {per_minute:.1f} images/min, "
+            f"elapsed {elapsed / 60:.1f} min, ETA {eta}"
+        )
+
+    async def report_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            logger.info("Progress: %s", self.summary())
+
+
+class BulkGenerator:
+    """Bounded pool of generation workers feeding a batched inserter"""
+
+    def __init__(
+        self,
+        journal: Journal,
+        concurrency: int,
+        rate_per_minute: float,
+        batch_size: int,
+        retries: int,
+    ):
+        self.journal = journal
+        self.concurrency = concurrency
+        self.budget = RateBudget(rate_per_minute)
+        self.batch_size = batch_size
+        self.retries = retries
+        self.pending: List[dict] = []  # Generated, waiting to be inserted
+        self.progress: Optional[Progress] = None
+
+    async def run(self, rows: List[Dict[str, str]]) -> Progress:
+        todo = asyncio.Queue()
+        for row in rows:
+            status = self.journal.status(row["key"])
+            if status in (INSERTED, INVALID):
+                continue
+            if status == GENERATED:
+                # Uploaded before a crash: only the insert is missing
+                entry = self.journal.entries[row["key"]]
+                if "post_id" not in entry:
+                    # Journaled by an older version, which let the database pick
+                    entry = self._record_generated(
+                        row["key"], entry["text"], entry["author_name"], entry["image_url"]
+                    )
+                self.pending.append(entry)
+                continue
+            todo.put_nowait(row)
+
+        self.progress = Progress(todo.qsize())
+        logger.info(
+            "%d rows: %d to generate, %d to insert, %d already done",
+            len(rows),
+            todo.qsize(),
+            len(self.pending),
+            len(rows) - todo.qsize() - len(self.pending),
+        )
+
+        reporter = asyncio.create_task(self.progress.report_forever())
+        try:
+            await self.flush(force=False)
+            workers = [
+                asyncio.create_task(self.worker(todo)) for _ in range(self.concurrency)
+            ]
+            await asyncio.gather(*workers)
+            await self.flush(force=True)
+        finally:
+            reporter.cancel()
+        return self.progress
+
+    async def worker(self, todo: asyncio.Queue) -> None:
+        generator = get_image_generator()
+        storage = get_storage_service()
+        while not todo.empty():
+            row = todo.get_nowait()
+            try:
+                text, author_name = clean_post_input(row["text"], row["author_name"])
+            except ValueError as e:
+                self.journal.record(row["key"], INVALID, error=str(e))
+                self.progress.failed += 1
+                continue
+
+            for attempt in range(self.retries + 1):
+                await self.budget.acquire()
+                try:
+                    image_bytes = await generator.generate_fatherhood_image(text)
+                    image_url = await storage.upload_image(image_bytes)
+                    break
+                except Exception as e:
+                    logger.warning(
+                        "Row %s attempt %d failed: %s", row["key"], attempt + 1, e
+                    )
+                    if attempt == self.retries:
+                        self.journal.record(row["key"], FAILED, error=str(e))
+                        self.progress.failed += 1
+                    else:
+                        await asyncio.sleep(2 ** attempt * 5)
+            else:
+                continue  # Every attempt failed
+
+            self.pending.append(self._record_generated(row["key"], text, author_name, image_url))
+            self.progress.generated += 1
+            await self.flush(force=False)
+
+    def _record_generated(
+        self, key: str, text: str, author_name: Optional[str], image_url: str
+    ) -> dict:
+        """Journal an uploaded image with the id its post will be inserted under"""
+        self.journal.record(
+            key,
+            GENERATED,
+            text=text,
+            author_name=author_name,
+            image_url=image_url,
+            post_id=str(uuid.uuid4()),
+        )
+        return self.journal.entries[key]
+
+    async def flush(self, force: bool) -> None:
+        """
+        Insert pending posts in batches of ``batch_size`` (any remainder if forced)
+
+        A batch that fails to insert goes back to the front of ``pending`` and
+        is retried by the next flush; whatever is left after the final one
+        stays "generated" in the journal for the next run.
+        """
+        while self.pending and (force or len(self.pending) >= self.batch_size):
+            batch, self.pending = self.pending[: self.batch_size], self.pending[self.batch_size :]
+            records = [
+                {
+                    "id": entry["post_id"],
+                    "text": entry["text"],
+                    "image_url": entry["image_url"],
+                    "author_name": entry["author_name"],
+                }
+                for entry in batch
+            ]
+            try:
+                client = get_supabase_client()
+                # Rows that exist were inserted before a crash: leave them be
+                await asyncio.to_thread(
+                    lambda: client.table("posts")
+                    .upsert(records, on_conflict="id", ignore_duplicates=True)
+                    .execute()
+                )
+            except Exception as e:
+                logger.error("Failed to insert a batch of %d posts: %s", len(batch), e)
+                self.pending = batch + self.pending
+                return
+
+            for entry in batch:
+                self.journal.record(entry["key"], INSERTED, post_id=entry["post_id"])
+            self.progress.inserted += len(batch)
+
+            feed_cache = get_feed_cache()
+            if feed_cache is not None:
+                feed_cache.invalidate()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("csv", help="CSV file with a text column")
+    parser.add_argument(
+        "--journal", help="Progress journal (default: <csv>.journal.jsonl)"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=4, help="Generations in flight (default: 4)"
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=20.0,
+        help="Maximum generations started per minute, 0 for unlimited (default: 20)",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=50, help="Posts per insert (default: 50)"
+    )
+    parser.add_argument(
+        "--retries", type=int, default=2, help="Retries per row on failure (default: 2)"
+    )
+    args = parser.parse_args()
+
+    configure_logging(settings.log_level, "text")
+
+    rows = read_rows(args.csv)
+    journal = Journal(args.journal or f"{args.csv}.journal.jsonl")
+    bulk = BulkGenerator(journal, args.concurrency, args.rate, args.batch_size, args.retries)
+    try:
+        progress = asyncio.run(bulk.run(rows))
+        logger.info("Done: %s", progress.summary())
+    finally:
+        journal.close()
+
+
+if __name__ == "__main__":
+    main()
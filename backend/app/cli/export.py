@@ -0,0 +1,53 @@
+"""Export posts or comments as NDJSON
+
+Usage:
+    python -m app.cli.export posts -o posts.ndjson
+    python -m app.cli.export comments --since 2025-01-01T00:00:00+00:00 --gzip -o comments.ndjson.gz
+"""
+
+import argparse
+import sys
+from datetime import datetime
+
+from app.services import get_supabase_client
+from app.services.export import DEFAULT_BATCH_SIZE, EXPORTABLE_TABLES, export_table
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("table", choices=EXPORTABLE_TABLES)
+    parser.add_argument(
+        "--since",
+        type=datetime.fromisoformat,
+        help="Only rows created or updated at/after this ISO timestamp",
+    )
+    parser.add_argument("--gzip", action="store_true", help="Gzip the output")
+    parser.add_argument(
+        "--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Rows per query"
+    )
+    parser.add_argument(
+        "-o", "--output", help="Output file (default: stdout)", default="-"
+    )
+    args = parser.parse_args()
+
+    chunks = export_table(
+        get_supabase_client(),
+        args.table,
+        since=args.since,
+        compress=args.gzip,
+        batch_size=args.batch_size,
+    )
+
+    if args.output == "-":
+        out = sys.stdout.buffer
+        for chunk in chunks:
+            out.write(chunk)
+        out.flush()
+    else:
+        with open(args.output, "wb") as out:
+            for chunk in chunks:
+                out.write(chunk)
+
+
+if __name__ == "__main__":
+    main()
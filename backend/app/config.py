@@ -28,8 +28,102 @@ class Settings(BaseSettings):
     api_port: int = 8000
     frontend_url: str = "http://localhost:3000"
 
+    # Logging
+    log_level: str = "INFO"
+    log_format: str = "json"  # json (one object per line) or text
+
     # Rate Limiting
     rate_limit_per_hour: int = 10
+    # Hourly budget of cost units per IP across the API (see ROUTE_COSTS)
+    api_budget_per_hour: int = 1000
+    # Comma-separated networks whose X-Forwarded-For / X-Real-IP are trusted
+    trusted_proxies: str = "127.0.0.0/8,::1/128,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16"
+    # Where limiter counters live: memory (per process), shared (all workers
+    # on this host), redis (all instances)
+    rate_limit_store: str = "memory"
+    rate_limit_redis_url: str = ""
+    rate_limit_shm_dir: str = "/dev/shm"
+
+    # Image generation admission control
+    generation_max_in_flight: int = 4  # Concurrent generations per process
+    generation_max_in_flight_per_client: int = 1
+    generation_max_queued_per_client: int = 2  # Beyond this: 429
+    generation_max_queued: int = 32  # Beyond this: 503
+    generation_max_queue_wait: float = 30.0  # Seconds before 503
+
+    # Moderation: blocked terms file (default: app/utils/blocked_words.txt),
+    # reloaded automatically when it changes
+    blocked_terms_path: str = ""
+
+    # Near-duplicate prompt flood protection
+    duplicate_window_minutes: float = 15.0  # How long a prompt is remembered
+    duplicate_max_distance: int = 6  # SimHash bits that may differ (max 7)
+    duplicate_max_cluster: int = 5  # Near-identical prompts allowed per window
+
+    # Idempotency-Key support (per process)
+    idempotency_ttl_hours: float = 24.0
+    idempotency_max_entries: int = 10000
+
+    # Realtime (SSE) fan-out
+    realtime_poll_interval: float = 2.0  # Seconds between change polls
+    realtime_poll_overlap: float = 5.0  # Seconds re-read per poll, for late commits
+    realtime_queue_size: int = 64  # Events buffered per subscriber
+    realtime_max_subscribers: int = 1000  # Per process
+    realtime_max_topics: int = 200  # Per process: the feed plus one per streamed post
+
+    # Load shedding: low-priority requests get 503 beyond these (per process)
+    loop_lag_interval: float = 0.1  # Seconds between event loop lag samples
+    shed_max_loop_lag_ms: float = 250.0
+    shed_max_in_flight: int = 100
+
+    # Health probes (run in the background, results cached)
+    health_check_interval: float = 30.0  # Seconds between probe rounds
+    health_check_timeout: float = 5.0  # Per-probe timeout
+
+    # Admin endpoints (disabled when not set)
+    admin_api_key: Optional[str] = None
+
+    # Profiling (admin /api/admin/profile endpoints)
+    profiler_max_overhead: float = 0.02  # Max fraction of wall time spent sampling
+    # Comma-separated route templates whose slow requests are traced,
+    # e.g. "/api/posts,/api/posts/{post_id}" (empty: disabled)
+    profile_slow_routes: str = ""
+    profile_slow_threshold_ms: float = 1000.0
+
+    # Feed cache: serialized GET /api/posts pages and single posts, shared by
+    # all workers on a host through an mmap'd file (TTL 0 disables it)
+    feed_cache_ttl: float = 15.0  # Seconds
+    feed_cache_dir: str = "/dev/shm"
+    feed_cache_slots: int = 512
+    feed_cache_slot_kb: int = 64  # Larger responses are not cached
+
+    # Response compression (gzip, or brotli with the optional brotli package)
+    compression_min_size: int = 1024  # Bytes; smaller bodies are sent as is
+    compression_offload_size: int = 32768  # Bytes; larger bodies compress off the event loop
+
+    # Image proxy (/img/{name}): bucket images cached on local disk
+    image_proxy_cache_dir: str = "data/img-cache"
+    image_proxy_cache_mb: int = 1024  # Least recently used files are evicted beyond this
+    # Widths (px) that ?w= is rounded up to; larger requests get the original
+    image_proxy_widths: str = "256,384,640,828,1080"
+    image_proxy_max_age: int = 86400  # Cache-Control max-age, seconds
+
+    # Feed snapshots: first pages of the newest and popular feeds rendered to
+    # gzipped JSON in the storage bucket (pages 0 disables them)
+    feed_snapshot_pages: int = 3
+    feed_snapshot_limit: int = 20
+    feed_snapshot_ttl: int = 60  # Cache-Control max-age, seconds
+    feed_snapshot_debounce: float = 5.0  # Seconds to wait after a new post
+    feed_snapshot_interval: float = 300.0  # Seconds between periodic renders
+
+    # Related posts: hashed text vectors in memory-mapped files on local disk
+    related_index_dir: str = "data/related"
+    related_index_dims: int = 128  # Changing it rebuilds the index
+    related_sync_interval: float = 300.0  # Seconds between catch-ups
+
+    # Serialization
+    # Skip per-row Pydantic validation on list endpoints and encode with orjson
+    fast_serialization: bool = False
 
     @property
     def is_production(self) -> bool:
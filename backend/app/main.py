@@ -1,20 +1,110 @@
 """FastAPI application - Main entry point"""
 
+import asyncio
 import os
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from app.api.posts import router as posts_router
 from app.api.comments import router as comments_router
+from app.api.admin import router as admin_router
+from app.api.realtime import router as realtime_router
+from app.api.images import router as images_router
+from app.middleware.rate_limiter import post_creation_limiter, general_api_limiter
+from app.middleware.rate_limit_middleware import RateLimitMiddleware
+from app.middleware.load_shedding import LoadSheddingMiddleware
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.metrics_middleware import MetricsMiddleware
+from app.middleware.request_context import RequestContextMiddleware
+from app.middleware.slow_request_tracing import SlowRequestTracingMiddleware
+from app.middleware.admin_auth import require_admin
+from app.services.health import get_health_monitor
+from app.services.lifecycle import start_services, stop_services
+from app.services.loop_monitor import get_loop_monitor
+from app.services.feed_snapshots import get_feed_snapshotter
+from app.services.storage import get_storage_service
+from app.services.db import get_supabase_client
+from app.services.profiler import get_slow_request_tracer
+from app.services.metrics import render_metrics
+from app.utils.log import configure_logging
 from app.config import settings
 
+configure_logging(settings.log_level, settings.log_format)
+
+
+async def warm_up():
+    """Run the first round of health probes, then keep probing in the background"""
+    monitor = get_health_monitor()
+    await monitor.run_once()
+    monitor.warmed_up = True
+    await monitor.run_forever()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Build service clients and start background tasks on startup; stop them and
+    close connection pools on shutdown
+
+    Clients are built before the server accepts requests. Dependency probes
+    (which also open the first connections) run in the background, and
+    /health/ready reports 503 until their first round finishes.
+    """
+    await start_services()
+
+    # One eviction loop per store (limiters with the same window share one)
+    limiter_stores = {
+        limiter.store for limiter in (post_creation_limiter, general_api_limiter)
+    }
+    background_tasks = [
+        asyncio.create_task(store.run_eviction()) for store in limiter_stores
+    ]
+    background_tasks.append(asyncio.create_task(warm_up()))
+    background_tasks.append(asyncio.create_task(get_loop_monitor().run()))
+    # Imported here rather than at the top: it loads numpy
+    from app.services.related_index import get_related_index
+
+    background_tasks.append(
+        asyncio.create_task(
+            get_related_index().run_forever(
+                get_supabase_client, settings.related_sync_interval
+            )
+        )
+    )
+    snapshotter = get_feed_snapshotter()
+    if snapshotter is not None:
+        background_tasks.append(
+            asyncio.create_task(
+                snapshotter.run_forever(get_supabase_client, get_storage_service)
+            )
+        )
+
+    yield
+
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    await stop_services()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="Fatherhood Is API",
     description="Backend API for Fatherhood Is platform - AI-generated 'Love Is...' style illustrations",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
+# Rate limiting runs before body parsing; added first so that CORS wraps it
+# and 429 responses stay readable by the browser
+app.add_middleware(RateLimitMiddleware)
+
+# Shed low-priority requests under overload, before they are rate-limit
+# charged; inside CORS so 503s stay readable by the browser
+app.add_middleware(LoadSheddingMiddleware)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -22,8 +112,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID", "Server-Timing", "Retry-After"],
 )
 
+# Compress response bodies that the handlers did not compress themselves
+app.add_middleware(CompressionMiddleware)
+
+# Opt-in tracing of slow requests; inside RequestContextMiddleware so traces
+# carry the request id
+slow_request_tracer = get_slow_request_tracer()
+if slow_request_tracer is not None:
+    app.add_middleware(SlowRequestTracingMiddleware, tracer=slow_request_tracer)
+
+# Request ids and Server-Timing for everything below, including 429s
+app.add_middleware(RequestContextMiddleware)
+
+# Outermost, so recorded latency covers every other middleware
+app.add_middleware(MetricsMiddleware)
+
 # Create uploads directory if it doesn't exist
 uploads_dir = "uploads"
 os.makedirs(uploads_dir, exist_ok=True)
@@ -34,6 +140,9 @@ app.mount("/uploads", StaticFiles(directory=uploads_dir), name="uploads")
 # Include routers
 app.include_router(posts_router)
 app.include_router(comments_router)
+app.include_router(realtime_router)
+app.include_router(admin_router)
+app.include_router(images_router)
 
 
 @app.get("/")
@@ -48,18 +157,46 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Detailed health check"""
+    """Detailed health check from the latest cached probe results"""
+    snapshot = get_health_monitor().snapshot()
     return {
-        "status": "healthy",
+        "status": "healthy" if snapshot["ready"] else "degraded",
         "environment": settings.environment,
         "services": {
-            "database": "ok",  # TODO: Add actual health checks
-            "storage": "ok",
-            "image_generation": "ok",
+            name: result["status"] for name, result in snapshot["services"].items()
         },
     }
 
 
+@app.get("/health/live")
+async def liveness_check():
+    """Liveness: the process is up and serving requests"""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def readiness_check():
+    """
+    Readiness: warm-up finished and database, storage and image generation
+    probes last succeeded. Returns 503 otherwise.
+    """
+    snapshot = get_health_monitor().snapshot()
+    return JSONResponse(snapshot, status_code=200 if snapshot["ready"] else 503)
+
+
+@app.get("/metrics", dependencies=[Depends(require_admin)])
+async def metrics():
+    """
+    Prometheus metrics in text exposition format
+
+    Requires the admin key (X-Admin-Key header): route names, error rates and
+    cache ratios are not for the public.
+    """
+    return PlainTextResponse(
+        render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
 
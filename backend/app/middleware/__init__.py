@@ -1,13 +1,26 @@
 """Middleware package"""
 
 from .rate_limiter import (
-    rate_limit_post_creation,
-    rate_limit_general_api,
     get_client_ip,
+    get_client_ip_from_scope,
 )
+from .rate_limit_middleware import RateLimitMiddleware, RouteCost, ROUTE_COSTS
+from .admin_auth import require_admin
+from .metrics_middleware import MetricsMiddleware
+from .request_context import RequestContextMiddleware
+from .slow_request_tracing import SlowRequestTracingMiddleware
+from .load_shedding import LoadSheddingMiddleware, HIGH_PRIORITY_ROUTES
 
 __all__ = [
-    "rate_limit_post_creation",
-    "rate_limit_general_api",
     "get_client_ip",
+    "get_client_ip_from_scope",
+    "RateLimitMiddleware",
+    "RouteCost",
+    "ROUTE_COSTS",
+    "require_admin",
+    "MetricsMiddleware",
+    "RequestContextMiddleware",
+    "SlowRequestTracingMiddleware",
+    "LoadSheddingMiddleware",
+    "HIGH_PRIORITY_ROUTES",
 ]
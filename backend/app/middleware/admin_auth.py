@@ -0,0 +1,27 @@
+"""Authentication for admin-only endpoints"""
+
+import hmac
+
+from fastapi import HTTPException, Request, status
+
+from app.config import settings
+
+
+async def require_admin(request: Request):
+    """
+    Require a valid admin API key in the X-Admin-Key header
+
+    Admin endpoints are disabled entirely when ADMIN_API_KEY is not set.
+
+    Raises:
+        HTTPException: 404 if admin endpoints are disabled, 401 if the key is wrong
+    """
+    if not settings.admin_api_key:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+    provided = request.headers.get("X-Admin-Key", "")
+    # Bytes: compare_digest rejects str with non-ASCII characters
+    if not hmac.compare_digest(provided.encode(), settings.admin_api_key.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid admin key"
+        )
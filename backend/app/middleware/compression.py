@@ -0,0 +1,87 @@
+"""ASGI middleware compressing response bodies"""
+
+from typing import Any, Callable, Dict, Optional
+
+from app.config import settings
+from app.utils.compression import (
+    COMPRESSIBLE_TYPES,
+    compress_async,
+    negotiate_encoding,
+)
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with gzip or brotli when the client accepts it
+
+    Only complete bodies (sent in a single message) of a compressible type and
+    at least COMPRESSION_MIN_SIZE bytes are compressed. Streaming responses
+    (Server-Sent Events, exports) and responses that already have a
+    Content-Encoding, such as cached precompressed JSON, pass through as is.
+    """
+
+    def __init__(self, app: Callable, minimum_size: Optional[int] = None):
+        self.app = app
+        self.minimum_size = (
+            minimum_size if minimum_size is not None else settings.compression_min_size
+        )
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ""
+        for key, value in scope["headers"]:
+            if key == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = negotiate_encoding(accept_encoding)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Dict[str, Any]] = None
+        passthrough = False
+
+        async def send_wrapper(message: Dict[str, Any]):
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = dict(message.get("headers", []))
+                content_type = headers.get(b"content-type", b"")
+                if (
+                    b"content-encoding" in headers
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                    or content_type.startswith(b"text/event-stream")
+                ):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start = message  # Held until we know what the body is
+                return
+
+            body = message.get("body", b"")
+            if message.get("more_body", False) or len(body) < self.minimum_size:
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            compressed = await compress_async(body, encoding)
+            headers = [
+                (key, value)
+                for key, value in start.get("headers", [])
+                if key != b"content-length"
+            ]
+            headers.append((b"content-encoding", encoding.encode()))
+            headers.append((b"content-length", str(len(compressed)).encode()))
+            headers.append((b"vary", b"Accept-Encoding"))
+            start["headers"] = headers
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,471 @@
+"""Storage backends for RateLimiter
+
+Every store implements the same sliding-window counter: two counters per key
+(previous and current fixed window). `hit_many` checks any number of keys and,
+only if every one of them fits its limit, increments them all, in a single
+atomic operation. It returns everything the limiters need to answer
+remaining/retry-after questions, so a shared store costs at most one
+round-trip per request and a rejected request is never partially charged.
+
+- MemoryLimiterStore: per-process dict (default)
+- SharedMemoryLimiterStore: mmap-backed table shared by all workers on a host
+- RedisLimiterStore: network KV store updated by an atomic Lua script
+
+Keys are "<limiter>:<client>"; all keys of one `hit_many` call belong to the
+same client.
+"""
+
+import asyncio
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.services.metrics import rate_limit_store_overflows
+
+
+class WindowCounts(NamedTuple):
+    """Counter state for one key after a hit"""
+
+    allowed: bool  # Whether this key's charge fits its limit
+    previous: int
+    current: int
+    fraction: float  # Elapsed fraction of the current window
+
+
+# (key, cost, limit)
+Charge = Tuple[str, int, int]
+
+
+class LimiterStore:
+    """Interface for rate limiter storage backends"""
+
+    def __init__(self, window_seconds: float):
+        self.window_seconds = window_seconds
+
+    async def hit_many(self, charges: Sequence[Charge]) -> List[WindowCounts]:
+        """
+        Atomically check several keys and record all hits only if all fit
+
+        Args:
+            charges: (key, cost, limit) per key; cost is the units this
+                request consumes, limit the maximum units per window
+
+        Returns:
+            Counter state per charge, in order, after the operation
+        """
+        raise NotImplementedError
+
+    async def hit(self, key: str, cost: int, limit: int) -> WindowCounts:
+        """
+        Atomically check a key against the limit and record the hit if allowed
+
+        Args:
+            key: Rate limit key (e.g. client IP)
+            cost: Units this request consumes
+            limit: Maximum units per window
+
+        Returns:
+            Counter state after the operation
+        """
+        return (await self.hit_many([(key, cost, limit)]))[0]
+
+    async def peek(self, key: str) -> WindowCounts:
+        """Get counter state for a key without recording a hit"""
+        return await self.hit(key, 0, 0)
+
+    async def run_eviction(self, interval_seconds: float = 60.0) -> None:
+        """Background eviction of idle keys (no-op for self-expiring stores)"""
+
+
+def _roll(
+    stored_index: int, previous: int, current: int, window_index: int
+) -> Tuple[int, int]:
+    """Roll stored counters forward to the given window"""
+    if stored_index == window_index:
+        return previous, current
+    if stored_index == window_index - 1:
+        return current, 0
+    return 0, 0
+
+
+def _decide(previous: int, current: int, fraction: float, cost: int, limit: int) -> bool:
+    return previous * (1.0 - fraction) + current + cost <= limit
+
+
+# Per-key state is packed into a single int: window index in the high bits,
+# then the previous and current window counts in 24 bits each
+_COUNT_BITS = 24
+_COUNT_MASK = (1 << _COUNT_BITS) - 1
+
+
+def _pack(window_index: int, previous: int, current: int) -> int:
+    return (window_index << (2 * _COUNT_BITS)) | (previous << _COUNT_BITS) | current
+
+
+def _window_index_of(state: int) -> int:
+    return state >> (2 * _COUNT_BITS)
+
+
+def _unpack(state: int) -> Tuple[int, int, int]:
+    return (
+        _window_index_of(state),
+        (state >> _COUNT_BITS) & _COUNT_MASK,
+        state & _COUNT_MASK,
+    )
+
+
+class MemoryLimiterStore(LimiterStore):
+    """
+    In-process store
+
+    Holds one packed int per key. Keys whose counters have fully expired are
+    dropped by `run_eviction`.
+    """
+
+    def __init__(self, window_seconds: float):
+        super().__init__(window_seconds)
+        self.state: Dict[str, int] = {}
+
+    def hit_many_sync(self, charges: Sequence[Charge]) -> List[WindowCounts]:
+        window_index, fraction = divmod(time.monotonic() / self.window_seconds, 1.0)
+        window_index = int(window_index)
+
+        results = []
+        for key, cost, limit in charges:
+            previous, current = self.read(key, window_index)
+            allowed = _decide(previous, current, fraction, cost, limit)
+            results.append(WindowCounts(allowed, previous, current, fraction))
+
+        if all(counts.allowed for counts in results):
+            for i, ((key, cost, _), counts) in enumerate(zip(charges, results)):
+                if cost:
+                    current = self.write(
+                        key, window_index, counts.previous, counts.current + cost
+                    )
+                    results[i] = counts._replace(current=current)
+        return results
+
+    def read(self, key: str, window_index: int) -> Tuple[int, int]:
+        """(previous, current) counts for a key, rolled to the window"""
+        state = self.state.get(key)
+        if state is None:
+            return 0, 0
+        stored_index, previous, current = _unpack(state)
+        return _roll(stored_index, previous, current, window_index)
+
+    def write(self, key: str, window_index: int, previous: int, current: int) -> int:
+        """Store counts for a key; returns the (saturated) current count"""
+        current = min(current, _COUNT_MASK)
+        self.state[key] = _pack(window_index, previous, current)
+        return current
+
+    def hit_sync(self, key: str, cost: int, limit: int) -> WindowCounts:
+        return self.hit_many_sync([(key, cost, limit)])[0]
+
+    async def hit_many(self, charges: Sequence[Charge]) -> List[WindowCounts]:
+        return self.hit_many_sync(charges)
+
+    def evict_idle(self, keys: Optional[Iterable[str]] = None) -> int:
+        """
+        Drop keys whose counters have fully expired
+
+        Args:
+            keys: Keys to check (default: all keys)
+
+        Returns:
+            Number of keys evicted
+        """
+        window_index = int(time.monotonic() // self.window_seconds)
+        evicted = 0
+        for key in list(self.state) if keys is None else keys:
+            state = self.state.get(key)
+            if state is not None and _window_index_of(state) < window_index - 1:
+                del self.state[key]
+                evicted += 1
+        return evicted
+
+    async def run_eviction(
+        self, interval_seconds: float = 60.0, batch_size: int = 10000
+    ) -> None:
+        """
+        Periodically evict idle keys in the background
+
+        Scans in batches and yields to the event loop between them, so a large
+        key set never stalls request handling.
+        """
+        while True:
+            await asyncio.sleep(interval_seconds)
+            keys = list(self.state)
+            for start in range(0, len(keys), batch_size):
+                self.evict_idle(keys[start : start + batch_size])
+                await asyncio.sleep(0)
+
+
+class SharedMemoryLimiterStore(LimiterStore):
+    """
+    Store shared by all worker processes on one host
+
+    A fixed-size open-addressing hash table in an mmap'd file (on /dev/shm by
+    default). Each slot holds (key hash, window index, previous, current).
+    Updates are serialized with an flock on the file, taken without blocking
+    the event loop; the monotonic clock is system-wide, so all workers agree
+    on window boundaries. Slots whose counters have fully expired are reused,
+    which doubles as idle-key eviction. A slot still counting for another key
+    is never reused: when a key's whole probe sequence is busy, the key is
+    counted in a per-process store instead (and rate_limit_store_overflows
+    is incremented), so the table being full weakens the limit to per worker
+    rather than resetting anyone's counter.
+    """
+
+    _SLOT = struct.Struct("<QqII")
+    _PROBES = 8
+    _LOCK_RETRY_SECONDS = 0.0005
+
+    def __init__(self, window_seconds: float, path: str, slots: int = 65536):
+        super().__init__(window_seconds)
+        self.slots = slots
+        size = slots * self._SLOT.size
+
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size < size:
+            os.ftruncate(self._fd, size)
+        self._mm = mmap.mmap(self._fd, size)
+        self.overflow = MemoryLimiterStore(window_seconds)
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        # Python's hash() is randomized per process, so use a stable digest
+        digest = int.from_bytes(
+            hashlib.blake2b(key.encode(), digest_size=8).digest(), "little"
+        )
+        return digest or 1  # 0 marks an empty slot
+
+    def _find_slot(self, key_hash: int, window_index: int) -> Optional[int]:
+        """
+        Find the slot offset for a key
+
+        Returns the key's own slot, else an empty or fully expired slot, else
+        None when every slot in the probe sequence is still counting.
+        """
+        start = key_hash % self.slots
+        free = None
+        for probe in range(self._PROBES):
+            offset = ((start + probe) % self.slots) * self._SLOT.size
+            slot_hash, stored_index, _, _ = self._SLOT.unpack_from(self._mm, offset)
+            if slot_hash == key_hash:
+                return offset
+            if slot_hash == 0:
+                # Slots are never emptied, so the key is not further along
+                return offset if free is None else free
+            if free is None and stored_index < window_index - 1:
+                free = offset
+        return free
+
+    def _read(
+        self, key: str, key_hash: int, window_index: int
+    ) -> Tuple[Optional[int], int, int]:
+        """(slot offset or None for overflow, previous, current) for a key"""
+        offset = self._find_slot(key_hash, window_index)
+        if offset is None:
+            return None, *self.overflow.read(key, window_index)
+        slot_hash, stored_index, previous, current = self._SLOT.unpack_from(
+            self._mm, offset
+        )
+        if slot_hash != key_hash:
+            return offset, 0, 0
+        return (offset, *_roll(stored_index, previous, current, window_index))
+
+    def hit_many_sync(
+        self, charges: Sequence[Charge], blocking: bool = True
+    ) -> List[WindowCounts]:
+        """
+        Synchronous hit_many
+
+        Raises:
+            BlockingIOError: If not blocking and another process holds the lock
+        """
+        key_hashes = [self._hash(key) for key, _, _ in charges]
+        fcntl.flock(self._fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        try:
+            window_index, fraction = divmod(time.monotonic() / self.window_seconds, 1.0)
+            window_index = int(window_index)
+
+            results = []
+            for key_hash, (key, cost, limit) in zip(key_hashes, charges):
+                _, previous, current = self._read(key, key_hash, window_index)
+                allowed = _decide(previous, current, fraction, cost, limit)
+                results.append(WindowCounts(allowed, previous, current, fraction))
+
+            if all(counts.allowed for counts in results):
+                for i, (key_hash, (key, cost, _)) in enumerate(zip(key_hashes, charges)):
+                    if not cost:
+                        continue
+                    # Looked up again: an earlier write may have taken the slot
+                    offset, previous, current = self._read(key, key_hash, window_index)
+                    if offset is None:
+                        rate_limit_store_overflows.inc()
+                        current = self.overflow.write(
+                            key, window_index, previous, current + cost
+                        )
+                    else:
+                        current += cost
+                        self._SLOT.pack_into(
+                            self._mm, offset, key_hash, window_index, previous, current
+                        )
+                    results[i] = results[i]._replace(current=current)
+            return results
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def hit_sync(self, key: str, cost: int, limit: int) -> WindowCounts:
+        return self.hit_many_sync([(key, cost, limit)])[0]
+
+    async def hit_many(self, charges: Sequence[Charge]) -> List[WindowCounts]:
+        # The lock is held for microseconds; while another worker has it,
+        # yield to the event loop instead of blocking it
+        while True:
+            try:
+                return self.hit_many_sync(charges, blocking=False)
+            except BlockingIOError:
+                await asyncio.sleep(self._LOCK_RETRY_SECONDS)
+
+    async def run_eviction(self, interval_seconds: float = 60.0) -> None:
+        """Evict idle keys from the per-process overflow store"""
+        await self.overflow.run_eviction(interval_seconds)
+
+
+# Check-and-increment of every key in one round-trip; nothing is recorded
+# unless all keys fit. Uses the Redis server clock so that all instances agree
+# on window boundaries. ARGV: window_ms, then cost and limit per key.
+_REDIS_HIT_SCRIPT = """
+local window_ms = tonumber(ARGV[1])
+
+local t = redis.call('TIME')
+local now_ms = t[1] * 1000 + math.floor(t[2] / 1000)
+local window_index = math.floor(now_ms / window_ms)
+local fraction = (now_ms % window_ms) / window_ms
+
+local results = {}
+local all_allowed = true
+for i, key in ipairs(KEYS) do
+    local cost = tonumber(ARGV[i * 2])
+    local limit = tonumber(ARGV[i * 2 + 1])
+
+    local state = redis.call('HMGET', key, 'w', 'p', 'c')
+    local stored = tonumber(state[1])
+    local previous = tonumber(state[2]) or 0
+    local current = tonumber(state[3]) or 0
+
+    if stored == nil then
+        previous, current = 0, 0
+    elseif stored == window_index - 1 then
+        previous, current = current, 0
+    elseif stored ~= window_index then
+        previous, current = 0, 0
+    end
+
+    local allowed = 0
+    if previous * (1 - fraction) + current + cost <= limit then
+        allowed = 1
+    else
+        all_allowed = false
+    end
+    results[i] = {allowed, previous, current, cost}
+end
+
+local reply = {tostring(fraction)}
+for i, key in ipairs(KEYS) do
+    local allowed, previous, current, cost = unpack(results[i])
+    if all_allowed and cost > 0 then
+        current = current + cost
+        redis.call('HSET', key, 'w', window_index, 'p', previous, 'c', current)
+        redis.call('PEXPIRE', key, window_ms * 2)
+    end
+    table.insert(reply, allowed)
+    table.insert(reply, previous)
+    table.insert(reply, current)
+end
+return reply
+"""
+
+
+class RedisLimiterStore(LimiterStore):
+    """
+    Store shared across instances through Redis
+
+    The whole check-and-increment of every key runs server-side in a Lua
+    script, so it is atomic and costs exactly one round-trip. Keys expire on
+    their own after two windows. Redis keys look like
+    ratelimit:{<client>}:<namespace>:<limiter>: the client is a hash tag, so
+    all keys of one call map to the same slot and the multi-key script also
+    runs on Redis Cluster.
+    """
+
+    def __init__(self, window_seconds: float, url: str, namespace: str):
+        super().__init__(window_seconds)
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError(
+                "RATE_LIMIT_STORE=redis requires the 'redis' package "
+                "(pip install 'fatherhood-is-backend[redis]')"
+            ) from e
+
+        self.namespace = namespace
+        self.client = redis.from_url(url)
+        self._script = self.client.register_script(_REDIS_HIT_SCRIPT)
+
+    def redis_key(self, key: str) -> str:
+        """Redis key for a "<limiter>:<client>" key (clients may contain ':')"""
+        limiter, _, client = key.partition(":")
+        return f"ratelimit:{{{client}}}:{self.namespace}:{limiter}"
+
+    async def hit_many(self, charges: Sequence[Charge]) -> List[WindowCounts]:
+        args = [int(self.window_seconds * 1000)]
+        for _, cost, limit in charges:
+            args.extend((cost, limit))
+        reply = await self._script(
+            keys=[self.redis_key(key) for key, _, _ in charges],
+            args=args,
+        )
+        fraction = float(reply[0])
+        return [
+            WindowCounts(bool(reply[i]), int(reply[i + 1]), int(reply[i + 2]), fraction)
+            for i in range(1, len(reply), 3)
+        ]
+
+
+def create_limiter_store(
+    namespace: str,
+    window_seconds: float,
+    backend: str = "memory",
+    redis_url: str = "",
+    shm_dir: str = "/dev/shm",
+) -> LimiterStore:
+    """
+    Create a limiter store for the configured backend
+
+    Args:
+        namespace: Limiter name, keeps limiters sharing a backend apart
+        window_seconds: Rate limit window
+        backend: memory | shared | redis
+        redis_url: Redis connection URL (redis backend)
+        shm_dir: Directory for the shared table file (shared backend)
+
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    if backend == "memory":
+        return MemoryLimiterStore(window_seconds)
+    if backend == "shared":
+        path = os.path.join(shm_dir, f"fatherhood-ratelimit-{namespace}")
+        return SharedMemoryLimiterStore(window_seconds, path)
+    if backend == "redis":
+        if not redis_url:
+            raise ValueError("RATE_LIMIT_REDIS_URL is required for the redis store")
+        return RedisLimiterStore(window_seconds, redis_url, namespace)
+    raise ValueError(f"Unknown rate limit store: {backend}")
@@ -0,0 +1,155 @@
+"""ASGI middleware shedding low-priority requests when the process is overloaded"""
+
+import math
+import re
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl
+
+import orjson
+
+from app.config import settings
+from app.services.feed_cache import get_feed_cache, post_key, posts_page_key
+from app.services.loop_monitor import LoopLagMonitor, get_loop_monitor
+from app.services.metrics import requests_in_flight, requests_shed
+from app.utils.serialization import POST_FIELDS, parse_fields
+
+# Never shed and not counted as in flight: health checks and metrics (so an
+# overloaded instance is seen as such, not as dead), admin tools (needed to
+# diagnose overload), long-lived realtime streams, and CORS preflights.
+# Feed reads are only spared when the feed cache can answer them (see
+# feed_cache_key): a miss queries the database like any other request.
+HIGH_PRIORITY_ROUTES: Tuple[Tuple[str, "re.Pattern[str]"], ...] = tuple(
+    (method, re.compile(pattern))
+    for method, pattern in (
+        ("GET", r"^/$"),
+        ("GET", r"^/health"),
+        ("GET", r"^/metrics$"),
+        ("GET", r"^/api/realtime/"),
+        ("GET", r"^/api/admin/"),
+        ("OPTIONS", r""),
+    )
+)
+
+_POST_PATH = re.compile(r"^/api/posts/(?!search$)([^/]+)$")
+# Boolean query values as FastAPI parses them
+_BOOLEANS = dict.fromkeys(("1", "true", "on", "yes"), True)
+_BOOLEANS.update(dict.fromkeys(("0", "false", "off", "no"), False))
+
+
+def feed_cache_key(path: str, query_string: bytes) -> Optional[str]:
+    """
+    Feed cache key a GET request is served from, mirroring the handlers
+
+    Returns:
+        Cache key, or None if the request is not a (valid) feed or post read
+    """
+    if path == "/api/posts":
+        params = dict(parse_qsl(query_string.decode("latin-1")))
+        try:
+            page = int(params.get("page", 1))
+            limit = int(params.get("limit", 20))
+            compact = _BOOLEANS[params.get("compact", "false").lower()]
+            fields = parse_fields(params.get("fields"), POST_FIELDS)
+        except (KeyError, ValueError):
+            return None
+        sort = params.get("sort", "newest")
+        return posts_page_key(sort, page, limit, fields, compact)
+
+    match = _POST_PATH.match(path)
+    if match is not None:
+        return post_key(match.group(1))
+    return None
+
+
+class LoadSheddingMiddleware:
+    """
+    Reject new low-priority requests with 503 + Retry-After under overload
+
+    Overload means event loop lag above SHED_MAX_LOOP_LAG_MS, or more than
+    SHED_MAX_IN_FLIGHT low-priority requests already being handled. Feed and
+    post reads the feed cache can answer are served anyway. Requests already
+    admitted are never interrupted.
+    """
+
+    def __init__(
+        self,
+        app: Callable,
+        monitor: Optional[LoopLagMonitor] = None,
+        max_lag_ms: Optional[float] = None,
+        max_in_flight: Optional[int] = None,
+        high_priority: Sequence[Tuple[str, "re.Pattern[str]"]] = HIGH_PRIORITY_ROUTES,
+    ):
+        self.app = app
+        self.monitor = monitor or get_loop_monitor()
+        self.max_lag = (max_lag_ms if max_lag_ms is not None else settings.shed_max_loop_lag_ms) / 1000
+        self.max_in_flight = max_in_flight if max_in_flight is not None else settings.shed_max_in_flight
+        self.high_priority = tuple(high_priority)
+        self.in_flight = 0
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method, path = scope["method"], scope["path"]
+        for priority_method, pattern in self.high_priority:
+            if method == priority_method and pattern.match(path):
+                await self.app(scope, receive, send)
+                return
+
+        lag = self.monitor.lag
+        if lag > self.max_lag:
+            reason = "loop_lag"
+        elif self.in_flight >= self.max_in_flight:
+            reason = "in_flight"
+        else:
+            reason = None
+        if reason is not None:
+            # Only looked up under overload: a cache hit is a memory read
+            if method == "GET" and self._is_cached(path, scope["query_string"]):
+                await self.app(scope, receive, send)
+            else:
+                await self._reject(send, reason, lag)
+            return
+
+        self.in_flight += 1
+        requests_in_flight.set(self.in_flight)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+            requests_in_flight.set(self.in_flight)
+
+    @staticmethod
+    def _is_cached(path: str, query_string: bytes) -> bool:
+        feed_cache = get_feed_cache()
+        if feed_cache is None:
+            return False
+        key = feed_cache_key(path, query_string)
+        return key is not None and feed_cache.contains(key)
+
+    @staticmethod
+    async def _reject(send: Callable, reason: str, lag: float):
+        requests_shed.inc(reason)
+        body = orjson.dumps(
+            {
+                "detail": {
+                    "error": "Server busy",
+                    "message": "The server is under heavy load. Please try again shortly.",
+                }
+            }
+        )
+        # Back off for roughly as long as the loop is behind, within 1-30s
+        retry_after = min(30, max(1, math.ceil(lag * 2)))
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(retry_after).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
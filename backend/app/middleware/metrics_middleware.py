@@ -0,0 +1,60 @@
+"""ASGI middleware recording request latency per route template"""
+
+import time
+from typing import Any, Callable, Dict
+
+from starlette.routing import Match
+
+from app.services.metrics import http_request_duration
+
+
+def route_template(scope: Dict[str, Any]) -> str:
+    """Return the matched route's path template, e.g. /api/posts/{post_id}
+
+    Labelling by template rather than raw path keeps series cardinality
+    bounded no matter how many post ids are requested. The router records the
+    route in the scope, so this is exact once the app has run. Requests
+    answered before routing (rate limited, shed) are matched against the
+    app's top-level routes; those under an included router have no template
+    of their own there and are labelled "unmatched", like unknown paths.
+    """
+    route = scope.get("route")
+    if route is not None:
+        return getattr(route, "path", "unmatched")
+    app = scope.get("app")
+    for candidate in getattr(app, "routes", ()):
+        match, _ = candidate.matches(scope)
+        if match == Match.FULL:
+            return getattr(candidate, "path", None) or "unmatched"
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """Time every HTTP request and record it under its route template"""
+
+    def __init__(self, app: Callable):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Dict[str, Any]):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_request_duration.observe(
+                time.perf_counter() - started,
+                scope["method"],
+                route_template(scope),
+                str(status),
+            )
@@ -0,0 +1,145 @@
+"""ASGI rate limiting middleware with per-route costs
+
+Runs before routing, body parsing and Pydantic validation, so rejected
+requests cost one limiter check and a pre-encoded response.
+"""
+
+import math
+import re
+from typing import Any, Callable, Dict, NamedTuple, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl
+
+import orjson
+
+from app.middleware.rate_limiter import (
+    RateLimiter,
+    RateLimitResult,
+    general_api_limiter,
+    get_client_ip_from_scope,
+    hit_all,
+    post_creation_limiter,
+)
+from app.services.metrics import rate_limit_rejections
+
+
+class RouteCost(NamedTuple):
+    """
+    Limiter charges for requests matching a method and path pattern
+
+    With `when`, the charges only apply to requests for which it returns True
+    (e.g. cache misses); other matching requests are free.
+    """
+
+    method: str
+    pattern: "re.Pattern[str]"
+    charges: Tuple[Tuple[RateLimiter, int], ...]
+    when: Optional[Callable[[Dict[str, Any]], bool]] = None
+
+
+def route(
+    method: str,
+    path_regex: str,
+    *charges: Tuple[RateLimiter, int],
+    when: Optional[Callable[[Dict[str, Any]], bool]] = None,
+) -> RouteCost:
+    return RouteCost(method, re.compile(path_regex), tuple(charges), when)
+
+
+def is_image_cache_miss(scope: Dict[str, Any]) -> bool:
+    """
+    Whether GET /img/{name} has to fetch or resize (i.e. spend egress or CPU)
+
+    Invalid names and widths are answered cheaply by the route, so they count
+    as hits.
+    """
+    from app.services.image_cache import IMAGE_NAME_PATTERN, get_image_cache
+
+    name = scope["path"][len("/img/"):]
+    if not IMAGE_NAME_PATTERN.match(name):
+        return False
+    width = None
+    w = dict(parse_qsl(scope["query_string"].decode("latin-1"))).get("w")
+    if w is not None:
+        try:
+            width = int(w)
+        except ValueError:
+            return False
+        if width < 1:
+            return False
+    cache = get_image_cache()
+    return not cache.is_cached(name, cache.snap_width(width) if width else None)
+
+
+# First matching entry wins. Its charges are checked and recorded together
+# (nothing is charged if any limiter rejects) and the first rejecting limiter
+# is reported, so the strictest limiter goes first. Generation is by far the
+# most expensive call (Gemini quota + ~20s of upstream time); feed reads are
+# cheap. Proxied images are free when cached; a miss costs a bucket fetch
+# (egress) and maybe a resize.
+ROUTE_COSTS: Tuple[RouteCost, ...] = (
+    route(
+        "POST",
+        r"^/api/posts/generate$",
+        (post_creation_limiter, 1),
+        (general_api_limiter, 20),
+    ),
+    route("POST", r"^/api/posts$", (general_api_limiter, 5)),
+    route("POST", r"^/api/comments$", (general_api_limiter, 2)),
+    route("DELETE", r"^/api/comments/", (general_api_limiter, 2)),
+    route("GET", r"^/api/posts/search$", (general_api_limiter, 2)),
+    route("GET", r"^/api/admin/"),  # Protected by the admin key, not budgeted
+    route("GET", r"^/api/", (general_api_limiter, 1)),
+    route("GET", r"^/img/", (general_api_limiter, 2), when=is_image_cache_miss),
+)
+
+
+class RateLimitMiddleware:
+    """Pure ASGI middleware enforcing ROUTE_COSTS before the app sees a request"""
+
+    def __init__(self, app: Callable, routes: Sequence[RouteCost] = ROUTE_COSTS):
+        self.app = app
+        self.routes = tuple(routes)
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method, path = scope["method"], scope["path"]
+        for entry in self.routes:
+            if entry.method == method and entry.pattern.match(path):
+                if entry.charges and (entry.when is None or entry.when(scope)):
+                    client_ip = get_client_ip_from_scope(scope)
+                    rejected = await hit_all(client_ip, entry.charges)
+                    if rejected is not None:
+                        await self._reject(send, *rejected)
+                        return
+                break
+
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    async def _reject(send: Callable, limiter: RateLimiter, result: RateLimitResult):
+        rate_limit_rejections.inc(limiter.name)
+        # Same body shape as FastAPI's HTTPException responses
+        body = orjson.dumps(
+            {
+                "detail": {
+                    "error": "Rate limit exceeded",
+                    "message": limiter.message,
+                    "reset_at": result.reset_at.isoformat(),
+                }
+            }
+        )
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(math.ceil(result.retry_after)).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -1,57 +1,127 @@
 """Rate limiting middleware to prevent spam"""
 
+import ipaddress
+import math
+import threading
 from datetime import datetime, timedelta
-from collections import defaultdict
-from typing import Dict, List
-from fastapi import Request, HTTPException, status
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from fastapi import Request
+from app.config import settings
+from app.middleware.limiter_stores import LimiterStore, WindowCounts, create_limiter_store
+
+
+class RateLimitResult(NamedTuple):
+    """Outcome of a rate limit check"""
+
+    allowed: bool
+    remaining: int
+    retry_after: float  # Seconds until a request of the same cost is allowed
+
+    @property
+    def reset_at(self) -> datetime:
+        return datetime.now() + timedelta(seconds=self.retry_after)
 
 
 class RateLimiter:
     """
-    Simple IP-based rate limiter
+    IP-based sliding-window counter rate limiter
+
+    Keeps two counters per IP (previous and current fixed window) and
+    estimates the sliding-window count as
+
+        previous * (1 - elapsed_fraction) + current
 
-    Tracks requests per IP address within a sliding time window
+    which needs O(1) memory and time per request. Counters live in a
+    pluggable LimiterStore, so the limit can be enforced per process, across
+    all workers on a host, or across instances. Limiters with the same window
+    share one store (keys are prefixed with the limiter name), so a request
+    charged against several of them costs a single store operation.
     """
 
-    def __init__(self, max_requests: int = 10, window_minutes: int = 60):
+    def __init__(
+        self,
+        max_requests: int = 10,
+        window_minutes: int = 60,
+        name: str = "default",
+        message: str = "Too many requests. Please slow down.",
+        store: Optional[LimiterStore] = None,
+    ):
         """
         Initialize rate limiter
 
         Args:
             max_requests: Maximum number of requests allowed per window
             window_minutes: Time window in minutes
+            name: Limiter name, used to namespace keys in shared stores
+            message: Message returned to clients when the limit is exceeded
+            store: Counter storage (default: configured RATE_LIMIT_STORE,
+                shared with other limiters of the same window)
         """
         self.max_requests = max_requests
-        self.window = timedelta(minutes=window_minutes)
-        self.requests: Dict[str, List[datetime]] = defaultdict(list)
-
-    def is_allowed(self, ip: str) -> bool:
+        self.window_seconds = window_minutes * 60.0
+        self.name = name
+        self.message = message
+        self.store = store or get_limiter_store(self.window_seconds)
+
+    def key(self, ip: str) -> str:
+        """Store key for an IP"""
+        return f"{self.name}:{ip}"
+
+    def _result(self, counts: WindowCounts, cost: int) -> RateLimitResult:
+        used = counts.previous * (1.0 - counts.fraction) + counts.current
+        remaining = max(0, self.max_requests - math.ceil(used))
+        retry_after = 0.0 if counts.allowed else self._retry_after(counts, cost)
+        return RateLimitResult(counts.allowed, remaining, retry_after)
+
+    def _retry_after(self, counts: WindowCounts, cost: int) -> float:
+        """Solve for the time until a request of this cost fits the window"""
+        previous, current, fraction = counts.previous, counts.current, counts.fraction
+        budget = self.max_requests - cost
+        elapsed = fraction * self.window_seconds
+
+        if current <= budget:
+            # Wait for the previous window's weight to decay enough
+            if previous == 0 or previous * (1.0 - fraction) <= budget - current:
+                return 0.0
+            needed_fraction = 1.0 - (budget - current) / previous
+            return max(0.0, needed_fraction * self.window_seconds - elapsed)
+
+        # Current window is exhausted: wait for the next one, then for the
+        # (now previous) count to decay
+        until_next = self.window_seconds - elapsed
+        if budget <= 0:
+            return until_next + self.window_seconds
+        return until_next + max(0.0, 1.0 - budget / current) * self.window_seconds
+
+    async def hit(self, ip: str, cost: int = 1) -> RateLimitResult:
         """
-        Check if a request from this IP is allowed
+        Check a request from this IP and record it if allowed
 
         Args:
             ip: Client IP address
+            cost: Units this request consumes
 
         Returns:
-            True if request is allowed, False if rate limit exceeded
+            RateLimitResult with the decision, remaining units and retry hint
         """
-        now = datetime.now()
-        window_start = now - self.window
+        counts = await self.store.hit(self.key(ip), cost, self.max_requests)
+        return self._result(counts, cost)
 
-        # Clean up old requests outside the current window
-        self.requests[ip] = [
-            req_time for req_time in self.requests[ip] if req_time > window_start
-        ]
+    async def is_allowed(self, ip: str, cost: int = 1) -> bool:
+        """
+        Check if a request from this IP is allowed, and record it if so
 
-        # Check if limit exceeded
-        if len(self.requests[ip]) >= self.max_requests:
-            return False
+        Args:
+            ip: Client IP address
+            cost: Units this request consumes
 
-        # Record this request
-        self.requests[ip].append(now)
-        return True
+        Returns:
+            True if request is allowed, False if rate limit exceeded
+        """
+        return (await self.hit(ip, cost)).allowed
 
-    def get_remaining_requests(self, ip: str) -> int:
+    async def get_remaining_requests(self, ip: str) -> int:
         """
         Get number of remaining requests for this IP
 
@@ -61,17 +131,10 @@ class RateLimiter:
         Returns:
             Number of requests remaining in current window
         """
-        now = datetime.now()
-        window_start = now - self.window
-
-        # Count requests in current window
-        current_requests = [
-            req_time for req_time in self.requests[ip] if req_time > window_start
-        ]
+        counts = await self.store.peek(self.key(ip))
+        return self._result(counts, 1).remaining
 
-        return max(0, self.max_requests - len(current_requests))
-
-    def get_reset_time(self, ip: str) -> datetime:
+    async def get_reset_time(self, ip: str) -> datetime:
         """
         Get time when rate limit will reset for this IP
 
@@ -79,89 +142,159 @@ class RateLimiter:
             ip: Client IP address
 
         Returns:
-            Datetime when oldest request will expire
+            Datetime when the next request will be allowed
         """
-        if not self.requests[ip]:
-            return datetime.now()
+        counts = await self.store.peek(self.key(ip))
+        return datetime.now() + timedelta(seconds=self._retry_after(counts, 1))
 
-        oldest_request = min(self.requests[ip])
-        return oldest_request + self.window
+    async def run_eviction(self, interval_seconds: float = 60.0):
+        """Run the store's background eviction of idle keys"""
+        await self.store.run_eviction(interval_seconds)
 
 
-# Global rate limiter instances
-# Different limits for different operations
+_stores: Dict[float, LimiterStore] = {}
+_stores_lock = threading.Lock()
 
-# Post creation: 10 posts per hour per IP
-post_creation_limiter = RateLimiter(max_requests=10, window_minutes=60)
 
-# General API: 100 requests per hour per IP
-general_api_limiter = RateLimiter(max_requests=100, window_minutes=60)
+def get_limiter_store(window_seconds: float) -> LimiterStore:
+    """Get or create the configured store shared by limiters with this window"""
+    with _stores_lock:
+        store = _stores.get(window_seconds)
+        if store is None:
+            store = _stores[window_seconds] = create_limiter_store(
+                f"{int(window_seconds)}s",
+                window_seconds,
+                backend=settings.rate_limit_store,
+                redis_url=settings.rate_limit_redis_url,
+                shm_dir=settings.rate_limit_shm_dir,
+            )
+        return store
 
 
-def get_client_ip(request: Request) -> str:
+async def hit_all(
+    ip: str, charges: Sequence[Tuple[RateLimiter, int]]
+) -> Optional[Tuple[RateLimiter, RateLimitResult]]:
     """
-    Extract client IP address from request
+    Charge a request against several limiters, all or nothing
 
-    Handles proxies and load balancers by checking headers
+    Charges against limiters sharing a store (the default for limiters with
+    the same window) are checked and recorded in one store operation, and
+    none is recorded if any limiter rejects.
 
     Args:
-        request: FastAPI Request object
+        ip: Client IP address
+        charges: (limiter, cost) pairs
 
     Returns:
-        Client IP address
+        (limiter, result) of the first limiter that rejected, or None if allowed
     """
-    # Check X-Forwarded-For header (set by proxies)
-    forwarded_for = request.headers.get("X-Forwarded-For")
-    if forwarded_for:
-        # X-Forwarded-For can contain multiple IPs, use the first one
-        return forwarded_for.split(",")[0].strip()
-
-    # Check X-Real-IP header (set by some proxies)
-    real_ip = request.headers.get("X-Real-IP")
-    if real_ip:
-        return real_ip
+    by_store: Dict[int, List[Tuple[RateLimiter, int]]] = {}
+    for limiter, cost in charges:
+        by_store.setdefault(id(limiter.store), []).append((limiter, cost))
+
+    for group in by_store.values():
+        store = group[0][0].store
+        counts = await store.hit_many(
+            [(limiter.key(ip), cost, limiter.max_requests) for limiter, cost in group]
+        )
+        for (limiter, cost), limiter_counts in zip(group, counts):
+            if not limiter_counts.allowed:
+                return limiter, limiter._result(limiter_counts, cost)
+    return None
 
-    # Fallback to direct client IP
-    return request.client.host if request.client else "unknown"
 
+# Global rate limiter instances
+# Different limits for different operations
 
-async def rate_limit_post_creation(request: Request):
+# Post creation: RATE_LIMIT_PER_HOUR (default 10) generations per hour per IP
+post_creation_limiter = RateLimiter(
+    max_requests=settings.rate_limit_per_hour,
+    window_minutes=60,
+    name="post_creation",
+    message=(
+        "You have exceeded the maximum number of posts per hour "
+        f"({settings.rate_limit_per_hour}). Please try again later."
+    ),
+)
+
+# General API: budget of cost units per hour per IP (see ROUTE_COSTS)
+general_api_limiter = RateLimiter(
+    max_requests=settings.api_budget_per_hour, window_minutes=60, name="general_api"
+)
+
+
+@lru_cache(maxsize=8)
+def _parse_networks(spec: str) -> Tuple[Any, ...]:
+    return tuple(
+        ipaddress.ip_network(part.strip(), strict=False)
+        for part in spec.split(",")
+        if part.strip()
+    )
+
+
+def _is_trusted(address: str) -> bool:
+    """Check whether an address belongs to a trusted proxy network"""
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in _parse_networks(settings.trusted_proxies))
+
+
+def _header(scope: Dict[str, Any], name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def get_client_ip_from_scope(scope: Dict[str, Any]) -> str:
     """
-    Rate limit middleware for post creation
+    Resolve the client IP address from an ASGI scope
+
+    Forwarding headers are only honoured when the direct peer is a trusted
+    proxy (TRUSTED_PROXIES). X-Forwarded-For is then walked from the right,
+    skipping trusted hops, so a client cannot spoof its address by sending
+    its own X-Forwarded-For.
+
+    Args:
+        scope: ASGI connection scope
 
-    Raises:
-        HTTPException: 429 if rate limit exceeded
+    Returns:
+        Client IP address
     """
-    client_ip = get_client_ip(request)
-
-    if not post_creation_limiter.is_allowed(client_ip):
-        reset_time = post_creation_limiter.get_reset_time(client_ip)
-        raise HTTPException(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail={
-                "error": "Rate limit exceeded",
-                "message": "You have exceeded the maximum number of posts per hour (10). Please try again later.",
-                "reset_at": reset_time.isoformat(),
-            },
-        )
+    client = scope.get("client")
+    peer = client[0] if client else "unknown"
+    if not _is_trusted(peer):
+        return peer
 
+    forwarded_for = _header(scope, b"x-forwarded-for")
+    if forwarded_for:
+        hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+        for hop in reversed(hops):
+            if not _is_trusted(hop):
+                return hop
+        if hops:
+            return hops[0]
+
+    real_ip = _header(scope, b"x-real-ip")
+    if real_ip:
+        return real_ip.strip()
 
-async def rate_limit_general_api(request: Request):
+    return peer
+
+
+def get_client_ip(request: Request) -> str:
     """
-    Rate limit middleware for general API access
+    Extract client IP address from request
+
+    Handles proxies and load balancers by checking headers set by trusted
+    proxies only
 
-    Raises:
-        HTTPException: 429 if rate limit exceeded
+    Args:
+        request: FastAPI Request object
+
+    Returns:
+        Client IP address
     """
-    client_ip = get_client_ip(request)
-
-    if not general_api_limiter.is_allowed(client_ip):
-        reset_time = general_api_limiter.get_reset_time(client_ip)
-        raise HTTPException(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail={
-                "error": "Rate limit exceeded",
-                "message": "Too many requests. Please slow down.",
-                "reset_at": reset_time.isoformat(),
-            },
-        )
+    return get_client_ip_from_scope(request.scope)
@@ -0,0 +1,90 @@
+"""ASGI middleware assigning request ids and emitting Server-Timing headers"""
+
+import logging
+import re
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Tuple
+
+from app.config import settings
+from app.utils.log import request_id_var, server_timings_var
+
+logger = logging.getLogger("app.access")
+
+# Accept caller-supplied ids (e.g. from a load balancer) only if they are short
+# and header-safe
+REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+
+def _server_timing(timings: List[Tuple[str, float]], total: float) -> bytes:
+    parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts).encode()
+
+
+class RequestContextMiddleware:
+    """
+    Tag each request with an id and report where its time went
+
+    The id comes from the X-Request-ID header when valid, otherwise a new one
+    is generated. It is echoed in the response, attached to every log record
+    written while handling the request, and logged with the request's status
+    and duration. Stage timings recorded with ``record_timing`` (every
+    ``metrics.stage``) are returned in a Server-Timing header.
+    """
+
+    def __init__(self, app: Callable):
+        self.app = app
+        self.timing_allow_origin = settings.frontend_url.encode()
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for key, value in scope["headers"]:
+            if key == b"x-request-id":
+                candidate = value.decode("latin-1")
+                if REQUEST_ID_PATTERN.match(candidate):
+                    request_id = candidate
+                break
+        if request_id is None:
+            request_id = uuid.uuid4().hex
+
+        timings: List[Tuple[str, float]] = []
+        id_token = request_id_var.set(request_id)
+        timings_token = server_timings_var.set(timings)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message: Dict[str, Any]):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-request-id", request_id.encode()))
+                headers.append(
+                    (b"server-timing", _server_timing(timings, time.perf_counter() - started))
+                )
+                headers.append((b"timing-allow-origin", self.timing_allow_origin))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            logger.info(
+                "%s %s %s",
+                scope["method"],
+                scope["path"],
+                status,
+                extra={
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+                },
+            )
+            request_id_var.reset(id_token)
+            server_timings_var.reset(timings_token)
@@ -0,0 +1,57 @@
+"""ASGI middleware capturing stack samples of slow requests on opted-in routes"""
+
+import time
+from typing import Any, Callable, Dict, Optional
+
+from starlette.routing import compile_path
+
+from app.services.profiler import SlowRequestTracer
+from app.utils.log import request_id_var
+
+
+class SlowRequestTracingMiddleware:
+    """
+    Trace requests to routes listed in PROFILE_SLOW_ROUTES
+
+    Routing hasn't happened yet when a request comes in, so the opted-in
+    templates are compiled to regexes and matched against the raw path;
+    requests to other routes pass straight through. A template can match a
+    path that the router gives to another route (/api/posts/{post_id} matches
+    /api/posts/search), so the route the router actually picked is checked
+    afterwards. Traces of requests slower than PROFILE_SLOW_THRESHOLD_MS are
+    kept and served by GET /api/admin/profile/slow.
+    """
+
+    def __init__(self, app: Callable, tracer: SlowRequestTracer):
+        self.app = app
+        self.tracer = tracer
+        self.patterns = [
+            (compile_path(route)[0], route) for route in sorted(tracer.routes)
+        ]
+
+    def _match(self, path: str) -> Optional[str]:
+        for pattern, route in self.patterns:
+            if pattern.match(path):
+                return route
+        return None
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = self._match(scope["path"])
+        if route is None:
+            await self.app(scope, receive, send)
+            return
+
+        trace = self.tracer.begin(f"{scope['method']} {route}", request_id_var.get())
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            matched = scope.get("route")
+            if matched is not None and getattr(matched, "path", route) != route:
+                self.tracer.discard(trace)  # Routed elsewhere
+            else:
+                self.tracer.end(trace, (time.perf_counter() - started) * 1000)
@@ -1,6 +1,6 @@
 """Pydantic models for Posts"""
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field
 from datetime import datetime
 from typing import Optional
 from uuid import UUID
@@ -14,33 +14,12 @@ class PostBase(BaseModel):
 
 
 class PostCreate(PostBase):
-    """Model for creating a new post (for generation)"""
-
-    @field_validator("text")
-    @classmethod
-    def validate_text_content(cls, v: str) -> str:
-        """Validate text doesn't contain only whitespace"""
-        if not v.strip():
-            raise ValueError("Text cannot be empty")
-        return v.strip()
-
-    @field_validator("author_name")
-    @classmethod
-    def validate_author_name(cls, v: Optional[str]) -> Optional[str]:
-        """Validate and sanitize author name"""
-        if v is None:
-            return None
-
-        cleaned = v.strip()
-        if not cleaned:
-            return None
-
-        # Check for valid characters (letters, spaces, hyphens, apostrophes)
-        import re
-        if not re.match(r"^[a-zA-Z\u00C0-\u024F\s'-]+$", cleaned):
-            raise ValueError("Author name contains invalid characters")
-
-        return cleaned
+    """
+    Model for creating a new post (for generation)
+
+    Content rules (blocked terms, spam patterns, author name characters) are
+    applied once by app.utils.clean_post_input in the route handlers.
+    """
 
 
 class PostSave(PostBase):
@@ -0,0 +1,198 @@
+"""Admission control for expensive upstream work (image generation)
+
+Caps in-flight work per client and globally. Requests over the caps wait in
+per-client FIFO queues that are served round-robin, so one client firing many
+requests cannot starve the others. Requests that cannot be served in time are
+rejected quickly with a retry hint instead of piling up on a saturated
+upstream.
+"""
+
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional
+
+from app.config import settings
+
+
+class AdmissionRejectedError(Exception):
+    """Raised when a request cannot be admitted"""
+
+    def __init__(self, status_code: int, message: str, retry_after: float):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Per-client and global concurrency limits with fair queueing"""
+
+    def __init__(
+        self,
+        max_in_flight: int = 4,
+        max_in_flight_per_client: int = 1,
+        max_queued_per_client: int = 2,
+        max_queued: int = 32,
+        max_queue_wait: float = 30.0,
+    ):
+        """
+        Args:
+            max_in_flight: Global concurrent admissions
+            max_in_flight_per_client: Concurrent admissions per client
+            max_queued_per_client: Waiting requests per client before 429
+            max_queued: Waiting requests overall before 503
+            max_queue_wait: Seconds a request may wait before 503
+        """
+        self.max_in_flight = max_in_flight
+        self.max_in_flight_per_client = max_in_flight_per_client
+        self.max_queued_per_client = max_queued_per_client
+        self.max_queued = max_queued
+        self.max_queue_wait = max_queue_wait
+
+        self.in_flight_total = 0
+        self.in_flight: Dict[str, int] = {}
+        self.waiting: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self.queued_total = 0
+
+        # Moving average of how long an admission is held, for retry hints
+        self.avg_hold_seconds = 20.0
+
+    @asynccontextmanager
+    async def slot(self, client: str):
+        """
+        Hold an admission slot for the duration of the block
+
+        Raises:
+            AdmissionRejectedError: 429 if the client already has too much queued,
+                503 if the system is saturated or the queue wait ran out
+        """
+        await self.acquire(client)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.avg_hold_seconds += 0.2 * (
+                time.monotonic() - started - self.avg_hold_seconds
+            )
+            self.release(client)
+
+    async def acquire(self, client: str) -> None:
+        queue = self.waiting.get(client)
+        if queue is not None and len(queue) >= self.max_queued_per_client:
+            raise AdmissionRejectedError(
+                429,
+                "You already have image generations in progress. Please wait for them to finish.",
+                self._retry_hint(len(queue)),
+            )
+        if self.queued_total >= self.max_queued:
+            raise AdmissionRejectedError(
+                503,
+                "Image generation is at capacity. Please try again shortly.",
+                self._retry_hint(self.queued_total),
+            )
+
+        future = asyncio.get_running_loop().create_future()
+        if queue is None:
+            queue = self.waiting[client] = deque()
+        queue.append(future)
+        self.queued_total += 1
+        self._dispatch()
+
+        if future.done():
+            return
+
+        # Not wait_for: it returns the result instead of raising when the
+        # caller is cancelled just after the slot was granted, so a client
+        # that went away would still run its generation
+        try:
+            await asyncio.wait((future,), timeout=self.max_queue_wait)
+        except BaseException:
+            self._abandon(client, future)
+            raise
+        if not future.done():
+            self._abandon(client, future)
+            raise AdmissionRejectedError(
+                503,
+                "Image generation is busy. Please try again shortly.",
+                self._retry_hint(self.queued_total),
+            )
+
+    def release(self, client: str) -> None:
+        self.in_flight_total -= 1
+        remaining = self.in_flight[client] - 1
+        if remaining:
+            self.in_flight[client] = remaining
+        else:
+            del self.in_flight[client]
+        if client in self.waiting:
+            # Just served: the other waiting clients go first
+            self.waiting.move_to_end(client)
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Grant free slots to waiting clients, one per client per round"""
+        while self.in_flight_total < self.max_in_flight and self.waiting:
+            granted = False
+            for client in list(self.waiting):
+                if self.in_flight_total >= self.max_in_flight:
+                    return
+                if self.in_flight.get(client, 0) >= self.max_in_flight_per_client:
+                    continue
+
+                queue = self.waiting[client]
+                future = queue.popleft()
+                self.queued_total -= 1
+                if not queue:
+                    del self.waiting[client]
+                else:
+                    self.waiting.move_to_end(client)
+
+                self.in_flight_total += 1
+                self.in_flight[client] = self.in_flight.get(client, 0) + 1
+                future.set_result(None)
+                granted = True
+            if not granted:
+                return
+
+    def _abandon(self, client: str, future: asyncio.Future) -> None:
+        """Leave the queue, or give back a slot granted at the last moment"""
+        if future.done():
+            self.release(client)
+        else:
+            future.cancel()
+            self._remove_waiter(client, future)
+
+    def _remove_waiter(self, client: str, future: asyncio.Future) -> None:
+        queue = self.waiting.get(client)
+        if queue is None or future not in queue:
+            return
+        queue.remove(future)
+        self.queued_total -= 1
+        if not queue:
+            del self.waiting[client]
+
+    def _retry_hint(self, queued: int) -> float:
+        """Seconds until roughly `queued` requests ahead have drained"""
+        rounds = math.ceil((queued + 1) / max(1, self.max_in_flight))
+        return rounds * self.avg_hold_seconds
+
+
+# Singleton instance
+_generation_admission: Optional[AdmissionController] = None
+
+
+def get_generation_admission() -> AdmissionController:
+    """Get or create the admission controller for image generation"""
+    global _generation_admission
+    if _generation_admission is None:
+        _generation_admission = AdmissionController(
+            max_in_flight=settings.generation_max_in_flight,
+            max_in_flight_per_client=settings.generation_max_in_flight_per_client,
+            max_queued_per_client=settings.generation_max_queued_per_client,
+            max_queued=settings.generation_max_queued,
+            max_queue_wait=settings.generation_max_queue_wait,
+        )
+    return _generation_admission
@@ -0,0 +1,337 @@
+"""In-process fan-out of new posts and comments to realtime subscribers
+
+One ``ChangeFeed`` per process polls the database for new rows and hands them
+to the ``Broadcaster``, which copies each event into the bounded queue of
+every subscriber of that topic. Database load is therefore one query per poll
+interval, regardless of how many clients are connected.
+
+A subscriber whose queue is full is a slow consumer: it is evicted instead of
+blocking the publisher or buffering without bound.
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+
+from app.config import settings
+from app.utils.serialization import (
+    COMMENT_FIELDS,
+    comment_projection,
+    comment_row_to_dict,
+    post_row_to_dict,
+)
+
+logger = logging.getLogger(__name__)
+
+POSTS_TOPIC = "posts"
+
+
+def comments_topic(post_id: str) -> str:
+    """Topic name for new comments on a post"""
+    return f"comments:{post_id}"
+
+
+class Subscription:
+    """A single subscriber's bounded event queue"""
+
+    __slots__ = ("topic", "queue", "evicted")
+
+    def __init__(self, topic: str, queue_size: int):
+        self.topic = topic
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.evicted = False
+
+    async def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Wait for the next event
+
+        Args:
+            timeout: Seconds to wait before returning None (used for keepalives)
+
+        Returns:
+            Event dict, or None on timeout
+
+        Raises:
+            ConnectionAbortedError: If the subscriber was evicted
+        """
+        try:
+            event = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+        if event is None:
+            raise ConnectionAbortedError("Subscriber evicted: too slow")
+        return event
+
+
+class Broadcaster:
+    """Topic-based fan-out with per-subscriber backpressure"""
+
+    def __init__(
+        self, queue_size: int = 64, max_subscribers: int = 1000, max_topics: int = 200
+    ):
+        """
+        Args:
+            queue_size: Events buffered per subscriber before eviction
+            max_subscribers: Maximum concurrent subscribers per process
+            max_topics: Maximum distinct topics per process (bounds the size of
+                the change feed's comments filter)
+        """
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.max_topics = max_topics
+        self.topics: Dict[str, Set[Subscription]] = defaultdict(set)
+        self.subscriber_count = 0
+        self.evicted_count = 0
+
+    def subscribe(self, topic: str) -> Subscription:
+        """
+        Register a new subscriber
+
+        Raises:
+            OverflowError: If the subscriber or topic limit is reached
+        """
+        if self.subscriber_count >= self.max_subscribers:
+            raise OverflowError("Too many realtime subscribers")
+        if topic not in self.topics and len(self.topics) >= self.max_topics:
+            raise OverflowError("Too many realtime topics")
+
+        subscription = Subscription(topic, self.queue_size)
+        self.topics[topic].add(subscription)
+        self.subscriber_count += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove a subscriber (safe to call more than once)"""
+        subscribers = self.topics.get(subscription.topic)
+        if subscribers is None or subscription not in subscribers:
+            return
+
+        subscribers.discard(subscription)
+        self.subscriber_count -= 1
+        if not subscribers:
+            del self.topics[subscription.topic]
+
+    def publish(self, topic: str, event: Dict[str, Any]) -> int:
+        """
+        Deliver an event to every subscriber of a topic without blocking
+
+        Args:
+            topic: Topic name
+            event: Event payload
+
+        Returns:
+            Number of subscribers the event was delivered to
+        """
+        subscribers = self.topics.get(topic)
+        if not subscribers:
+            return 0
+
+        delivered = 0
+        for subscription in list(subscribers):
+            try:
+                subscription.queue.put_nowait(event)
+                delivered += 1
+            except asyncio.QueueFull:
+                self._evict(subscription)
+        return delivered
+
+    def has_subscribers(self, topic: str) -> bool:
+        return bool(self.topics.get(topic))
+
+    def _evict(self, subscription: Subscription) -> None:
+        """Drop a slow consumer's backlog and wake it with the eviction sentinel"""
+        self.unsubscribe(subscription)
+        subscription.evicted = True
+        self.evicted_count += 1
+
+        queue = subscription.queue
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+
+class _Cursor:
+    """
+    Position of a change poll: the newest created_at seen, plus the ids of
+    rows already published within the overlap window before it
+    """
+
+    __slots__ = ("created_at", "seen")
+
+    def __init__(self, created_at: str):
+        self.created_at = datetime.fromisoformat(created_at)
+        self.seen: Dict[str, datetime] = {}
+
+    def window_start(self, overlap: timedelta) -> str:
+        return (self.created_at - overlap).isoformat()
+
+    def take(self, rows: List[Dict[str, Any]], overlap: timedelta) -> List[Dict[str, Any]]:
+        """Rows not published yet; advances the cursor past them"""
+        new = []
+        for row in rows:
+            if row["id"] in self.seen:
+                continue
+            created_at = datetime.fromisoformat(row["created_at"])
+            self.seen[row["id"]] = created_at
+            self.created_at = max(self.created_at, created_at)
+            new.append(row)
+        horizon = self.created_at - overlap
+        self.seen = {
+            row_id: created_at
+            for row_id, created_at in self.seen.items()
+            if created_at >= horizon
+        }
+        return new
+
+
+class ChangeFeed:
+    """
+    Single database change source for the broadcaster
+
+    Polls for new rows while there are subscribers, and stops on its own when
+    the last one leaves. created_at is set when a transaction starts, so a
+    row can commit after rows with a later created_at were already read:
+    each poll re-reads the last `overlap` seconds, walking them by
+    (created_at, id) keysets, and skips the ids it has already published.
+    """
+
+    PAGE_SIZE = 500
+
+    def __init__(
+        self, broadcaster: Broadcaster, poll_interval: float = 2.0, overlap: float = 5.0
+    ):
+        self.broadcaster = broadcaster
+        self.poll_interval = poll_interval
+        self.overlap = timedelta(seconds=overlap)
+        self._task: Optional[asyncio.Task] = None
+        self._posts_cursor: Optional[_Cursor] = None
+        self._comments_cursor: Optional[_Cursor] = None
+
+    def ensure_running(self) -> None:
+        """Start the poller if it is not already running"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        from app.services.db import get_supabase_client
+
+        client = get_supabase_client()
+        while self.broadcaster.subscriber_count > 0:
+            try:
+                await asyncio.to_thread(self._poll, client)
+            except Exception:
+                logger.exception("Realtime poll failed")
+            await asyncio.sleep(self.poll_interval)
+
+    def _latest(self, client, table: str) -> _Cursor:
+        """Cursor at the newest row in a table, with the rows before it seen"""
+        result = (
+            client.table(table)
+            .select("id,created_at")
+            .order("created_at", desc=True)
+            .order("id", desc=True)
+            .limit(self.PAGE_SIZE)
+            .execute()
+        )
+        cursor = _Cursor(
+            result.data[0]["created_at"] if result.data else "1970-01-01T00:00:00+00:00"
+        )
+        # Already there when the subscriber came: re-read, but not news
+        cursor.take(result.data, self.overlap)
+        return cursor
+
+    def _new_rows(self, query: Callable, cursor: _Cursor) -> Iterator[Dict[str, Any]]:
+        """
+        Rows created since the cursor, oldest first
+
+        Args:
+            query: Builds the filtered table query
+            cursor: Advanced past the rows returned
+        """
+        after = None
+        while True:
+            page = query()
+            if after is None:
+                page = page.gte("created_at", cursor.window_start(self.overlap))
+            else:
+                page = page.or_(
+                    f'created_at.gt."{after["created_at"]}",'
+                    f'and(created_at.eq."{after["created_at"]}",id.gt.{after["id"]})'
+                )
+            rows = page.order("created_at").order("id").limit(self.PAGE_SIZE).execute().data
+            yield from cursor.take(rows, self.overlap)
+            if len(rows) < self.PAGE_SIZE:
+                return
+            after = rows[-1]
+
+    def _poll(self, client) -> None:
+        # Cursors are dropped while nobody listens, so a new subscriber never
+        # receives a backlog of rows created before it connected
+        if not self.broadcaster.has_subscribers(POSTS_TOPIC):
+            self._posts_cursor = None
+        elif self._posts_cursor is None:
+            self._posts_cursor = self._latest(client, "posts")
+        else:
+            posts = self._new_rows(
+                lambda: client.table("posts").select("*").eq("is_published", True),
+                self._posts_cursor,
+            )
+            for post in posts:
+                self._publish(POSTS_TOPIC, {"type": "post", "data": post_row_to_dict(post)})
+
+        post_ids = [
+            topic.split(":", 1)[1]
+            for topic in list(self.broadcaster.topics)
+            if topic.startswith("comments:")
+        ]
+        if not post_ids:
+            self._comments_cursor = None
+        elif self._comments_cursor is None:
+            self._comments_cursor = self._latest(client, "comments")
+        else:
+            comments = self._new_rows(
+                lambda: client.table("comments")
+                .select(comment_projection(COMMENT_FIELDS))
+                .in_("post_id", post_ids)
+                .eq("is_deleted", False),
+                self._comments_cursor,
+            )
+            for comment in comments:
+                self._publish(
+                    comments_topic(comment["post_id"]),
+                    {"type": "comment", "data": comment_row_to_dict(comment)},
+                )
+
+    def _publish(self, topic: str, event: Dict[str, Any]) -> None:
+        # Called from a worker thread; hand over to the event loop
+        self._loop.call_soon_threadsafe(self.broadcaster.publish, topic, event)
+
+    @property
+    def _loop(self) -> asyncio.AbstractEventLoop:
+        return self._task.get_loop()
+
+
+# Singleton instances
+_broadcaster: Optional[Broadcaster] = None
+_change_feed: Optional[ChangeFeed] = None
+
+
+def get_broadcaster() -> Broadcaster:
+    """Get or create the Broadcaster singleton, making sure its change feed runs"""
+    global _broadcaster, _change_feed
+    if _broadcaster is None:
+        _broadcaster = Broadcaster(
+            queue_size=settings.realtime_queue_size,
+            max_subscribers=settings.realtime_max_subscribers,
+            max_topics=settings.realtime_max_topics,
+        )
+        _change_feed = ChangeFeed(
+            _broadcaster,
+            poll_interval=settings.realtime_poll_interval,
+            overlap=settings.realtime_poll_overlap,
+        )
+    _change_feed.ensure_running()
+    return _broadcaster
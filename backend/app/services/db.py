@@ -1,27 +1,60 @@
 """Database service for Supabase"""
 
-from supabase import create_client, Client
-from typing import Optional
+import threading
+from typing import TYPE_CHECKING, Optional
 from app.config import settings
 
+if TYPE_CHECKING:
+    from supabase import Client
+
 
 # Singleton Supabase client
-_supabase_client: Optional[Client] = None
+_supabase_client: Optional["Client"] = None
+_supabase_client_lock = threading.Lock()
 
 
-def get_supabase_client() -> Client:
+def get_supabase_client() -> "Client":
     """
     Get or create Supabase client singleton
 
+    Normally built during app startup (see app.main lifespan). Safe to call
+    from worker threads.
+
     Returns:
         Supabase client instance
     """
     global _supabase_client
 
     if _supabase_client is None:
-        _supabase_client = create_client(
-            settings.supabase_url,
-            settings.supabase_key,  # Using service role key for backend
-        )
+        with _supabase_client_lock:
+            if _supabase_client is None:
+                # Imported here: supabase pulls in httpx, postgrest, storage3,
+                # realtime, ... which dominates import time
+                from supabase import create_client
+
+                _supabase_client = create_client(
+                    settings.supabase_url,
+                    settings.supabase_key,  # Using service role key for backend
+                )
 
     return _supabase_client
+
+
+def close_supabase_client() -> None:
+    """Close the Supabase client's HTTP connection pools, if it was created"""
+    global _supabase_client
+
+    with _supabase_client_lock:
+        client, _supabase_client = _supabase_client, None
+    if client is None:
+        return
+
+    # supabase-py creates its PostgREST and Storage sub-clients lazily and
+    # has no close() of its own, so close the httpx clients they hold
+    for name in ("_postgrest", "_storage"):
+        sub_client = getattr(client, name, None)
+        for attr in ("session", "_client"):
+            http_client = getattr(sub_client, attr, None)
+            close = getattr(http_client, "close", None)
+            if callable(close):
+                close()
@@ -0,0 +1,63 @@
+"""Feed page queries shared by GET /api/posts and the feed snapshotter"""
+
+import math
+from typing import Any, Dict, List, Tuple
+
+from app.utils.serialization import POST_FIELDS, post_projection
+
+SORT_COLUMNS = {
+    "newest": ("created_at", True),
+    "oldest": ("created_at", False),
+    "popular": ("likes_count", True),
+}
+
+
+def query_posts_page(
+    client,
+    sort: str,
+    page: int,
+    limit: int,
+    fields: Tuple[str, ...] = POST_FIELDS,
+) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """
+    Fetch one page of published posts (blocking)
+
+    Args:
+        client: Supabase client
+        sort: newest | oldest | popular
+        page: Page number, from 1
+        limit: Posts per page
+        fields: Post columns to select
+
+    Returns:
+        (rows, pagination) with pagination as in PostsListResponse
+    """
+    column, desc = SORT_COLUMNS[sort]
+    offset = (page - 1) * limit
+
+    # Get total count
+    count_result = (
+        client.table("posts")
+        .select("id", count="exact")
+        .eq("is_published", True)
+        .execute()
+    )
+    total_count = count_result.count or 0
+
+    # Get posts (only the columns we are going to return)
+    result = (
+        client.table("posts")
+        .select(post_projection(fields))
+        .eq("is_published", True)
+        .order(column, desc=desc)
+        .range(offset, offset + limit - 1)
+        .execute()
+    )
+
+    pagination = {
+        "page": page,
+        "limit": limit,
+        "total": total_count,
+        "pages": math.ceil(total_count / limit),
+    }
+    return result.data, pagination
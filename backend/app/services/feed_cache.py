@@ -0,0 +1,217 @@
+"""Response cache for feed pages and single posts, shared by all workers
+
+Serialized JSON bodies live in an mmap'd file (on /dev/shm by default), so
+every ``uvicorn --workers N`` process on a host reads the same entries and
+the memory is paid once.
+
+Layout: a header with a global generation stamp, followed by fixed-size
+slots. Each slot is guarded by a seqlock: a writer (serialized across
+processes with an flock on the file) makes the sequence number odd, writes,
+then makes it even again. Readers take no lock: they read the sequence
+number, the slot and the payload, and discard the read if the sequence
+number was odd or changed meanwhile. That check has to come after the
+payload is read, so a hit copies the payload out of the mapping once (a
+single slice, with no other copy on the way to the response): a memoryview
+into the slot could be overwritten by another worker while the server is
+still sending it, and the seqlock could no longer tell.
+
+Invalidation is a single increment of the generation stamp: entries stored
+under an older generation are ignored by readers and overwritten later.
+Entries also expire after a TTL, which bounds staleness of counters updated
+outside the API (likes).
+"""
+
+import fcntl
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import time
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"FHCACHE1"
+# magic, generation, slot count, slot size
+_HEADER = struct.Struct("<8sQII")
+_GENERATION = struct.Struct("<Q")
+_GENERATION_OFFSET = 8
+_HEADER_SIZE = 64
+# seq, key digest, generation, expires_at (epoch seconds), payload length
+_SLOT = struct.Struct("<Q16sQdI")
+_SEQ = struct.Struct("<Q")
+_SLOT_HEADER_SIZE = 64
+
+
+class SharedResponseCache:
+    """2-way set-associative cache of bytes in a shared mmap'd file"""
+
+    def __init__(
+        self,
+        path: str,
+        slots: int = 512,
+        slot_size: int = 64 * 1024,
+        ttl_seconds: float = 15.0,
+    ):
+        self.slots = slots
+        self.slot_size = slot_size
+        self.capacity = slot_size - _SLOT_HEADER_SIZE
+        self.ttl_seconds = ttl_seconds
+        size = _HEADER_SIZE + slots * slot_size
+
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size != size:
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, size)
+            self._mm = mmap.mmap(self._fd, size)
+            magic, _, stored_slots, stored_size = _HEADER.unpack_from(self._mm, 0)
+            if (magic, stored_slots, stored_size) != (_MAGIC, slots, slot_size):
+                # New file, or another layout: start empty
+                self._mm[:] = bytes(size)
+                _HEADER.pack_into(self._mm, 0, _MAGIC, 1, slots, slot_size)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    @property
+    def generation(self) -> int:
+        """Current generation stamp; capture it before reading the source data"""
+        return _GENERATION.unpack_from(self._mm, _GENERATION_OFFSET)[0]
+
+    def _candidates(self, digest: bytes) -> Tuple[int, int]:
+        first = int.from_bytes(digest[:8], "little") % self.slots
+        second = int.from_bytes(digest[8:], "little") % self.slots
+        return (
+            _HEADER_SIZE + first * self.slot_size,
+            _HEADER_SIZE + second * self.slot_size,
+        )
+
+    @staticmethod
+    def _digest(key: str) -> bytes:
+        return hashlib.blake2b(key.encode(), digest_size=16).digest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return a copy of the cached body for a key, or None (lock-free)"""
+        digest = self._digest(key)
+        generation = self.generation
+        now = time.time()
+        for offset in self._candidates(digest):
+            seq, slot_digest, slot_generation, expires_at, length = _SLOT.unpack_from(
+                self._mm, offset
+            )
+            if seq & 1 or slot_digest != digest:
+                continue
+            if slot_generation != generation or expires_at < now or length > self.capacity:
+                return None
+            start = offset + _SLOT_HEADER_SIZE
+            body = self._mm[start:start + length]
+            if _SEQ.unpack_from(self._mm, offset)[0] != seq:
+                return None  # Overwritten while we were reading
+            return body
+        return None
+
+    def contains(self, key: str) -> bool:
+        """Whether a fresh entry exists for a key, without reading its body"""
+        digest = self._digest(key)
+        generation = self.generation
+        now = time.time()
+        for offset in self._candidates(digest):
+            seq, slot_digest, slot_generation, expires_at, _ = _SLOT.unpack_from(
+                self._mm, offset
+            )
+            if seq & 1 or slot_digest != digest:
+                continue
+            return slot_generation == generation and expires_at >= now
+        return False
+
+    def put(self, key: str, body: bytes, generation: int) -> bool:
+        """
+        Store a body computed from data read at ``generation``
+
+        If the generation was bumped since, the entry is stored already stale,
+        so a write that raced an invalidation can never be served.
+
+        Returns:
+            False if the body is larger than a slot
+        """
+        if len(body) > self.capacity:
+            return False
+        digest = self._digest(key)
+        expires_at = time.time() + self.ttl_seconds
+
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            current_generation = self.generation
+            now = time.time()
+            victim, victim_expires = None, None
+            for offset in self._candidates(digest):
+                _, slot_digest, slot_generation, slot_expires, _ = _SLOT.unpack_from(
+                    self._mm, offset
+                )
+                if slot_digest == digest:
+                    victim = offset
+                    break
+                if slot_generation != current_generation or slot_expires < now:
+                    slot_expires = 0.0  # Stale: free to reuse
+                if victim is None or slot_expires < victim_expires:
+                    victim, victim_expires = offset, slot_expires
+
+            seq = _SEQ.unpack_from(self._mm, victim)[0]
+            _SEQ.pack_into(self._mm, victim, seq + 1)
+            start = victim + _SLOT_HEADER_SIZE
+            self._mm[start:start + len(body)] = body
+            _SLOT.pack_into(
+                self._mm, victim, seq + 1, digest, generation, expires_at, len(body)
+            )
+            _SEQ.pack_into(self._mm, victim, seq + 2)
+            return True
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def invalidate(self) -> None:
+        """Make every cached entry stale, in all workers"""
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            _GENERATION.pack_into(self._mm, _GENERATION_OFFSET, self.generation + 1)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+
+def posts_page_key(
+    sort: str, page: int, limit: int, fields: Tuple[str, ...], compact: bool
+) -> str:
+    """Cache key of a GET /api/posts page"""
+    return f"posts:{sort}:{page}:{limit}:{','.join(fields)}:{int(compact)}"
+
+
+def post_key(post_id: str) -> str:
+    """Cache key of a GET /api/posts/{post_id} body"""
+    return f"post:{post_id}"
+
+
+# Singleton instance (None when disabled or the file could not be opened)
+_feed_cache: Optional[SharedResponseCache] = None
+_feed_cache_initialized = False
+
+
+def get_feed_cache() -> Optional[SharedResponseCache]:
+    """Get the shared feed cache, or None if it is disabled"""
+    global _feed_cache, _feed_cache_initialized
+    if not _feed_cache_initialized:
+        from app.config import settings
+
+        _feed_cache_initialized = True
+        if settings.feed_cache_ttl > 0:
+            path = os.path.join(settings.feed_cache_dir, "fatherhood-feed-cache")
+            try:
+                _feed_cache = SharedResponseCache(
+                    path,
+                    slots=settings.feed_cache_slots,
+                    slot_size=settings.feed_cache_slot_kb * 1024,
+                    ttl_seconds=settings.feed_cache_ttl,
+                )
+            except OSError as e:
+                logger.warning("Feed cache disabled: cannot open %s: %s", path, e)
+    return _feed_cache
@@ -0,0 +1,176 @@
+"""Prerendered feed snapshots in object storage
+
+The first pages of the newest and popular feeds are rendered to gzipped JSON
+(the same body GET /api/posts returns) and uploaded to stable paths in the
+storage bucket, e.g. feed/newest-1.json.gz. The frontend reads them straight
+from the CDN, so a busy home page costs the backend nothing; the objects are
+served with a short max-age so they never lag far behind.
+
+Snapshots are re-rendered a few seconds after a post is created (bursts of
+posts collapse into one render) and on a fixed interval to pick up likes and
+posts created elsewhere. With several workers on a host, an flock on a file
+next to the feed cache keeps them from rendering at the same time, and its
+mtime records the last render so periodic renders are not repeated per worker.
+"""
+
+import asyncio
+import fcntl
+import gzip
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import orjson
+
+from app.services.feed import query_posts_page
+from app.utils.serialization import POST_FIELDS, post_row_to_dict
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_SORTS = ("newest", "popular")
+
+
+def snapshot_path(sort: str, page: int) -> str:
+    """Object path of one snapshot page"""
+    return f"feed/{sort}-{page}.json.gz"
+
+
+class FeedSnapshotter:
+    """Renders feed pages and uploads them to object storage"""
+
+    def __init__(
+        self,
+        pages: int,
+        limit: int,
+        ttl_seconds: int,
+        debounce_seconds: float,
+        interval_seconds: float,
+        lock_path: str,
+    ):
+        self.pages = pages
+        self.limit = limit
+        self.ttl_seconds = ttl_seconds
+        self.debounce_seconds = debounce_seconds
+        self.interval_seconds = interval_seconds
+        self.lock_path = lock_path
+        self._requested = asyncio.Event()
+
+    def request_render(self) -> None:
+        """Ask for a render soon; calls within the debounce window coalesce"""
+        self._requested.set()
+
+    def render_pages(self, client) -> Dict[str, bytes]:
+        """
+        Query and serialize every snapshot page (blocking)
+
+        Returns:
+            Object path -> gzipped JSON body
+        """
+        objects = {}
+        for sort in SNAPSHOT_SORTS:
+            for page in range(1, self.pages + 1):
+                rows, pagination = query_posts_page(client, sort, page, self.limit)
+                body = orjson.dumps(
+                    {
+                        "posts": [
+                            post_row_to_dict(post, POST_FIELDS, False) for post in rows
+                        ],
+                        "pagination": pagination,
+                    }
+                )
+                objects[snapshot_path(sort, page)] = gzip.compress(body, mtime=0)
+                if page >= pagination["pages"]:
+                    break
+        return objects
+
+    async def render_all(self, client, storage, min_age: float = 0.0) -> bool:
+        """
+        Render and upload all snapshot pages
+
+        Args:
+            client: Supabase client
+            storage: StorageService
+            min_age: Skip if the last render (by any worker) is more recent
+
+        Returns:
+            True if snapshots were rendered, False if skipped
+        """
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False  # Another worker is rendering right now
+            if min_age and time.time() - os.fstat(fd).st_mtime < min_age:
+                return False
+
+            started = time.perf_counter()
+            objects = await asyncio.to_thread(self.render_pages, client)
+            await asyncio.gather(
+                *(
+                    storage.upload_object(
+                        path, data, "application/gzip", self.ttl_seconds
+                    )
+                    for path, data in objects.items()
+                )
+            )
+            os.utime(fd)
+            logger.info(
+                "Rendered %d feed snapshots in %.0f ms",
+                len(objects),
+                (time.perf_counter() - started) * 1000,
+            )
+            return True
+        finally:
+            os.close(fd)  # Also releases the flock
+
+    async def run_forever(
+        self, client_factory: Callable, storage_factory: Callable
+    ) -> None:
+        """Render now, then after new posts and every interval (started from the app lifespan)"""
+        min_age = self.interval_seconds / 2
+        while True:
+            try:
+                await self.render_all(client_factory(), storage_factory(), min_age)
+            except Exception:
+                logger.exception("Feed snapshot render failed")
+
+            try:
+                await asyncio.wait_for(self._requested.wait(), self.interval_seconds)
+            except asyncio.TimeoutError:
+                min_age = self.interval_seconds / 2
+                continue
+            # Let a burst of new posts settle, then render once for all of them
+            await asyncio.sleep(self.debounce_seconds)
+            self._requested.clear()
+            min_age = 0.0
+
+
+# Singleton instance
+_feed_snapshotter: Optional[FeedSnapshotter] = None
+_feed_snapshotter_lock = threading.Lock()
+
+
+def get_feed_snapshotter() -> Optional[FeedSnapshotter]:
+    """Get or create the FeedSnapshotter singleton (None when disabled)"""
+    global _feed_snapshotter
+    from app.config import settings
+
+    if settings.feed_snapshot_pages <= 0:
+        return None
+    if _feed_snapshotter is None:
+        with _feed_snapshotter_lock:
+            if _feed_snapshotter is None:
+                _feed_snapshotter = FeedSnapshotter(
+                    pages=settings.feed_snapshot_pages,
+                    limit=settings.feed_snapshot_limit,
+                    ttl_seconds=settings.feed_snapshot_ttl,
+                    debounce_seconds=settings.feed_snapshot_debounce,
+                    interval_seconds=settings.feed_snapshot_interval,
+                    lock_path=os.path.join(
+                        settings.feed_cache_dir, "fatherhood-feed-snapshots.lock"
+                    ),
+                )
+    return _feed_snapshotter
@@ -0,0 +1,153 @@
+"""Background health probes for readiness checks
+
+Probes run on an interval in the background and their results are cached,
+so health endpoints answer from memory without touching any dependency.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+Probe = Callable[[], Awaitable[Any]]
+
+
+class ProbeResult:
+    """Outcome of the latest run of one probe"""
+
+    __slots__ = ("status", "latency_ms", "checked_at", "error")
+
+    def __init__(
+        self,
+        status: str = "pending",
+        latency_ms: Optional[float] = None,
+        checked_at: Optional[str] = None,
+        error: Optional[str] = None,
+    ):
+        self.status = status
+        self.latency_ms = latency_ms
+        self.checked_at = checked_at
+        self.error = error
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "latency_ms": self.latency_ms,
+            "checked_at": self.checked_at,
+            "error": self.error,
+        }
+
+
+class HealthMonitor:
+    """Runs dependency probes periodically and caches their results"""
+
+    def __init__(self, interval_seconds: float = 30.0, timeout_seconds: float = 5.0):
+        self.interval_seconds = interval_seconds
+        self.timeout_seconds = timeout_seconds
+        self.probes: Dict[str, Probe] = {}
+        self.results: Dict[str, ProbeResult] = {}
+        self.warmed_up = False
+
+    def register(self, name: str, probe: Probe) -> None:
+        self.probes[name] = probe
+        self.results[name] = ProbeResult()
+
+    @property
+    def ready(self) -> bool:
+        """Ready once warm-up finished and every probe last succeeded"""
+        return self.warmed_up and all(
+            result.status == "ok" for result in self.results.values()
+        )
+
+    async def _run_probe(self, name: str, probe: Probe) -> None:
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(probe(), self.timeout_seconds)
+            status, error = "ok", None
+        except asyncio.TimeoutError:
+            status, error = "error", f"Timed out after {self.timeout_seconds}s"
+        except Exception as e:
+            status, error = "error", f"{type(e).__name__}: {e}"
+
+        # Log transitions only, not every round
+        if status == "error" and self.results[name].status != "error":
+            logger.warning("Health probe %s failed: %s", name, error)
+        elif status == "ok" and self.results[name].status == "error":
+            logger.info("Health probe %s recovered", name)
+
+        self.results[name] = ProbeResult(
+            status=status,
+            latency_ms=round((time.perf_counter() - started) * 1000, 1),
+            checked_at=datetime.now(timezone.utc).isoformat(),
+            error=error,
+        )
+
+    async def run_once(self) -> None:
+        """Run all probes concurrently"""
+        await asyncio.gather(
+            *(self._run_probe(name, probe) for name, probe in self.probes.items())
+        )
+
+    async def run_forever(self) -> None:
+        """Re-run probes every interval (started from the app lifespan)"""
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            await self.run_once()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "warmed_up": self.warmed_up,
+            "services": {name: result.to_dict() for name, result in self.results.items()},
+        }
+
+
+async def probe_database() -> None:
+    """Cheapest possible query against the posts table"""
+    from app.services.db import get_supabase_client
+
+    client = get_supabase_client()
+    await asyncio.to_thread(
+        lambda: client.table("posts").select("id").limit(1).execute()
+    )
+
+
+async def probe_storage() -> None:
+    """Fetch the image bucket's metadata"""
+    from app.services.storage import get_storage_service
+
+    storage = get_storage_service().supabase_storage
+    await asyncio.to_thread(storage.client.storage.get_bucket, storage.bucket_name)
+
+
+async def probe_image_generation() -> None:
+    """List a single model, which needs a valid key but no generation quota"""
+    from app.services.image_generator import get_image_generator
+
+    client = get_image_generator().client
+    await asyncio.to_thread(
+        lambda: next(iter(client.models.list(config={"page_size": 1})), None)
+    )
+
+
+# Singleton instance
+_health_monitor: Optional[HealthMonitor] = None
+
+
+def get_health_monitor() -> HealthMonitor:
+    """Get or create the HealthMonitor singleton with the standard probes"""
+    global _health_monitor
+    if _health_monitor is None:
+        _health_monitor = HealthMonitor(
+            interval_seconds=settings.health_check_interval,
+            timeout_seconds=settings.health_check_timeout,
+        )
+        _health_monitor.register("database", probe_database)
+        _health_monitor.register("storage", probe_storage)
+        _health_monitor.register("image_generation", probe_image_generation)
+    return _health_monitor
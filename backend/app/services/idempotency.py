@@ -0,0 +1,143 @@
+"""Idempotency-Key support for non-idempotent endpoints
+
+The first request with a given key runs the operation; concurrent requests
+with the same key wait on it, and later ones get the stored result. Results
+are kept in a bounded LRU for a fixed TTL. If the operation fails, the key is
+released so the client can retry, and anyone waiting receives the same error.
+When the store is full, the oldest completed entry is evicted; in-flight
+entries never are, and new keys are rejected while every entry is in flight.
+
+The store is per process: retries that land on another worker or instance are
+not deduplicated. Run one worker per instance behind sticky routing, or accept
+that a retry routed elsewhere may run the operation again.
+"""
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional, Tuple, TypeVar
+
+from app.config import settings
+
+T = TypeVar("T")
+
+
+class IdempotencyConflictError(Exception):
+    """Raised when a key is reused with a different request payload"""
+
+
+class IdempotencyAbortedError(Exception):
+    """Raised to waiters when the original request was cancelled"""
+
+
+class IdempotencyStoreFullError(Exception):
+    """Raised for a new key when every stored entry is still in flight"""
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "future", "expires_at")
+
+    def __init__(self, fingerprint: str, future: asyncio.Future, expires_at: float):
+        self.fingerprint = fingerprint
+        self.future = future
+        self.expires_at = expires_at
+
+
+def fingerprint(*parts: Any) -> str:
+    """Stable digest of the request payload a key was first used with"""
+    return hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+
+
+class IdempotencyStore:
+    """Bounded, TTL-based store of in-flight and completed results"""
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 86400.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # Insertion order == expiry order, since every entry gets the same TTL
+        self.entries: "OrderedDict[str, _Entry]" = OrderedDict()
+
+    def _purge(self, now: float) -> None:
+        """Drop expired entries"""
+        entries = self.entries
+        while entries and next(iter(entries.values())).expires_at <= now:
+            entries.popitem(last=False)
+
+    def _evict_completed(self, key: str) -> None:
+        """Drop the oldest entry whose operation has finished"""
+        for stored_key, entry in self.entries.items():
+            if entry.future.done():
+                del self.entries[stored_key]
+                return
+        raise IdempotencyStoreFullError(key)
+
+    async def run(
+        self,
+        key: str,
+        request_fingerprint: str,
+        operation: Callable[[], Awaitable[T]],
+    ) -> Tuple[T, bool]:
+        """
+        Run an operation at most once per key
+
+        Args:
+            key: Idempotency key (scoped by the caller, e.g. per endpoint and client)
+            request_fingerprint: Digest of the request payload
+            operation: Coroutine factory performing the work
+
+        Returns:
+            Tuple of (result, replayed); replayed is True if the result came
+            from an earlier request with the same key
+
+        Raises:
+            IdempotencyConflictError: If the key was used with a different payload
+            IdempotencyAbortedError: If the original request was cancelled
+            IdempotencyStoreFullError: If the store is full of in-flight entries
+            Exception: Whatever the original operation raised
+        """
+        now = time.monotonic()
+        self._purge(now)
+
+        entry = self.entries.get(key)
+        if entry is not None:
+            if entry.fingerprint != request_fingerprint:
+                raise IdempotencyConflictError(key)
+            return await asyncio.shield(entry.future), True
+
+        while len(self.entries) >= self.max_entries:
+            self._evict_completed(key)
+
+        future = asyncio.get_running_loop().create_future()
+        self.entries[key] = _Entry(request_fingerprint, future, now + self.ttl_seconds)
+
+        try:
+            result = await operation()
+        except Exception as e:
+            self.entries.pop(key, None)
+            future.set_exception(e)
+            future.exception()  # Mark retrieved when nobody is waiting
+            raise
+        except BaseException:
+            self.entries.pop(key, None)
+            future.set_exception(IdempotencyAbortedError(key))
+            future.exception()
+            raise
+
+        future.set_result(result)
+        return result, False
+
+
+# Singleton instance
+_idempotency_store: Optional[IdempotencyStore] = None
+
+
+def get_idempotency_store() -> IdempotencyStore:
+    """Get or create the IdempotencyStore singleton instance"""
+    global _idempotency_store
+    if _idempotency_store is None:
+        _idempotency_store = IdempotencyStore(
+            max_entries=settings.idempotency_max_entries,
+            ttl_seconds=settings.idempotency_ttl_hours * 3600.0,
+        )
+    return _idempotency_store
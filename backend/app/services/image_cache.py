@@ -0,0 +1,261 @@
+"""Local disk cache in front of the storage bucket's public images
+
+Images are fetched from the bucket once and kept as files under
+IMAGE_PROXY_CACHE_DIR, so repeat requests are served from local disk instead
+of costing storage egress. Resized variants (for a requested width, snapped to
+one of IMAGE_PROXY_WIDTHS so callers can't fill the cache with arbitrary
+sizes) are rendered with Pillow from the cached original and cached as well.
+
+The cache is bounded to IMAGE_PROXY_CACHE_MB: once over budget, the least
+recently used files (by access time, which hits set explicitly so it doesn't
+depend on mount options) are deleted until it is back under 90%. Files used in
+the last EVICTION_GRACE_SECONDS are kept, so a file get() just returned is
+still there when the response opens it (after which deleting it is harmless);
+if one goes missing anyway, it is fetched again once. Modification times are
+never touched, so ETags stay stable.
+
+Concurrent misses for the same file within a process share one upstream
+fetch or resize. Workers on a host share the directory; files are written to a
+temporary name and renamed into place, so readers never see partial files.
+"""
+
+import asyncio
+import logging
+import os
+import re
+import threading
+import time
+from io import BytesIO
+from typing import Dict, Optional, Sequence, Tuple
+
+import httpx
+
+from app.services.metrics import cache_requests
+
+logger = logging.getLogger(__name__)
+
+# Names as uploaded by the storage service (<uuid>.png), never paths
+IMAGE_NAME_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,127}\.(png|jpe?g|webp)$")
+
+# Files accessed more recently than this are never evicted
+EVICTION_GRACE_SECONDS = 60.0
+
+
+class ImageNotFoundError(Exception):
+    """The image does not exist upstream"""
+
+
+class ImageCache:
+    """Size-bounded LRU of upstream images and their resized variants"""
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int,
+        upstream_base: str,
+        widths: Sequence[int],
+        timeout_seconds: float = 10.0,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.upstream_base = upstream_base.rstrip("/")
+        self.widths = tuple(sorted(widths))
+        self.timeout_seconds = timeout_seconds
+        os.makedirs(directory, exist_ok=True)
+        # Approximate (other workers add files too); eviction rescans the
+        # directory to get the real total
+        self.size = sum(size for _, _, size in self._scan())
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def snap_width(self, width: int) -> Optional[int]:
+        """Smallest configured width >= width (None: the original size)"""
+        for candidate in self.widths:
+            if candidate >= width:
+                return candidate
+        return None
+
+    def is_cached(self, name: str, width: Optional[int] = None) -> bool:
+        """Whether get() would be served from disk without a fetch or resize"""
+        return os.path.exists(self._path(name, width))
+
+    def _path(self, name: str, width: Optional[int]) -> str:
+        if width is None:
+            return os.path.join(self.directory, name)
+        stem, ext = os.path.splitext(name)
+        return os.path.join(self.directory, f"{stem}@{width}{ext}")
+
+    async def get(self, name: str, width: Optional[int] = None) -> Tuple[str, os.stat_result]:
+        """
+        Get the local path of an image, fetching or resizing it on a miss
+
+        Args:
+            name: Image name (must match IMAGE_NAME_PATTERN)
+            width: Snapped width, or None for the original
+
+        Returns:
+            (path, stat) of the cached file
+
+        Raises:
+            ImageNotFoundError: If the image does not exist upstream
+        """
+        path = self._path(name, width)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            pass
+        else:
+            cache_requests.inc("image", "hit")
+            os.utime(path, ns=(time.time_ns(), stat.st_mtime_ns))
+            return path, stat
+
+        cache_requests.inc("image", "miss")
+        task = self._inflight.get(path)
+        if task is None:
+            task = asyncio.create_task(self._fill(name, width, path))
+            self._inflight[path] = task
+            task.add_done_callback(lambda _: self._inflight.pop(path, None))
+        # Shielded: a client disconnecting doesn't cancel the fetch for the others
+        return await asyncio.shield(task)
+
+    async def _fill(
+        self, name: str, width: Optional[int], path: str
+    ) -> Tuple[str, os.stat_result]:
+        if width is None:
+            data = await self._fetch(name)
+        else:
+            try:
+                source, data = await self._resize_original(name, width)
+            except FileNotFoundError:
+                # The original was evicted by another worker meanwhile
+                source, data = await self._resize_original(name, width)
+            if data is None:  # Already that small: serve the original
+                return await self.get(name)
+
+        stat = await asyncio.to_thread(self._write, path, data)
+        self.size += stat.st_size
+        if self.size > self.max_bytes:
+            await asyncio.to_thread(self.evict)
+        return path, stat
+
+    async def _resize_original(
+        self, name: str, width: int
+    ) -> Tuple[str, Optional[bytes]]:
+        source, _ = await self.get(name)
+        return source, await asyncio.to_thread(_resize, source, width)
+
+    async def _fetch(self, name: str) -> bytes:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.timeout_seconds)
+        response = await self._client.get(f"{self.upstream_base}/{name}")
+        # Supabase answers 400 for missing public objects
+        if response.status_code in (400, 404):
+            raise ImageNotFoundError(name)
+        response.raise_for_status()
+        return response.content
+
+    @staticmethod
+    def _write(path: str, data: bytes) -> os.stat_result:
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+        return os.stat(path)
+
+    def _scan(self):
+        """(atime, path, size) of every cached file"""
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(".tmp"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue  # Evicted by another worker meanwhile
+                entries.append((stat.st_atime, entry.path, stat.st_size))
+        return entries
+
+    def evict(self) -> int:
+        """
+        Delete least recently used files until the cache is under 90% of its budget
+
+        Returns:
+            Number of files deleted
+        """
+        entries = sorted(self._scan())
+        total = sum(size for _, _, size in entries)
+        target = self.max_bytes * 0.9
+        # Read again right before deleting: the file may have been used since
+        # the scan, here or in another worker
+        recent = time.time() - EVICTION_GRACE_SECONDS
+        deleted = 0
+        for _, path, size in entries:
+            if total <= target:
+                break
+            try:
+                if os.stat(path).st_atime >= recent:
+                    continue
+                os.unlink(path)
+                deleted += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        self.size = total
+        if deleted:
+            logger.info("Image cache: evicted %d files", deleted)
+        return deleted
+
+    async def close(self) -> None:
+        """Close the upstream connection pool (on shutdown)"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def _resize(source: str, width: int) -> Optional[bytes]:
+    """Scale an image down to width, keeping its format (None if already narrower)"""
+    from PIL import Image
+
+    with Image.open(source) as image:
+        if image.width <= width:
+            return None
+        height = max(1, round(image.height * width / image.width))
+        image_format = image.format
+        resized = image.resize((width, height), Image.Resampling.LANCZOS)
+    buffer = BytesIO()
+    resized.save(buffer, format=image_format, optimize=True)
+    return buffer.getvalue()
+
+
+# Singleton instance
+_image_cache: Optional[ImageCache] = None
+_image_cache_lock = threading.Lock()
+
+
+def get_image_cache() -> ImageCache:
+    """Get or create the ImageCache singleton instance"""
+    global _image_cache
+    if _image_cache is None:
+        with _image_cache_lock:
+            if _image_cache is None:
+                from app.config import settings
+                from app.services.storage import get_storage_service
+
+                _image_cache = ImageCache(
+                    directory=settings.image_proxy_cache_dir,
+                    max_bytes=settings.image_proxy_cache_mb * 1024 * 1024,
+                    upstream_base=get_storage_service().supabase_storage.public_url_base,
+                    widths=[
+                        int(width)
+                        for width in settings.image_proxy_widths.split(",")
+                        if width.strip()
+                    ],
+                )
+    return _image_cache
+
+
+async def close_image_cache() -> None:
+    """Close the singleton's upstream connection pool, if it was created"""
+    if _image_cache is not None:
+        await _image_cache.close()
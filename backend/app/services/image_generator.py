@@ -1,10 +1,13 @@
 """Image generation service using Google Gemini Nano Banana Pro"""
 
-from google import genai
-from google.genai import types
 from typing import Optional
+import logging
 import os
+import threading
 from app.config import settings
+from app.services.metrics import gemini_requests
+
+logger = logging.getLogger(__name__)
 
 
 class ImageGenerator:
@@ -13,6 +16,10 @@ class ImageGenerator:
     """
 
     def __init__(self):
+        # Imported here: google.genai is slow to import and only needed once
+        # the generator is built (at startup, off the event loop)
+        from google import genai
+
         self.api_key = settings.google_api_key
 
         # Configure the Gemini API client
@@ -41,7 +48,10 @@ class ImageGenerator:
         Raises:
             RuntimeError: If image generation fails
         """
+        from google.genai import types
+
         prompt = self._build_prompt(user_text)
+        outcome, finish_reason = "error", "none"
 
         try:
             # IMPORTANT: Nano Banana Pro uses generate_content() NOT generate_images()
@@ -73,7 +83,8 @@ The text should be integrated naturally into the vintage comic strip layout, mat
                 # Fallback to text-only prompt if reference not available
                 contents = prompt
 
-            response = self.client.models.generate_content(
+            # Async client: a ~20s generation must not block the event loop
+            response = await self.client.aio.models.generate_content(
                 model=self.model_name,
                 contents=contents,
                 config=types.GenerateContentConfig(
@@ -88,8 +99,11 @@ The text should be integrated naturally into the vintage comic strip layout, mat
             if response is None:
                 raise RuntimeError("Model returned None response")
 
+            finish_reason = self._finish_reason(response)
+
             if not hasattr(response, 'parts') or response.parts is None:
                 # Check if response was blocked
+                outcome = "blocked"
                 if hasattr(response, 'candidates') and response.candidates:
                     candidate = response.candidates[0]
                     if hasattr(candidate, 'finish_reason'):
@@ -105,18 +119,44 @@ The text should be integrated naturally into the vintage comic strip layout, mat
                     break
                 elif hasattr(part, 'text') and part.text:
                     # Model returned text instead of image
-                    print(f"Warning: Model returned text: {part.text[:200]}")
+                    logger.warning("Model returned text instead of an image: %s", part.text[:200])
 
             if image_bytes is None:
+                outcome = "no_image"
                 raise RuntimeError("No image data in response - the prompt may have been rejected by content filters")
 
+            outcome = "ok"
             return image_bytes
 
         except Exception as e:
-            # More detailed error logging
-            print(f"Image generation error: {type(e).__name__}: {str(e)}")
+            logger.warning(
+                "Image generation failed: %s: %s",
+                type(e).__name__,
+                e,
+                extra={"outcome": outcome, "finish_reason": finish_reason},
+            )
             raise RuntimeError(f"Failed to generate image: {str(e)}") from e
 
+        finally:
+            gemini_requests.inc(outcome, finish_reason)
+
+    def close(self) -> None:
+        """Close the Gemini client's HTTP connections"""
+        close = getattr(self.client, "close", None)
+        if callable(close):
+            close()
+
+    @staticmethod
+    def _finish_reason(response) -> str:
+        """Finish reason of the first candidate as a metric label (e.g. STOP, SAFETY)"""
+        candidates = getattr(response, 'candidates', None)
+        if not candidates:
+            return "none"
+        reason = getattr(candidates[0], 'finish_reason', None)
+        if reason is None:
+            return "none"
+        return getattr(reason, 'name', None) or str(reason)
+
     def _build_prompt(self, user_text: str) -> str:
         """
         Build the prompt for image generation in 'Love Is...' style
@@ -183,22 +223,35 @@ The style should authentically replicate the warm, innocent, hand-drawn quality
             with open(self.reference_image_path, "rb") as f:
                 return f.read()
         except FileNotFoundError:
-            print(
-                f"Warning: Reference image not found at {self.reference_image_path}. Proceeding without reference."
+            logger.warning(
+                "Reference image not found at %s. Proceeding without reference.",
+                self.reference_image_path,
             )
             return b""
         except Exception as e:
-            print(f"Warning: Failed to load reference image: {e}. Proceeding without reference.")
+            logger.warning("Failed to load reference image: %s. Proceeding without reference.", e)
             return b""
 
 
 # Singleton instance
 _image_generator: Optional[ImageGenerator] = None
+_image_generator_lock = threading.Lock()
 
 
 def get_image_generator() -> ImageGenerator:
     """Get or create the ImageGenerator singleton instance"""
     global _image_generator
     if _image_generator is None:
-        _image_generator = ImageGenerator()
+        with _image_generator_lock:
+            if _image_generator is None:
+                _image_generator = ImageGenerator()
     return _image_generator
+
+
+def close_image_generator() -> None:
+    """Close and drop the ImageGenerator singleton, if it was created"""
+    global _image_generator
+    with _image_generator_lock:
+        generator, _image_generator = _image_generator, None
+    if generator is not None:
+        generator.close()
@@ -0,0 +1,77 @@
+"""Startup and shutdown of long-lived service clients
+
+Clients are built concurrently in worker threads during app startup, so the
+first request doesn't pay for client construction, heavy imports or reading
+the reference image, and the event loop isn't blocked meanwhile.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Callable, Dict
+
+from app.services.db import close_supabase_client, get_supabase_client
+from app.services.image_cache import close_image_cache
+from app.services.image_generator import close_image_generator, get_image_generator
+from app.services.storage import get_storage_service
+
+logger = logging.getLogger(__name__)
+
+# Built concurrently; the getters are lock-guarded, so shared dependencies
+# (the Supabase client behind storage) are still only built once
+SERVICE_FACTORIES: Dict[str, Callable[[], object]] = {
+    "supabase": get_supabase_client,
+    "storage": get_storage_service,
+    "image_generator": get_image_generator,
+}
+
+
+def _build(name: str, factory: Callable[[], object]) -> None:
+    started = time.perf_counter()
+    factory()
+    logger.info(
+        "Built %s in %.1f ms",
+        name,
+        (time.perf_counter() - started) * 1000,
+        extra={"service": name},
+    )
+
+
+async def start_services() -> None:
+    """
+    Build all service clients concurrently
+
+    A failure is logged rather than raised: the app still starts, the health
+    probes report the failing dependency as not ready, and the getter retries
+    on first use.
+    """
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(asyncio.to_thread(_build, name, factory) for name, factory in SERVICE_FACTORIES.items()),
+        return_exceptions=True,
+    )
+    for name, result in zip(SERVICE_FACTORIES, results):
+        if isinstance(result, BaseException):
+            logger.error(
+                "Failed to build %s: %s: %s",
+                name,
+                type(result).__name__,
+                result,
+                extra={"service": name},
+            )
+    logger.info(
+        "Services started in %.1f ms", (time.perf_counter() - started) * 1000
+    )
+
+
+async def stop_services() -> None:
+    """Close HTTP connection pools held by service clients (on shutdown)"""
+    for close in (close_image_generator, close_supabase_client):
+        try:
+            await asyncio.to_thread(close)
+        except Exception:
+            logger.exception("Error closing %s", close.__name__)
+    try:
+        await close_image_cache()
+    except Exception:
+        logger.exception("Error closing image cache")
@@ -0,0 +1,49 @@
+"""Event loop lag sampling
+
+A coroutine sleeps for a fixed interval and measures how much later than
+requested it woke up. Any blocking call on the loop (sync Supabase or Gemini
+calls, CPU-heavy serialization) shows up directly as lag.
+"""
+
+import asyncio
+from typing import Optional
+
+from app.config import settings
+from app.services.metrics import event_loop_lag
+
+
+class LoopLagMonitor:
+    """
+    Tracks event loop lag
+
+    Rises to a new peak immediately and decays by half per sample, so a
+    single long block is still visible for a few samples afterwards.
+    """
+
+    def __init__(self, interval_seconds: float = 0.1):
+        self.interval_seconds = interval_seconds
+        self.lag = 0.0
+
+    def _record(self, sample: float) -> None:
+        self.lag = sample if sample > self.lag else (self.lag + sample) / 2
+        event_loop_lag.set(self.lag)
+
+    async def run(self) -> None:
+        """Sample lag forever (started from the app lifespan)"""
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval_seconds)
+            self._record(max(0.0, loop.time() - started - self.interval_seconds))
+
+
+# Singleton instance
+_loop_monitor: Optional[LoopLagMonitor] = None
+
+
+def get_loop_monitor() -> LoopLagMonitor:
+    """Get or create the LoopLagMonitor singleton instance"""
+    global _loop_monitor
+    if _loop_monitor is None:
+        _loop_monitor = LoopLagMonitor(settings.loop_lag_interval)
+    return _loop_monitor
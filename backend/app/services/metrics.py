@@ -0,0 +1,230 @@
+"""In-process metrics exposed in Prometheus text format on /metrics
+
+Recording is a dict lookup plus an integer/float update with no locks. Almost
+all call sites run on the event loop thread; the few that run in worker
+threads can at worst lose an increment under contention, which is an
+acceptable trade for keeping metrics always on.
+"""
+
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from app.utils.log import record_timing
+
+# Latency buckets in seconds: sub-millisecond cache hits up to 60s generations
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0,
+)
+
+_registry: List["_Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        _registry.append(self)
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.type_name}"
+        yield from self._render_samples()
+
+    def _render_samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        self.values[labelvalues] = self.values.get(labelvalues, 0) + amount
+
+    def _render_samples(self) -> Iterator[str]:
+        for labelvalues, value in list(self.values.items()):
+            labels = _format_labels(self.labelnames, labelvalues)
+            yield f"{self.name}{labels} {_format_value(value)}"
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, *labelvalues: str) -> None:
+        self.values[labelvalues] = value
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        self.values[labelvalues] = self.values.get(labelvalues, 0) + amount
+
+    def dec(self, *labelvalues: str, amount: float = 1) -> None:
+        self.values[labelvalues] = self.values.get(labelvalues, 0) - amount
+
+    def _render_samples(self) -> Iterator[str]:
+        for labelvalues, value in list(self.values.items()):
+            labels = _format_labels(self.labelnames, labelvalues)
+            yield f"{self.name}{labels} {_format_value(value)}"
+
+
+class _HistogramSeries:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in fixed buckets"""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets) + (float("inf"),)
+        self.series: Dict[Tuple[str, ...], _HistogramSeries] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        series = self.series.get(labelvalues)
+        if series is None:
+            series = self.series[labelvalues] = _HistogramSeries(len(self.buckets))
+        # Per-bucket counts; cumulated when rendering
+        series.counts[bisect_left(self.buckets, value)] += 1
+        series.sum += value
+        series.count += 1
+
+    @contextmanager
+    def time(self, *labelvalues: str):
+        """Observe the duration of a block in seconds"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labelvalues)
+
+    def _render_samples(self) -> Iterator[str]:
+        for labelvalues, series in list(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series.counts):
+                cumulative += count
+                labels = _format_labels(
+                    self.labelnames, labelvalues, f'le="{_format_value(bound)}"'
+                )
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, labelvalues)
+            yield f"{self.name}_sum{labels} {_format_value(series.sum)}"
+            yield f"{self.name}_count{labels} {series.count}"
+
+
+def render_metrics() -> str:
+    """Render all registered metrics in Prometheus text exposition format"""
+    lines: List[str] = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# Metrics
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("method", "route", "status"),
+)
+
+stage_duration = Histogram(
+    "request_stage_duration_seconds",
+    "Latency of request stages (validate, generate, upload, db_insert)",
+    ("stage",),
+)
+
+gemini_requests = Counter(
+    "gemini_requests_total",
+    "Gemini image generation calls by outcome and finish reason",
+    ("outcome", "finish_reason"),
+)
+
+rate_limit_rejections = Counter(
+    "rate_limit_rejections_total",
+    "Requests rejected by rate limiting, admission control or duplicate detection",
+    ("limiter",),
+)
+
+rate_limit_store_overflows = Counter(
+    "rate_limit_store_overflows_total",
+    "Rate limit hits counted per process because the shared table was full",
+)
+
+cache_requests = Counter(
+    "cache_requests_total",
+    "Cache lookups by cache and result (hit or miss)",
+    ("cache", "result"),
+)
+
+event_loop_lag = Gauge(
+    "event_loop_lag_seconds",
+    "How late the event loop ran a timer callback (smoothed)",
+)
+
+requests_in_flight = Gauge(
+    "http_requests_in_flight",
+    "Low-priority requests currently being handled (see LoadSheddingMiddleware)",
+)
+
+requests_shed = Counter(
+    "http_requests_shed_total",
+    "Low-priority requests rejected with 503 because the process was overloaded",
+    ("reason",),
+)
+
+
+@contextmanager
+def stage(name: str):
+    """Time a request stage, for the metrics and the Server-Timing header"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        stage_duration.observe(elapsed, name)
+        record_timing(name, elapsed)
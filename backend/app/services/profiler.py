@@ -0,0 +1,289 @@
+"""Low-overhead sampling profiler for production
+
+A sampler thread periodically snapshots the stacks of every thread (the event
+loop and the worker threads) with ``sys._current_frames()`` and aggregates
+them as collapsed stacks, the input format of flamegraph.pl, speedscope and
+similar tools:
+
+    MainThread;run (asyncio/runners.py);...;get_posts (app/api/posts.py) 42
+
+Sampling holds the GIL, so its cost is paid by every Python thread. A duty
+cycle caps that cost: after each sample the sampler sleeps long enough that
+sampling takes at most ``max_overhead`` of wall time, stretching the interval
+when stacks are deep or threads are many.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Deque, Dict, Iterable, List, Optional
+
+# Deepest stack recorded per thread (the leaf-most frames are kept)
+MAX_STACK_DEPTH = 128
+
+# Frames where a thread is blocked waiting for work rather than running;
+# stacks ending here are dropped unless idle samples are requested
+IDLE_LEAVES = frozenset(
+    {
+        ("selectors.py", "select"),
+        ("threading.py", "wait"),
+        ("thread.py", "_worker"),
+        ("queue.py", "get"),
+        ("socket.py", "accept"),
+    }
+)
+
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class StackSampler:
+    """Snapshots all thread stacks as collapsed-stack strings"""
+
+    def __init__(self, include_idle: bool = False):
+        self.include_idle = include_idle
+        self._labels: Dict[object, str] = {}
+        self._idle_codes: Dict[object, bool] = {}
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            filename = code.co_filename
+            if filename.startswith(_APP_ROOT):
+                filename = os.path.relpath(filename, _APP_ROOT)
+            else:
+                # Library frames: keep the last two path components
+                filename = "/".join(filename.replace("\\", "/").split("/")[-2:])
+            label = self._labels[code] = f"{code.co_name} ({filename})"
+        return label
+
+    def _is_idle(self, code) -> bool:
+        idle = self._idle_codes.get(code)
+        if idle is None:
+            idle = self._idle_codes[code] = (
+                os.path.basename(code.co_filename),
+                code.co_name,
+            ) in IDLE_LEAVES
+        return idle
+
+    def sample(self, skip_thread: int) -> List[str]:
+        """Return one collapsed stack per thread, except ``skip_thread``"""
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        stacks = []
+        for ident, frame in sys._current_frames().items():
+            if ident == skip_thread:
+                continue
+            if not self.include_idle and self._is_idle(frame.f_code):
+                continue
+            labels = []
+            while frame is not None and len(labels) < MAX_STACK_DEPTH:
+                labels.append(self._label(frame.f_code))
+                frame = frame.f_back
+            labels.append(names.get(ident, f"thread-{ident}"))
+            labels.reverse()
+            stacks.append(";".join(labels))
+        return stacks
+
+
+class DutyCycle:
+    """Sleep between samples so sampling uses at most ``max_overhead`` of wall time"""
+
+    def __init__(self, interval: float, max_overhead: float):
+        self.interval = interval
+        self.max_overhead = max_overhead
+        self.busy = 0.0
+        self.started = time.perf_counter()
+
+    def pause(self, cost: float) -> float:
+        """Record a sample's cost and return how long to sleep before the next one"""
+        self.busy += cost
+        return max(self.interval - cost, cost * (1 / self.max_overhead - 1))
+
+    @property
+    def overhead(self) -> float:
+        """Fraction of elapsed wall time spent sampling"""
+        elapsed = time.perf_counter() - self.started
+        return self.busy / elapsed if elapsed > 0 else 0.0
+
+
+class ProfileResult:
+    """Aggregated samples from one profiling run"""
+
+    def __init__(self, stacks: Counter, samples: int, overhead: float):
+        self.stacks = stacks
+        self.samples = samples
+        self.overhead = overhead
+
+    def collapsed(self) -> str:
+        return render_collapsed(self.stacks)
+
+
+def render_collapsed(stacks: Counter) -> str:
+    """Render stack counts as collapsed-stack lines, most frequent first"""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+# One on-demand profile at a time: concurrent runs would double the overhead
+_profile_lock = threading.Lock()
+
+
+def profile(
+    seconds: float,
+    interval: float = 0.01,
+    max_overhead: float = 0.02,
+    include_idle: bool = False,
+) -> ProfileResult:
+    """
+    Sample all threads for ``seconds`` (blocking; run in a worker thread)
+
+    Args:
+        seconds: How long to profile
+        interval: Target time between samples in seconds
+        max_overhead: Maximum fraction of wall time spent sampling
+        include_idle: Keep samples of threads blocked waiting for work
+
+    Returns:
+        ProfileResult with collapsed stack counts
+
+    Raises:
+        RuntimeError: If another profile is already running
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise RuntimeError("A profile is already running")
+    try:
+        sampler = StackSampler(include_idle)
+        cycle = DutyCycle(interval, max_overhead)
+        me = threading.get_ident()
+        stacks: Counter = Counter()
+        samples = 0
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            stacks.update(sampler.sample(me))
+            samples += 1
+            time.sleep(cycle.pause(time.perf_counter() - started))
+        return ProfileResult(stacks, samples, cycle.overhead)
+    finally:
+        _profile_lock.release()
+
+
+class SlowTrace:
+    """Samples taken while one traced request was in flight"""
+
+    __slots__ = ("route", "request_id", "started_at", "duration_ms", "samples", "stacks")
+
+    def __init__(self, route: str, request_id: str):
+        self.route = route
+        self.request_id = request_id
+        self.started_at = time.time()
+        self.duration_ms = 0.0
+        self.samples = 0
+        self.stacks: Counter = Counter()
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "route": self.route,
+            "request_id": self.request_id,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "samples": self.samples,
+            "collapsed": render_collapsed(self.stacks),
+        }
+
+
+class SlowRequestTracer:
+    """
+    Keeps stack samples of opted-in requests that turn out to be slow
+
+    A sampler thread runs only while at least one traced request is in
+    flight. Each sample is added to every in-flight trace: with the event loop
+    interleaving requests, a trace shows what the process was doing while the
+    request was pending, which is what explains a slow request. Traces of
+    requests that finish under the threshold are discarded; the most recent
+    slow ones are kept in a ring buffer.
+    """
+
+    def __init__(
+        self,
+        routes: Iterable[str],
+        threshold_ms: float,
+        interval: float = 0.01,
+        max_overhead: float = 0.02,
+        max_traces: int = 20,
+        max_samples_per_trace: int = 2000,
+    ):
+        self.routes = frozenset(routes)
+        self.threshold_ms = threshold_ms
+        self.interval = interval
+        self.max_overhead = max_overhead
+        self.max_samples_per_trace = max_samples_per_trace
+        self.traces: Deque[SlowTrace] = deque(maxlen=max_traces)
+        self._active: Dict[int, SlowTrace] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._sampler = StackSampler()
+
+    def begin(self, route: str, request_id: str) -> SlowTrace:
+        trace = SlowTrace(route, request_id)
+        with self._lock:
+            self._active[id(trace)] = trace
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="slow-request-tracer", daemon=True
+                )
+                self._thread.start()
+        return trace
+
+    def discard(self, trace: SlowTrace) -> None:
+        with self._lock:
+            self._active.pop(id(trace), None)
+
+    def end(self, trace: SlowTrace, duration_ms: float) -> None:
+        self.discard(trace)
+        if duration_ms >= self.threshold_ms:
+            trace.duration_ms = round(duration_ms, 1)
+            self.traces.append(trace)
+
+    def _run(self) -> None:
+        cycle = DutyCycle(self.interval, self.max_overhead)
+        me = threading.get_ident()
+        while True:
+            with self._lock:
+                active = list(self._active.values())
+                if not active:
+                    # Nothing to trace: stop; the next begin() restarts us
+                    self._thread = None
+                    return
+            started = time.perf_counter()
+            stacks = self._sampler.sample(me)
+            for trace in active:
+                if trace.samples < self.max_samples_per_trace:
+                    trace.stacks.update(stacks)
+                    trace.samples += 1
+            time.sleep(cycle.pause(time.perf_counter() - started))
+
+    def recent(self) -> List[Dict[str, object]]:
+        """Most recent slow traces, newest first"""
+        return [trace.to_dict() for trace in reversed(self.traces)]
+
+
+# Singleton instance (None when no routes opt in)
+_slow_request_tracer: Optional[SlowRequestTracer] = None
+
+
+def get_slow_request_tracer() -> Optional[SlowRequestTracer]:
+    """Get the SlowRequestTracer singleton, or None if tracing is disabled"""
+    global _slow_request_tracer
+    from app.config import settings
+
+    routes = [route.strip() for route in settings.profile_slow_routes.split(",") if route.strip()]
+    if not routes:
+        return None
+    if _slow_request_tracer is None:
+        _slow_request_tracer = SlowRequestTracer(
+            routes,
+            settings.profile_slow_threshold_ms,
+            max_overhead=settings.profiler_max_overhead,
+        )
+    return _slow_request_tracer
@@ -0,0 +1,209 @@
+"""Near-duplicate detection for submitted prompts
+
+Each text is reduced to a 64-bit SimHash of its character shingles; texts
+that differ by small edits ("Fatherhood is fun!!", "fatherhood is fun :)")
+land within a few bits of each other. Hashes are indexed by bands: two hashes
+within Hamming distance d < bands must agree exactly on at least one band,
+so a lookup only compares against a handful of candidates. Eight 8-bit bands
+make every pair within Hamming distance 7 share a band.
+
+Entries expire after a time window, so the index only ever holds recent
+submissions and memory stays bounded. Texts rejected as duplicates are not
+recorded, and counting stops as soon as the cluster limit is reached, so a
+flood of copies of one prompt costs a handful of comparisons per submission
+instead of growing the cluster that every later copy has to scan. Each band
+bucket is capped as well: a text that lands in a full bucket is still indexed
+under its other bands, and with max_distance 6 any near duplicate shares at
+least two bands with it.
+"""
+
+import re
+import time
+from collections import deque
+from itertools import count
+from typing import Deque, Dict, Optional, Set, Tuple
+
+from app.config import settings
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+_BANDS = 8
+_BAND_BITS = 64 // _BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+
+# SimHash needs, for each of the 64 bits, how many shingle hashes have it set.
+# Instead of looping over bits, each byte of a hash is "spread" into eight
+# 16-bit counter fields of one big int; adding spread values sums all 64
+# counters at once in C.
+_FIELD_BITS = 16
+_SPREAD = [
+    [
+        sum(((byte >> bit) & 1) << ((8 * byte_index + bit) * _FIELD_BITS) for bit in range(8))
+        for byte in range(256)
+    ]
+    for byte_index in range(8)
+]
+_FIELD_MASK = (1 << _FIELD_BITS) - 1
+
+
+def _normalize(text: str) -> str:
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+
+def simhash(text: str, shingle_size: int = 3) -> int:
+    """
+    Compute a 64-bit SimHash over character shingles
+
+    Uses Python's built-in string hash, so values are only comparable within
+    one process (which is all the in-memory index needs).
+    """
+    normalized = _normalize(text)
+    if len(normalized) < shingle_size:
+        shingles = [normalized]
+    else:
+        shingles = {
+            normalized[i : i + shingle_size]
+            for i in range(len(normalized) - shingle_size + 1)
+        }
+
+    totals = 0
+    for shingle in shingles:
+        h = hash(shingle)
+        for table in _SPREAD:
+            totals += table[h & 0xFF]
+            h >>= 8
+
+    threshold = len(shingles) / 2
+    result = 0
+    for bit in range(64):
+        if (totals >> (bit * _FIELD_BITS)) & _FIELD_MASK > threshold:
+            result |= 1 << bit
+    return result
+
+
+class NearDuplicateIndex:
+    """Time-windowed SimHash index of recent texts"""
+
+    def __init__(
+        self,
+        window_seconds: float = 900.0,
+        max_distance: int = 6,
+        max_cluster: int = 5,
+        max_entries: int = 100_000,
+        max_bucket_size: int = 1024,
+    ):
+        """
+        Args:
+            window_seconds: How long a text counts towards duplicates
+            max_distance: Maximum Hamming distance for a near duplicate
+                (at most _BANDS - 1 for the band index to be exact)
+            max_cluster: Near-identical texts accepted per window; texts
+                beyond it are rejected and not recorded
+            max_entries: Hard cap on indexed texts
+            max_bucket_size: Hard cap on texts per band bucket
+        """
+        self.window_seconds = window_seconds
+        self.max_distance = min(max_distance, _BANDS - 1)
+        self.max_cluster = max_cluster
+        self.max_entries = max_entries
+        self.max_bucket_size = max_bucket_size
+
+        self._ids = count()
+        self.entries: Dict[int, int] = {}  # entry id -> simhash
+        self.expiry: Deque[Tuple[float, int]] = deque()  # (added_at, entry id)
+        self.bands: Dict[Tuple[int, int], Set[int]] = {}
+
+    @staticmethod
+    def _band_keys(value: int):
+        for band in range(_BANDS):
+            yield band, (value >> (band * _BAND_BITS)) & _BAND_MASK
+
+    def _expire(self, now: float) -> None:
+        cutoff = now - self.window_seconds
+        expiry = self.expiry
+        while expiry and (expiry[0][0] < cutoff or len(expiry) > self.max_entries):
+            _, entry_id = expiry.popleft()
+            value = self.entries.pop(entry_id)
+            for key in self._band_keys(value):
+                bucket = self.bands.get(key)
+                if bucket is None:
+                    continue
+                bucket.discard(entry_id)  # Absent if the bucket was full
+                if not bucket:
+                    del self.bands[key]
+
+    def count_similar(self, value: int, limit: Optional[int] = None) -> int:
+        """
+        Count indexed texts within max_distance of a SimHash
+
+        Args:
+            value: SimHash to look up
+            limit: Stop counting once this many are found
+
+        Returns:
+            Number of near duplicates found (at most limit)
+        """
+        entries = self.entries
+        seen: Set[int] = set()
+        found = 0
+        for key in self._band_keys(value):
+            bucket = self.bands.get(key)
+            if not bucket:
+                continue
+            for entry_id in bucket:
+                if entry_id in seen:
+                    continue
+                seen.add(entry_id)
+                if (entries[entry_id] ^ value).bit_count() <= self.max_distance:
+                    found += 1
+                    if found == limit:
+                        return found
+        return found
+
+    def add(self, text: str, now: Optional[float] = None) -> int:
+        """
+        Record a text and return the size of its near-duplicate cluster
+
+        A text whose cluster is over max_cluster is not recorded.
+
+        Args:
+            text: Submitted text
+            now: Monotonic timestamp (defaults to now)
+
+        Returns:
+            Number of recent near-identical texts, including this one, capped
+            at max_cluster + 1
+        """
+        now = time.monotonic() if now is None else now
+        self._expire(now)
+
+        value = simhash(text)
+        cluster_size = self.count_similar(value, limit=self.max_cluster) + 1
+        if cluster_size > self.max_cluster:
+            return cluster_size
+
+        entry_id = next(self._ids)
+        self.entries[entry_id] = value
+        self.expiry.append((now, entry_id))
+        for key in self._band_keys(value):
+            bucket = self.bands.setdefault(key, set())
+            if len(bucket) < self.max_bucket_size:
+                bucket.add(entry_id)
+
+        return cluster_size
+
+
+# Singleton instance
+_prompt_index: Optional[NearDuplicateIndex] = None
+
+
+def get_prompt_index() -> NearDuplicateIndex:
+    """Get or create the NearDuplicateIndex for generation prompts"""
+    global _prompt_index
+    if _prompt_index is None:
+        _prompt_index = NearDuplicateIndex(
+            window_seconds=settings.duplicate_window_minutes * 60.0,
+            max_distance=settings.duplicate_max_distance,
+            max_cluster=settings.duplicate_max_cluster,
+        )
+    return _prompt_index
@@ -1,11 +1,15 @@
 """Storage service using Supabase Storage"""
 
+import logging
+import threading
 from typing import Optional
 from app.services.supabase_storage import (
     SupabaseStorageService,
     get_supabase_storage_service,
 )
 
+logger = logging.getLogger(__name__)
+
 
 class StorageService:
     """
@@ -14,7 +18,7 @@ class StorageService:
     """
 
     def __init__(self):
-        print("✓ Using Supabase Storage")
+        logger.info("Using Supabase Storage")
         self.supabase_storage = get_supabase_storage_service()
 
     async def upload_image(
@@ -35,6 +39,32 @@ class StorageService:
         """
         return await self.supabase_storage.upload_image(image_bytes, filename)
 
+    async def upload_object(
+        self,
+        path: str,
+        data: bytes,
+        content_type: str,
+        cache_control_seconds: int = 60,
+    ) -> str:
+        """
+        Upload (or overwrite) an arbitrary object at a stable path
+
+        Args:
+            path: Object path inside the bucket
+            data: Object contents
+            content_type: MIME type served with the object
+            cache_control_seconds: max-age for browsers and the CDN
+
+        Returns:
+            Public URL of the object
+
+        Raises:
+            RuntimeError: If upload fails
+        """
+        return await self.supabase_storage.upload_object(
+            path, data, content_type, cache_control_seconds
+        )
+
     async def delete_image(self, filename: str) -> bool:
         """
         Delete image from Supabase Storage
@@ -65,11 +95,14 @@ class StorageService:
 
 # Singleton instance
 _storage_service: Optional[StorageService] = None
+_storage_service_lock = threading.Lock()
 
 
 def get_storage_service() -> StorageService:
     """Get or create the StorageService singleton instance"""
     global _storage_service
     if _storage_service is None:
-        _storage_service = StorageService()
+        with _storage_service_lock:
+            if _storage_service is None:
+                _storage_service = StorageService()
     return _storage_service
@@ -1,15 +1,19 @@
 """Supabase Storage service for image uploads"""
 
+import asyncio
+import threading
 import uuid
-from typing import Optional
-from supabase import Client
+from typing import TYPE_CHECKING, Optional
 from app.config import settings
 
+if TYPE_CHECKING:
+    from supabase import Client
+
 
 class SupabaseStorageService:
     """Service for uploading and managing images in Supabase Storage"""
 
-    def __init__(self, supabase_client: Client):
+    def __init__(self, supabase_client: "Client"):
         self.client = supabase_client
         self.bucket_name = "fatherhood-images"
 
@@ -42,8 +46,9 @@ class SupabaseStorageService:
             if not filename.endswith(".png"):
                 filename = f"{filename}.png"
 
-            # Upload to Supabase Storage
-            response = self.client.storage.from_(self.bucket_name).upload(
+            # Upload to Supabase Storage (blocking client: run in a worker thread)
+            await asyncio.to_thread(
+                self.client.storage.from_(self.bucket_name).upload,
                 path=filename,
                 file=image_bytes,
                 file_options={
@@ -61,6 +66,44 @@ class SupabaseStorageService:
         except Exception as e:
             raise RuntimeError(f"Failed to upload image to Supabase: {str(e)}") from e
 
+    async def upload_object(
+        self,
+        path: str,
+        data: bytes,
+        content_type: str,
+        cache_control_seconds: int = 60,
+    ) -> str:
+        """
+        Upload (or overwrite) an arbitrary object at a stable path
+
+        Args:
+            path: Object path inside the bucket, e.g. "feed/newest-1.json.gz"
+            data: Object contents
+            content_type: MIME type served with the object
+            cache_control_seconds: max-age for browsers and the CDN
+
+        Returns:
+            Public URL of the object
+
+        Raises:
+            RuntimeError: If upload fails
+        """
+        try:
+            await asyncio.to_thread(
+                self.client.storage.from_(self.bucket_name).upload,
+                path=path,
+                file=data,
+                file_options={
+                    "content-type": content_type,
+                    "cache-control": str(cache_control_seconds),
+                    "upsert": "true",  # Same URL, new contents
+                },
+            )
+            return f"{self.public_url_base}/{path}"
+
+        except Exception as e:
+            raise RuntimeError(f"Failed to upload object to Supabase: {str(e)}") from e
+
     async def delete_image(self, filename: str) -> bool:
         """
         Delete image from Supabase Storage
@@ -95,6 +138,7 @@ class SupabaseStorageService:
 
 # Singleton instance
 _supabase_storage_service: Optional[SupabaseStorageService] = None
+_supabase_storage_service_lock = threading.Lock()
 
 
 def get_supabase_storage_service() -> SupabaseStorageService:
@@ -104,5 +148,7 @@ def get_supabase_storage_service() -> SupabaseStorageService:
         from app.services.db import get_supabase_client
 
         supabase_client = get_supabase_client()
-        _supabase_storage_service = SupabaseStorageService(supabase_client)
+        with _supabase_storage_service_lock:
+            if _supabase_storage_service is None:
+                _supabase_storage_service = SupabaseStorageService(supabase_client)
     return _supabase_storage_service
@@ -1,6 +1,7 @@
 """Utility functions"""
 
 from .validators import (
+    clean_post_input,
     validate_post_text,
     validate_author_name,
     sanitize_text,
@@ -8,6 +9,7 @@ from .validators import (
 )
 
 __all__ = [
+    "clean_post_input",
     "validate_post_text",
     "validate_author_name",
     "sanitize_text",
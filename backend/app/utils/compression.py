@@ -0,0 +1,158 @@
+"""Response compression helpers
+
+gzip is always available; brotli is used when the optional ``brotli`` package
+is installed (pip install 'fatherhood-is-backend[brotli]') and the client
+prefers it. Bodies smaller than COMPRESSION_MIN_SIZE are sent as is: the
+savings would not pay for the work. Bodies of COMPRESSION_OFFLOAD_SIZE or more
+are compressed in a worker thread so the event loop keeps serving.
+
+Cached JSON responses keep their compressed variants in the feed cache next to
+the plain body (key + "|gzip", key + "|br"), so a popular page is compressed
+once per cache lifetime instead of once per request. Those variants are
+compressed harder than per-request responses, since the cost is paid once.
+"""
+
+import asyncio
+import gzip
+from typing import Optional
+
+from fastapi import Response
+
+from app.config import settings
+
+try:
+    import brotli
+except ImportError:  # Optional dependency
+    brotli = None
+
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+# Per-request responses favor speed, cached variants favor size
+GZIP_LEVEL, CACHED_GZIP_LEVEL = 6, 9
+BROTLI_QUALITY, CACHED_BROTLI_QUALITY = 4, 9
+
+COMPRESSIBLE_TYPES = (
+    b"application/json",
+    b"application/x-ndjson",
+    b"application/javascript",
+    b"image/svg+xml",
+    b"text/",
+)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick the encoding to use for a request's Accept-Encoding header
+
+    Args:
+        accept_encoding: Header value, e.g. "gzip, deflate, br;q=0.9"
+
+    Returns:
+        "br", "gzip", or None when the client accepts neither
+    """
+    weights = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.partition(";")
+        name = name.strip()
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            weights[name] = q
+
+    wildcard = weights.get("*", 0.0)
+    best, best_q = None, 0.0
+    for encoding in ENCODINGS:  # In order of preference, so ties go to br
+        q = weights.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str, cached: bool = False) -> bytes:
+    """Compress a body with "br" or "gzip" (blocking)"""
+    if encoding == "br":
+        return brotli.compress(
+            body, quality=CACHED_BROTLI_QUALITY if cached else BROTLI_QUALITY
+        )
+    return gzip.compress(
+        body, compresslevel=CACHED_GZIP_LEVEL if cached else GZIP_LEVEL, mtime=0
+    )
+
+
+async def compress_async(body: bytes, encoding: str, cached: bool = False) -> bytes:
+    """Compress a body, in a worker thread if it is large"""
+    if len(body) >= settings.compression_offload_size:
+        return await asyncio.to_thread(compress, body, encoding, cached)
+    return compress(body, encoding, cached)
+
+
+async def json_response(
+    body: bytes,
+    accept_encoding: str,
+    cache=None,
+    cache_key: Optional[str] = None,
+    generation: int = 0,
+) -> Response:
+    """
+    Build a JSON response, compressed if the client accepts it
+
+    Args:
+        body: Encoded JSON body
+        accept_encoding: The request's Accept-Encoding header
+        cache: SharedResponseCache to store the compressed variant in
+        cache_key: Cache key of the plain body
+        generation: Cache generation the body was computed at
+
+    Returns:
+        Response, with Content-Encoding set when compressed
+    """
+    encoding = (
+        negotiate_encoding(accept_encoding)
+        if len(body) >= settings.compression_min_size
+        else None
+    )
+    if encoding is None:
+        return Response(body, media_type="application/json")
+
+    compressed = await compress_async(body, encoding, cached=cache is not None)
+    if cache is not None:
+        cache.put(f"{cache_key}|{encoding}", compressed, generation)
+    return _encoded_response(compressed, encoding)
+
+
+async def cached_json_response(
+    cache, cache_key: str, accept_encoding: str
+) -> Optional[Response]:
+    """
+    Serve a JSON response from the cache, preferring a compressed variant
+
+    A compressed variant missing for a cached body is built and stored, so
+    later requests get it straight from the cache.
+
+    Returns:
+        Response, or None on a cache miss
+    """
+    generation = cache.generation
+    encoding = negotiate_encoding(accept_encoding)
+    if encoding is not None:
+        compressed = cache.get(f"{cache_key}|{encoding}")
+        if compressed is not None:
+            return _encoded_response(compressed, encoding)
+
+    body = cache.get(cache_key)
+    if body is None:
+        return None
+    return await json_response(body, accept_encoding, cache, cache_key, generation)
+
+
+def _encoded_response(body: bytes, encoding: str) -> Response:
+    return Response(
+        body,
+        media_type="application/json",
+        headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"},
+    )
@@ -0,0 +1,45 @@
+"""Opaque keyset pagination cursors"""
+
+import base64
+import binascii
+from typing import Any, List
+
+import orjson
+
+
+def encode_cursor(*parts: Any) -> str:
+    """
+    Encode keyset values into an opaque, URL-safe cursor
+
+    Args:
+        parts: JSON-serializable key values, e.g. (updated_at, id)
+
+    Returns:
+        Cursor string
+    """
+    return base64.urlsafe_b64encode(orjson.dumps(parts)).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """
+    Decode a cursor produced by encode_cursor
+
+    Args:
+        cursor: Cursor string
+        size: Expected number of key values
+
+    Returns:
+        List of key values
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        parts = orjson.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+    if not isinstance(parts, list) or len(parts) != size:
+        raise ValueError("Invalid cursor")
+    return parts
@@ -0,0 +1,118 @@
+"""Structured, non-blocking logging with per-request context
+
+Loggers hand records to a QueueHandler; a QueueListener thread formats them
+and writes to stdout, so request handlers never block on terminal or pipe
+I/O. Every record carries the current request id, and any ``extra`` fields
+passed to the logger are emitted as top-level JSON keys.
+"""
+
+import atexit
+import logging
+import queue
+import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import List, Optional, Tuple
+
+import orjson
+
+# Id of the request being handled ("-" outside of a request)
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+# (stage, seconds) timings collected for the Server-Timing header; None
+# outside of a request
+server_timings_var: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar(
+    "server_timings", default=None
+)
+
+# Attributes every LogRecord has; anything else came from ``extra``
+_RESERVED_ATTRS = frozenset(
+    vars(logging.LogRecord("", 0, "", 0, "", None, None))
+) | {"message", "asctime", "request_id"}
+
+_listener: Optional[QueueListener] = None
+
+
+def record_timing(name: str, seconds: float) -> None:
+    """Add a stage timing to the current request's Server-Timing header"""
+    timings = server_timings_var.get()
+    if timings is not None:
+        timings.append((name, seconds))
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return orjson.dumps(entry, default=str).decode()
+
+
+class _ContextQueueHandler(QueueHandler):
+    """QueueHandler that captures the request id in the logging thread"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Context vars are not visible from the listener thread, and args or
+        # exc_info may not survive being handed to it, so resolve them here.
+        # Formatting itself is left to the listener.
+        record.request_id = request_id_var.get()
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configure_logging(level: str = "INFO", fmt: str = "json") -> None:
+    """
+    Route all logging through a background queue listener
+
+    Safe to call more than once; only the first call takes effect.
+
+    Args:
+        level: Root log level name (e.g. "INFO", "DEBUG")
+        fmt: "json" for one JSON object per line, "text" for human-readable lines
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    if fmt == "text":
+        stream_handler.setFormatter(
+            logging.Formatter("%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s")
+        )
+    else:
+        stream_handler.setFormatter(JsonFormatter())
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.handlers = [_ContextQueueHandler(log_queue)]
+    root.setLevel(level.upper())
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
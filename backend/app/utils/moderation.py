@@ -0,0 +1,186 @@
+"""Blocked-term matching for content moderation
+
+Terms are compiled into an Aho-Corasick automaton, so a text is scanned once
+regardless of how many terms there are. Matches only count on word
+boundaries ("shatter" does not match "hate"); a term ending in `*` also
+matches as a word prefix ("hate*" matches "hated"). Benign words caught by a
+prefix term are listed as exceptions, starting with `!` ("!drugstore", or
+"!slurp*" for every word starting with "slurp").
+
+The term list lives in a text file and is reloaded when the file changes.
+"""
+
+import logging
+import os
+import time
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TERMS_PATH = os.path.join(os.path.dirname(__file__), "blocked_words.txt")
+
+
+class TermMatcher:
+    """Word-boundary-aware multi-pattern matcher (Aho-Corasick)"""
+
+    def __init__(self, terms: Iterable[str]):
+        """
+        Args:
+            terms: Blocked terms, with exceptions prefixed by `!`
+        """
+        # State 0 is the root. goto[state] maps a character to the next state;
+        # output[state] lists (term, length, is_prefix) ending at that state.
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[Tuple[str, int, bool]]] = [[]]
+        self.size = 0
+        self.exceptions: Set[str] = set()
+        self.exception_prefixes: Tuple[str, ...] = ()
+
+        for raw in terms:
+            term = raw.strip().lower()
+            if term.startswith("!"):
+                self._add_exception(term[1:].strip())
+                continue
+            is_prefix = term.endswith("*")
+            term = term.rstrip("*").strip()
+            if term:
+                self._add(term, is_prefix)
+        self._build_failure_links()
+
+    def _add(self, term: str, is_prefix: bool) -> None:
+        state = 0
+        for ch in term:
+            next_state = self.goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][ch] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            state = next_state
+        self.output[state].append((term, len(term), is_prefix))
+        self.size += 1
+
+    def _add_exception(self, word: str) -> None:
+        if word.endswith("*"):
+            self.exception_prefixes += (word.rstrip("*"),)
+        elif word:
+            self.exceptions.add(word)
+
+    def _is_exception(self, text: str, start: int) -> bool:
+        """Whether the word starting at start is listed as an exception"""
+        end = start
+        while end < len(text) and text[end].isalnum():
+            end += 1
+        word = text[start:end]
+        return word in self.exceptions or word.startswith(self.exception_prefixes)
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(ch, 0)
+                self.fail[next_state] = target if target != next_state else 0
+                self.output[next_state] = (
+                    self.output[next_state] + self.output[self.fail[next_state]]
+                )
+
+    def find(self, text: str) -> Optional[str]:
+        """
+        Find the first blocked term in a text
+
+        Args:
+            text: Text to scan (case-insensitive)
+
+        Returns:
+            The matched term, or None
+        """
+        text = text.lower()
+        end = len(text)
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+
+            for term, length, is_prefix in output[state]:
+                start = i - length + 1
+                if start > 0 and text[start - 1].isalnum():
+                    continue
+                if i + 1 < end and text[i + 1].isalnum():
+                    if not is_prefix or self._is_exception(text, start):
+                        continue
+                return term
+
+        return None
+
+
+def load_terms(path: str) -> List[str]:
+    """Read terms and `!` exceptions from a file: one per line, `#` starts a comment"""
+    with open(path, encoding="utf-8") as f:
+        return [
+            line.split("#", 1)[0].strip()
+            for line in f
+            if line.split("#", 1)[0].strip()
+        ]
+
+
+class BlockedTerms:
+    """TermMatcher backed by a file that is reloaded when it changes"""
+
+    def __init__(self, path: str = DEFAULT_TERMS_PATH, check_interval: float = 5.0):
+        """
+        Args:
+            path: Terms file
+            check_interval: Minimum seconds between file modification checks
+        """
+        self.path = path
+        self.check_interval = check_interval
+        self._matcher = TermMatcher(())
+        self._mtime: Optional[float] = None
+        self._next_check = 0.0
+
+    @property
+    def matcher(self) -> TermMatcher:
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.check_interval
+            self._reload_if_changed()
+        return self._matcher
+
+    def find(self, text: str) -> Optional[str]:
+        return self.matcher.find(text)
+
+    def _reload_if_changed(self) -> None:
+        try:
+            mtime = os.stat(self.path).st_mtime
+            if mtime == self._mtime:
+                return
+            self._matcher = TermMatcher(load_terms(self.path))
+            self._mtime = mtime
+        except OSError as e:
+            # Keep the last good list rather than disabling moderation
+            logger.warning("Failed to load blocked terms from %s: %s", self.path, e)
+
+
+# Singleton instance
+_blocked_terms: Optional[BlockedTerms] = None
+
+
+def get_blocked_terms() -> BlockedTerms:
+    """Get or create the BlockedTerms singleton instance"""
+    global _blocked_terms
+    if _blocked_terms is None:
+        from app.config import settings
+
+        _blocked_terms = BlockedTerms(settings.blocked_terms_path or DEFAULT_TERMS_PATH)
+    return _blocked_terms
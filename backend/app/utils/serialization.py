@@ -0,0 +1,167 @@
+"""Fast serialization helpers for list endpoints
+
+The regular path builds a validated Pydantic object per row and lets FastAPI
+validate the list again against ``response_model`` before encoding it with
+the stdlib json encoder. Rows coming back from our own database are already
+well-formed, so the fast path maps them straight to plain dicts with the same
+keys as the response models and encodes them with orjson.
+
+The same path serves sparse fieldsets (``fields=``) and compact payloads
+(``compact=true``), which the full response models cannot describe.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+
+from app.models import CommentResponse, PostResponse
+
+# Field names in the same order Pydantic serializes them, so both paths
+# produce the same schema
+POST_FIELDS = tuple(PostResponse.model_fields)
+COMMENT_FIELDS = tuple(CommentResponse.model_fields)
+
+# Comment fields that come from the joined `users` table
+COMMENT_USER_FIELDS = ("username", "display_name", "avatar_url")
+
+_POST_DEFAULTS = {
+    name: field.default
+    for name, field in PostResponse.model_fields.items()
+    if not field.is_required()
+}
+
+_COMMENT_DEFAULTS = {
+    name: field.default
+    for name, field in CommentResponse.model_fields.items()
+    if not field.is_required()
+}
+_COMMENT_DEFAULTS["username"] = "Anonymous"
+
+# PostgREST returns timestamps as "2024-01-15T10:30:00.12345+00:00"; the
+# response models serialize them as "2024-01-15T10:30:00.123450Z"
+TIMESTAMP_FIELDS = frozenset(("created_at", "updated_at"))
+_DATETIME = TypeAdapter(datetime)
+
+
+def json_timestamp(value: Any) -> Any:
+    """Format a database timestamp exactly as the response models serialize it"""
+    if value is None:
+        return None
+    return _DATETIME.dump_python(_DATETIME.validate_python(value), mode="json")
+
+
+def parse_fields(fields: Optional[str], allowed: Tuple[str, ...]) -> Tuple[str, ...]:
+    """
+    Parse a comma-separated `fields` query parameter
+
+    Args:
+        fields: Raw parameter value, e.g. "id,image_url,text"
+        allowed: Fields the resource exposes, in serialization order
+
+    Returns:
+        Requested fields in serialization order (all fields if not provided)
+
+    Raises:
+        ValueError: If an unknown field is requested
+    """
+    if not fields:
+        return allowed
+
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested.difference(allowed)
+    if unknown:
+        raise ValueError(
+            f"Unknown fields: {', '.join(sorted(unknown))}. "
+            f"Allowed: {', '.join(allowed)}"
+        )
+
+    return tuple(name for name in allowed if name in requested)
+
+
+def post_projection(fields: Tuple[str, ...]) -> str:
+    """Build the `posts` select clause for the requested fields"""
+    return ",".join(fields)
+
+
+def comment_projection(fields: Tuple[str, ...]) -> str:
+    """Build the `comments` select clause, joining `users` only when needed"""
+    columns = [name for name in fields if name not in COMMENT_USER_FIELDS]
+    user_columns = [name for name in fields if name in COMMENT_USER_FIELDS]
+    if user_columns:
+        columns.append(f"users({','.join(user_columns)})")
+    return ",".join(columns)
+
+
+def post_row_to_dict(
+    post: Dict[str, Any],
+    fields: Tuple[str, ...] = POST_FIELDS,
+    compact: bool = False,
+) -> Dict[str, Any]:
+    """
+    Map a trusted `posts` row to a PostResponse-shaped dict
+
+    Args:
+        post: Row as returned by Supabase
+        fields: Fields to include
+        compact: Drop fields whose value is None
+
+    Returns:
+        Dict with the requested PostResponse fields
+    """
+    result = {}
+    for name in fields:
+        value = post.get(name, _POST_DEFAULTS.get(name))
+        if compact and value is None:
+            continue
+        if name in TIMESTAMP_FIELDS:
+            value = json_timestamp(value)
+        result[name] = value
+    return result
+
+
+def comment_row_to_dict(
+    comment: Dict[str, Any],
+    fields: Tuple[str, ...] = COMMENT_FIELDS,
+    compact: bool = False,
+) -> Dict[str, Any]:
+    """
+    Map a trusted `comments` row (with joined `users`) to a CommentResponse-shaped dict
+
+    Args:
+        comment: Row as returned by Supabase
+        fields: Fields to include
+        compact: Drop fields whose value is None
+
+    Returns:
+        Dict with the requested CommentResponse fields
+    """
+    user_data = comment.get("users", {}) or {}
+    result = {}
+    for name in fields:
+        source = user_data if name in COMMENT_USER_FIELDS else comment
+        value = source.get(name, _COMMENT_DEFAULTS.get(name))
+        if compact and value is None:
+            continue
+        if name in TIMESTAMP_FIELDS:
+            value = json_timestamp(value)
+        result[name] = value
+    return result
+
+
+def fast_list_response(
+    key: str, items: List[Dict[str, Any]], pagination: Dict[str, int]
+) -> ORJSONResponse:
+    """
+    Build an orjson-encoded list response, bypassing response_model validation
+
+    Args:
+        key: Name of the list field ("posts" or "comments")
+        items: Already serialized rows
+        pagination: Pagination metadata
+
+    Returns:
+        ORJSONResponse with the same shape as the *ListResponse models
+    """
+    return ORJSONResponse({key: items, "pagination": pagination})
@@ -3,73 +3,95 @@
 import re
 from typing import Optional, Tuple
 
+from app.utils.moderation import get_blocked_terms
 
-# List of blocked words for content moderation
-BLOCKED_WORDS = [
-    "hate",
-    "kill",
-    "death",
-    "violence",
-    "abuse",
-    "racist",
-    "sexist",
-    "drug",
-    "weapon",
-    "terror",
-    "nazi",
-    "slur",
-    # Add more as needed
-]
+# Compiled once at import; these run on every post
+SPAM_PATTERN = re.compile(r"(.)\1{4,}")  # 5+ of the same character in a row
+EXCESSIVE_WHITESPACE_PATTERN = re.compile(r"\s{5,}")
+ALPHANUMERIC_PATTERN = re.compile(r"[a-zA-Z0-9]")
+AUTHOR_NAME_PATTERN = re.compile(r"^[a-zA-Z\u00C0-\u024F\s'-]+$")
+WHITESPACE_PATTERN = re.compile(r"\s+")
 
 
-def validate_post_text(text: str) -> Tuple[bool, Optional[str]]:
+def clean_post_input(
+    text: str, author_name: Optional[str] = None
+) -> Tuple[str, Optional[str]]:
     """
-    Validate post text according to business rules
+    Validate and sanitize post text and author name in a single pass
 
-    Rules:
+    Text rules:
     - Length: 3-280 characters
-    - No blocked words
-    - No spam patterns (4+ consecutive repeated characters)
+    - No blocked terms (see app/utils/blocked_words.txt)
+    - No spam patterns (5+ consecutive repeated characters)
+    - No runs of 5+ whitespace characters
     - Must contain some alphanumeric content
 
+    Author name rules (optional field, blank is treated as not provided):
+    - Length: up to 100 characters
+    - Only letters, spaces, hyphens, apostrophes
+
     Args:
         text: User input text
+        author_name: Optional author name
 
     Returns:
-        Tuple of (is_valid, error_message)
+        Tuple of (clean_text, clean_author_name)
+
+    Raises:
+        ValueError: With a user-facing message if validation fails
     """
     if not text or not isinstance(text, str):
-        return False, "Text is required"
+        raise ValueError("Text is required")
 
-    # Trim whitespace
     trimmed = text.strip()
 
-    # Check minimum length
     if len(trimmed) < 3:
-        return False, "Text is too short (minimum 3 characters)"
+        raise ValueError("Text is too short (minimum 3 characters)")
 
-    # Check maximum length
     if len(trimmed) > 280:
-        return False, "Text is too long (maximum 280 characters)"
+        raise ValueError("Text is too long (maximum 280 characters)")
+
+    if get_blocked_terms().find(trimmed):
+        raise ValueError("Text contains inappropriate content")
+
+    if SPAM_PATTERN.search(trimmed):
+        raise ValueError("Text appears to be spam (too many repeated characters)")
+
+    if EXCESSIVE_WHITESPACE_PATTERN.search(trimmed):
+        raise ValueError("Text contains excessive whitespace")
+
+    if not ALPHANUMERIC_PATTERN.search(trimmed):
+        raise ValueError("Text must contain at least some letters or numbers")
 
-    # Check for blocked words
-    text_lower = trimmed.lower()
-    for word in BLOCKED_WORDS:
-        if word in text_lower:
-            return False, "Text contains inappropriate content"
+    clean_text = WHITESPACE_PATTERN.sub(" ", trimmed)
 
-    # Check for spam patterns (4+ repeated characters)
-    if re.search(r"(.)\1{4,}", trimmed):
-        return False, "Text appears to be spam (too many repeated characters)"
+    clean_author = None
+    if author_name:
+        trimmed_author = author_name.strip()
+        if trimmed_author:
+            if len(trimmed_author) > 100:
+                raise ValueError("Author name is too long (maximum 100 characters)")
+            if not AUTHOR_NAME_PATTERN.match(trimmed_author):
+                raise ValueError("Author name contains invalid characters")
+            clean_author = WHITESPACE_PATTERN.sub(" ", trimmed_author)
 
-    # Check for excessive whitespace
-    if re.search(r"\s{5,}", trimmed):
-        return False, "Text contains excessive whitespace"
+    return clean_text, clean_author
 
-    # Must contain at least some alphanumeric characters
-    if not re.search(r"[a-zA-Z0-9]", trimmed):
-        return False, "Text must contain at least some letters or numbers"
 
+def validate_post_text(text: str) -> Tuple[bool, Optional[str]]:
+    """
+    Validate post text according to business rules (see clean_post_input)
+
+    Args:
+        text: User input text
+
+    Returns:
+        Tuple of (is_valid, error_message)
+    """
+    try:
+        clean_post_input(text)
+    except ValueError as e:
+        return False, str(e)
     return True, None
 
 
@@ -103,7 +125,7 @@ def validate_author_name(name: Optional[str]) -> Tuple[bool, Optional[str]]:
         return False, "Author name is too long (maximum 100 characters)"
 
     # Allow only letters, spaces, hyphens, apostrophes, unicode letters
-    if not re.match(r"^[a-zA-Z\u00C0-\u024F\s'-]+$", trimmed):
+    if not AUTHOR_NAME_PATTERN.match(trimmed):
         return False, "Author name contains invalid characters"
 
     return True, None
@@ -120,7 +142,7 @@ def sanitize_text(text: str) -> str:
         Sanitized text
     """
     # Trim and replace multiple spaces with single space
-    return re.sub(r"\s+", " ", text.strip())
+    return WHITESPACE_PATTERN.sub(" ", text.strip())
 
 
 def sanitize_author_name(name: Optional[str]) -> Optional[str]:
@@ -136,5 +158,5 @@ def sanitize_author_name(name: Optional[str]) -> Optional[str]:
     if not name:
         return None
 
-    sanitized = re.sub(r"\s+", " ", name.strip())
+    sanitized = WHITESPACE_PATTERN.sub(" ", name.strip())
     return sanitized if sanitized else None
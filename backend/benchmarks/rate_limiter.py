@@ -0,0 +1,66 @@
+"""Benchmark: rate limiter memory and latency at 1M distinct client IPs
+
+Records one hit for each of N distinct IPs in the in-process store, then
+reports per-hit latency, memory per tracked IP, and the time to evict them
+all once idle.
+
+Usage:
+    python -m benchmarks.rate_limiter [--ips 1000000]
+"""
+
+import argparse
+import ipaddress
+import os
+import sys
+import time
+
+for name in ("SUPABASE_URL", "SUPABASE_KEY", "SUPABASE_ANON_KEY", "DATABASE_URL", "GOOGLE_API_KEY"):
+    os.environ.setdefault(name, "http://benchmark")
+
+from app.middleware import limiter_stores  # noqa: E402
+from app.middleware.limiter_stores import MemoryLimiterStore  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ips", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    base = int(ipaddress.IPv4Address("10.0.0.0"))
+    ips = [str(ipaddress.IPv4Address(base + i)) for i in range(args.ips)]
+    store = MemoryLimiterStore(window_seconds=3600.0)
+
+    started = time.perf_counter()
+    for ip in ips:
+        store.hit_sync(ip, 1, 1000)
+    elapsed = time.perf_counter() - started
+    # Hash table plus the packed int per key (key strings come from requests)
+    memory = sys.getsizeof(store.state) + sum(
+        sys.getsizeof(state) for state in store.state.values()
+    )
+
+    # Second pass: keys already tracked
+    started = time.perf_counter()
+    for ip in ips:
+        store.hit_sync(ip, 1, 1000)
+    repeat_elapsed = time.perf_counter() - started
+
+    # Jump two windows ahead so every key is idle
+    real_monotonic = limiter_stores.time.monotonic
+    limiter_stores.time.monotonic = lambda: real_monotonic() + 2 * store.window_seconds
+    try:
+        started = time.perf_counter()
+        evicted = store.evict_idle()
+        evict_elapsed = time.perf_counter() - started
+    finally:
+        limiter_stores.time.monotonic = real_monotonic
+
+    print(f"{args.ips:,} distinct IPs")
+    print(f"  first hit:    {elapsed / args.ips * 1e9:7.0f} ns per hit")
+    print(f"  repeat hit:   {repeat_elapsed / args.ips * 1e9:7.0f} ns per hit")
+    print(f"  memory:       {memory / args.ips:7.0f} bytes per IP (table and state, excluding key strings)")
+    print(f"  evict idle:   {evict_elapsed * 1000:7.0f} ms for {evicted:,} keys")
+
+
+if __name__ == "__main__":
+    main()
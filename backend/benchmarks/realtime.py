@@ -0,0 +1,85 @@
+"""Benchmark: realtime fan-out cost by connection count
+
+Connects N in-process subscribers to one topic (each draining its queue like
+an SSE stream does), publishes events, and reports the time to publish, the
+time until every subscriber received the event, and memory per subscriber.
+
+Usage:
+    python -m benchmarks.realtime [--connections 100,1000,10000] [--events 50]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+import tracemalloc
+
+for name in ("SUPABASE_URL", "SUPABASE_KEY", "SUPABASE_ANON_KEY", "DATABASE_URL", "GOOGLE_API_KEY"):
+    os.environ.setdefault(name, "http://benchmark")
+
+from app.services.broadcaster import POSTS_TOPIC, Broadcaster  # noqa: E402
+
+EVENT = {
+    "type": "post",
+    "data": {"id": "0b8f2a4e-5c1d-4e8a-9f6b-2d3c4e5f6a7b", "text": "benchmark"},
+}
+
+
+async def run(connections: int, events: int) -> None:
+    broadcaster = Broadcaster(queue_size=64, max_subscribers=connections)
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    subscriptions = [broadcaster.subscribe(POSTS_TOPIC) for _ in range(connections)]
+    received = 0
+    all_received = asyncio.Event()
+
+    async def consume(subscription):
+        nonlocal received
+        while True:
+            await subscription.queue.get()
+            received += 1
+            if received == connections:
+                all_received.set()
+
+    consumers = [asyncio.create_task(consume(s)) for s in subscriptions]
+    await asyncio.sleep(0)
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    publish_times, delivery_times = [], []
+    for _ in range(events):
+        received = 0
+        all_received.clear()
+        started = time.perf_counter()
+        broadcaster.publish(POSTS_TOPIC, EVENT)
+        publish_times.append(time.perf_counter() - started)
+        await all_received.wait()
+        delivery_times.append(time.perf_counter() - started)
+
+    for task in consumers:
+        task.cancel()
+    await asyncio.gather(*consumers, return_exceptions=True)
+
+    publish_times.sort()
+    delivery_times.sort()
+    print(
+        f"{connections:>7} connections: "
+        f"publish p50 {publish_times[len(publish_times) // 2] * 1000:7.2f} ms, "
+        f"delivered to all p50 {delivery_times[len(delivery_times) // 2] * 1000:7.2f} ms, "
+        f"{(after - before) / connections / 1024:5.1f} KiB per connection"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--connections", default="100,1000,10000")
+    parser.add_argument("--events", type=int, default=50)
+    args = parser.parse_args()
+
+    for connections in (int(n) for n in args.connections.split(",")):
+        asyncio.run(run(connections, args.events))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Benchmark: related posts index build time and query latency
+
+Fills an index in a temporary directory with synthetic post texts, then times
+related() for random indexed posts and for unindexed texts. The query cost is
+one pass over the whole matrix, so it grows linearly with --posts and --dims;
+at 100k posts and 128 dimensions it should stay within a few milliseconds.
+
+Usage:
+    python -m benchmarks.related_index [--posts 100000] [--dims 128]
+        [--queries 200] [--k 12]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+
+for name in ("SUPABASE_URL", "SUPABASE_KEY", "SUPABASE_ANON_KEY", "DATABASE_URL", "GOOGLE_API_KEY"):
+    os.environ.setdefault(name, "http://benchmark")
+
+from app.services.related_index import RelatedPostsIndex  # noqa: E402
+
+WORDS = (
+    "teaching my kid to ride a bike first day of school fishing trip camping "
+    "bedtime story diaper change baseball practice homework help pancakes "
+    "breakfast rainy weekend lego tower science fair road trip tooth fairy "
+    "swimming lesson birthday party treehouse garden snowman bath time"
+).split()
+
+
+def make_text(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 30)))
+
+
+def summarize(samples: list) -> str:
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return (
+        f"p50 {statistics.median(samples) * 1000:7.2f} ms  "
+        f"p95 {p95 * 1000:7.2f} ms  max {samples[-1] * 1000:7.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=100_000)
+    parser.add_argument("--dims", type=int, default=128)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=12)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    posts = [(str(uuid.uuid4()), make_text(rng)) for _ in range(args.posts)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        index = RelatedPostsIndex(directory, args.dims)
+        started = time.perf_counter()
+        for start in range(0, len(posts), 1000):
+            index.add_many(posts[start:start + 1000])
+        build = time.perf_counter() - started
+        print(
+            f"build    {args.posts} posts x {args.dims} dims in {build:.2f} s "
+            f"({args.posts / build:,.0f} posts/s)"
+        )
+
+        started = time.perf_counter()
+        reopened = RelatedPostsIndex(directory, args.dims)
+        reopened.related(posts[0][0], args.k)
+        print(f"reopen   {(time.perf_counter() - started) * 1000:.2f} ms (map + first query)")
+
+        indexed, unindexed = [], []
+        for _ in range(args.queries):
+            post_id, _ = rng.choice(posts)
+            started = time.perf_counter()
+            index.related(post_id, args.k)
+            indexed.append(time.perf_counter() - started)
+
+            text = make_text(rng)
+            started = time.perf_counter()
+            index.related(str(uuid.uuid4()), args.k, text)
+            unindexed.append(time.perf_counter() - started)
+
+        print(f"indexed   {summarize(indexed)}")
+        print(f"by text   {summarize(unindexed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Benchmark: search_posts() latency for the first and deeper pages
+
+Calls the search function from migration 005 directly on the database (no
+HTTP, no cache) and walks the (rank, id) keyset pages of each query, so the
+numbers are what a cache miss costs. Needs a database with the migration
+applied and some posts; DATABASE_URL (or --dsn) points at it.
+
+Usage:
+    python -m benchmarks.search [--queries "fishing,first steps"] [--limit 20]
+        [--pages 10] [--repeat 20] [--explain]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import asyncpg
+
+SEARCH = """
+    SELECT id, rank FROM search_posts($1, $2, $3, $4)
+"""
+
+
+def summarize(samples: list) -> str:
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return (
+        f"p50 {statistics.median(samples) * 1000:7.2f} ms  "
+        f"p95 {p95 * 1000:7.2f} ms  max {samples[-1] * 1000:7.2f} ms"
+    )
+
+
+async def walk(connection, query: str, limit: int, pages: int) -> list:
+    """Time each page of one query; returns per-page durations"""
+    durations, after_rank, after_id = [], None, None
+    for _ in range(pages):
+        started = time.perf_counter()
+        rows = await connection.fetch(SEARCH, query, after_rank, after_id, limit)
+        durations.append(time.perf_counter() - started)
+        if len(rows) < limit:
+            break
+        after_rank, after_id = rows[-1]["rank"], rows[-1]["id"]
+    return durations
+
+
+async def run(args) -> None:
+    connection = await asyncpg.connect(args.dsn)
+    try:
+        for query in args.queries.split(","):
+            query = query.strip()
+            total = await connection.fetchval(
+                "SELECT count(*) FROM search_posts($1, NULL, NULL, 100000)", query
+            )
+            first, deeper = [], []
+            for _ in range(args.repeat):
+                durations = await walk(connection, query, args.limit, args.pages)
+                first.append(durations[0])
+                deeper.extend(durations[1:])
+
+            print(f"{query!r}: {total} matches")
+            print(f"  first page   {summarize(first)}")
+            if deeper:
+                print(f"  later pages  {summarize(deeper)}")
+
+            if args.explain:
+                plan = await connection.fetch(
+                    "EXPLAIN (ANALYZE, BUFFERS) "
+                    "SELECT * FROM search_posts($1, NULL, NULL, $2)",
+                    query,
+                    args.limit,
+                )
+                for row in plan:
+                    print(f"    {row[0]}")
+    finally:
+        await connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dsn", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--queries", default="fishing,first steps,bedtime -story")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--explain", action="store_true", help="Print the first page's plan")
+    args = parser.parse_args()
+    if not args.dsn:
+        parser.error("DATABASE_URL is not set (or pass --dsn)")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
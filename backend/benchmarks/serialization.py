@@ -0,0 +1,65 @@
+"""Micro-benchmark: Pydantic vs orjson fast path for a page of posts
+
+Usage:
+    python -m benchmarks.serialization [--rows 50] [--repeat 2000]
+"""
+
+import argparse
+import os
+import timeit
+import uuid
+
+for name in ("SUPABASE_URL", "SUPABASE_KEY", "SUPABASE_ANON_KEY", "DATABASE_URL", "GOOGLE_API_KEY"):
+    os.environ.setdefault(name, "http://benchmark")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from app.models import PaginationInfo, PostResponse, PostsListResponse  # noqa: E402
+from app.utils.serialization import fast_list_response, post_row_to_dict  # noqa: E402
+
+
+def make_rows(count: int) -> list:
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "text": f"teaching my kid number {i} to ride a bike",
+            "image_url": f"https://example.supabase.co/storage/v1/object/public/fatherhood-images/{uuid.uuid4()}.png",
+            "author_name": "Dad" if i % 2 else None,
+            "likes_count": i,
+            "comments_count": i // 3,
+            "created_at": "2024-01-15T10:30:00.12345+00:00",
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    pagination = {"page": 1, "limit": args.rows, "total": args.rows, "pages": 1}
+
+    def pydantic_path():
+        # What FastAPI does for response_model: build, validate, encode
+        response = PostsListResponse(
+            posts=[PostResponse(**row) for row in rows],
+            pagination=PaginationInfo(**pagination),
+        )
+        return JSONResponse(jsonable_encoder(response)).body
+
+    def fast_path():
+        return fast_list_response(
+            "posts", [post_row_to_dict(row) for row in rows], pagination
+        ).body
+
+    for name, fn in (("pydantic", pydantic_path), ("fast", fast_path)):
+        seconds = min(timeit.repeat(fn, number=args.repeat, repeat=3)) / args.repeat
+        print(f"{name:>8}: {seconds * 1e6:8.1f} us per page of {args.rows}")
+
+
+if __name__ == "__main__":
+    main()
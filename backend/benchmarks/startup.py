@@ -0,0 +1,114 @@
+"""Benchmark: import time of app.main and time to first response
+
+Import time is measured in fresh interpreters (this one would have everything
+cached), optionally with the slowest modules from -X importtime. Time to first
+response starts a real server (uvicorn, as in production) and polls
+GET /health/live until it answers, so it includes the import, the lifespan
+(client construction) and the first request through the middleware stack.
+Dependencies don't need to be reachable: unreachable ones only make
+/health/ready report 503.
+
+Usage:
+    python -m benchmarks.startup [--runs 5] [--top 10] [--no-server]
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+for name in ("SUPABASE_URL", "SUPABASE_KEY", "SUPABASE_ANON_KEY", "DATABASE_URL", "GOOGLE_API_KEY"):
+    os.environ.setdefault(name, "http://benchmark")
+
+IMPORT_SNIPPET = (
+    "import time; started = time.perf_counter(); import app.main; "
+    "print(time.perf_counter() - started)"
+)
+
+
+def import_time() -> float:
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET], capture_output=True, text=True, check=True
+    )
+    return float(result.stdout)
+
+
+def slowest_imports(top: int) -> list:
+    """(cumulative µs, module) of the slowest modules app.main imports directly"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    children = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        # Nesting is shown by indentation: app.main's own imports have 3 spaces
+        if cumulative.strip().isdigit() and len(module) - len(module.lstrip()) == 3:
+            children.append((int(cumulative), module.strip()))
+    return sorted(children, reverse=True)[:top]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_first_response(timeout: float = 60.0) -> float:
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(timeout=1.0) as client:
+            while time.perf_counter() - started < timeout:
+                if server.poll() is not None:
+                    raise RuntimeError(f"Server exited with status {server.returncode}")
+                try:
+                    if client.get(f"http://127.0.0.1:{port}/health/live").status_code == 200:
+                        return time.perf_counter() - started
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.005)
+        raise RuntimeError(f"No response within {timeout:.0f}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def report(label: str, samples: list) -> None:
+    print(
+        f"{label:<24} median {statistics.median(samples) * 1000:7.1f} ms  "
+        f"min {min(samples) * 1000:7.1f} ms  ({len(samples)} runs)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=0, help="Show the N slowest imports")
+    parser.add_argument("--no-server", action="store_true", help="Only measure import time")
+    args = parser.parse_args()
+
+    report("import app.main", [import_time() for _ in range(args.runs)])
+    if args.top:
+        for cumulative, module in slowest_imports(args.top):
+            print(f"    {cumulative / 1000:7.1f} ms  {module}")
+    if not args.no_server:
+        report("time to first response", [time_to_first_response() for _ in range(args.runs)])
+
+
+if __name__ == "__main__":
+    main()
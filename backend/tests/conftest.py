@@ -0,0 +1,21 @@
+"""Shared test setup
+
+Settings are read from the environment, so give the required ones dummy
+values before any app module is imported. Nothing here talks to Supabase or
+Gemini; tests that need the database patch in a fake client.
+"""
+
+import os
+
+for name, value in {
+    "SUPABASE_URL": "http://supabase.test",
+    "SUPABASE_KEY": "test-key",
+    "SUPABASE_ANON_KEY": "test-anon-key",
+    "DATABASE_URL": "postgresql://test",
+    "GOOGLE_API_KEY": "test-google-key",
+    "LOG_FORMAT": "text",
+    "FEED_CACHE_TTL": "0",
+    "FEED_SNAPSHOT_PAGES": "0",
+    "API_BUDGET_PER_HOUR": "100000",  # Tests make many requests from one IP
+}.items():
+    os.environ.setdefault(name, value)
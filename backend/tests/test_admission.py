@@ -0,0 +1,139 @@
+"""Admission control: fair queueing, queue caps, timeouts and cancellation"""
+
+import asyncio
+
+import pytest
+
+from app.services.admission import AdmissionController, AdmissionRejectedError
+
+
+async def settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def hold(controller: AdmissionController, client: str, log: list, release: asyncio.Event):
+    async def run():
+        async with controller.slot(client):
+            log.append(client)
+            await release.wait()
+
+    return asyncio.create_task(run())
+
+
+async def test_waiting_clients_are_served_round_robin():
+    controller = AdmissionController(
+        max_in_flight=1, max_in_flight_per_client=1, max_queued_per_client=3
+    )
+    log, gates = [], []
+    tasks = []
+    for client in ("a", "a", "a", "b", "b", "c"):
+        gates.append(asyncio.Event())
+        tasks.append(hold(controller, client, log, gates[-1]))
+        await settle()
+
+    for gate in gates:
+        gate.set()
+        await settle()
+    await asyncio.gather(*tasks)
+
+    # "a" got the free slot first, but the others don't wait for its backlog
+    assert log == ["a", "b", "c", "a", "b", "a"]
+    assert controller.in_flight_total == 0 and not controller.waiting
+
+
+async def test_client_over_its_queue_cap_gets_429():
+    controller = AdmissionController(max_in_flight=1, max_queued_per_client=1)
+    release = asyncio.Event()
+    tasks = [hold(controller, "a", [], release) for _ in range(2)]
+    await settle()
+
+    with pytest.raises(AdmissionRejectedError) as exc_info:
+        await controller.acquire("a")
+    assert exc_info.value.status_code == 429
+    assert exc_info.value.retry_after > 0
+
+    # Other clients can still queue
+    tasks.append(hold(controller, "b", [], release))
+    await settle()
+    assert controller.queued_total == 2
+
+    release.set()
+    await asyncio.gather(*tasks)
+
+
+async def test_full_global_queue_gets_503():
+    controller = AdmissionController(max_in_flight=1, max_queued=2)
+    release = asyncio.Event()
+    tasks = [hold(controller, client, [], release) for client in ("a", "b", "c")]
+    await settle()
+
+    with pytest.raises(AdmissionRejectedError) as exc_info:
+        await controller.acquire("d")
+    assert exc_info.value.status_code == 503
+
+    release.set()
+    await asyncio.gather(*tasks)
+
+
+async def test_queue_wait_timeout_gets_503_and_leaves_the_queue():
+    controller = AdmissionController(max_in_flight=1, max_queue_wait=0.05)
+    release = asyncio.Event()
+    holder = hold(controller, "a", [], release)
+    await settle()
+
+    with pytest.raises(AdmissionRejectedError) as exc_info:
+        await controller.acquire("b")
+    assert exc_info.value.status_code == 503
+    assert controller.queued_total == 0 and not controller.waiting
+
+    release.set()
+    await holder
+    assert controller.in_flight_total == 0
+
+
+async def test_cancelled_waiter_leaves_the_queue():
+    controller = AdmissionController(max_in_flight=1)
+    release = asyncio.Event()
+    log = []
+    holder = hold(controller, "a", log, release)
+    waiter = hold(controller, "b", log, release)
+    await settle()
+
+    waiter.cancel()
+    await settle()
+    assert controller.queued_total == 0 and not controller.waiting
+
+    release.set()
+    await holder
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert log == ["a"]
+    assert controller.in_flight_total == 0 and not controller.in_flight
+
+
+async def test_slot_granted_to_a_cancelled_waiter_is_released():
+    controller = AdmissionController(max_in_flight=1)
+    release = asyncio.Event()
+    log = []
+
+    async def first():
+        async with controller.slot("a"):
+            log.append("a")
+            await release.wait()
+        # The slot was just handed to "b", which hasn't run yet
+        waiter.cancel()
+
+    holder = asyncio.create_task(first())
+    await settle()
+    waiter = hold(controller, "b", log, asyncio.Event())
+    later = hold(controller, "c", log, release)
+    await settle()
+
+    release.set()
+    await asyncio.gather(holder, later)
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    assert log == ["a", "c"]
+    assert controller.in_flight_total == 0 and not controller.in_flight
@@ -0,0 +1,207 @@
+"""Bulk generation: journal, resume after a crash, failed inserts and pacing"""
+
+import time
+
+import pytest
+
+from app.cli import bulk_generate
+from app.cli.bulk_generate import (
+    FAILED,
+    GENERATED,
+    INSERTED,
+    BulkGenerator,
+    Journal,
+    RateBudget,
+    read_rows,
+)
+
+
+class FakeTable:
+    def __init__(self, client):
+        self.client = client
+
+    def upsert(self, records, on_conflict, ignore_duplicates):
+        assert (on_conflict, ignore_duplicates) == ("id", True)
+        self.records = records
+        return self
+
+    def execute(self):
+        if self.client.failures:
+            self.client.failures -= 1
+            raise ConnectionError("database unavailable")
+        for record in self.records:
+            self.client.posts.setdefault(record["id"], record)
+        self.client.upserts += 1
+
+
+class FakeClient:
+    def __init__(self, failures: int = 0):
+        self.posts = {}
+        self.upserts = 0
+        self.failures = failures
+
+    def table(self, name):
+        assert name == "posts"
+        return FakeTable(self)
+
+
+class FakeGenerator:
+    def __init__(self):
+        self.calls = []
+
+    async def generate_fatherhood_image(self, text):
+        self.calls.append(text)
+        return b"png"
+
+
+class FakeStorage:
+    async def upload_image(self, image_bytes):
+        return "https://bucket/image.png"
+
+
+@pytest.fixture
+def services(monkeypatch):
+    client, generator = FakeClient(), FakeGenerator()
+    monkeypatch.setattr(bulk_generate, "get_supabase_client", lambda: client)
+    monkeypatch.setattr(bulk_generate, "get_image_generator", lambda: generator)
+    monkeypatch.setattr(bulk_generate, "get_storage_service", lambda: FakeStorage())
+    monkeypatch.setattr(bulk_generate, "get_feed_cache", lambda: None)
+    return client, generator
+
+
+def make_rows(count: int) -> list:
+    return [
+        {"key": f"row-{i}", "text": f"teaching my kid lesson {i}", "author_name": None}
+        for i in range(count)
+    ]
+
+
+def test_row_keys_are_stable_and_number_repeated_phrases(tmp_path):
+    path = tmp_path / "phrases.csv"
+    path.write_text("text,author_name\nfirst bike ride,Dad\nfirst bike ride,Dad\nfishing,\n")
+
+    rows = read_rows(str(path))
+    path.write_text("text,author_name\nfishing,\nfirst bike ride,Dad\nfirst bike ride,Dad\n")
+    reordered = read_rows(str(path))
+
+    assert len({row["key"] for row in rows}) == 3
+    assert {row["key"] for row in rows} == {row["key"] for row in reordered}
+    assert rows[2]["author_name"] is None
+
+
+def test_journal_keeps_the_last_entry_and_skips_a_torn_line(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = Journal(path)
+    journal.record("a", FAILED, error="timeout")
+    journal.record("a", INSERTED, post_id="p")
+    journal.close()
+    with open(path, "ab") as f:
+        f.write(b'{"key": "b", "sta')
+
+    reloaded = Journal(path)
+
+    assert reloaded.status("a") == INSERTED
+    assert reloaded.status("b") is None
+    reloaded.close()
+
+
+async def test_run_inserts_in_batches_under_journaled_ids(tmp_path, services):
+    client, generator = services
+    journal = Journal(str(tmp_path / "journal.jsonl"))
+
+    progress = await BulkGenerator(journal, 2, 0, 2, 0).run(make_rows(5))
+
+    assert progress.inserted == 5 and len(generator.calls) == 5
+    assert client.upserts == 3
+    for i in range(5):
+        entry = journal.entries[f"row-{i}"]
+        assert entry["status"] == INSERTED
+        assert client.posts[entry["post_id"]]["text"] == f"teaching my kid lesson {i}"
+
+
+async def test_resume_inserts_generated_rows_without_regenerating(tmp_path, services):
+    client, generator = services
+    path = str(tmp_path / "journal.jsonl")
+    journal = Journal(path)
+    journal.record("row-0", INSERTED, post_id="existing")
+    journal.record(
+        "row-1", GENERATED, text="t", author_name=None, image_url="u", post_id="chosen"
+    )
+    # Journaled before post ids were chosen up front
+    journal.record("row-2", GENERATED, text="t", author_name=None, image_url="u")
+    journal.close()
+
+    journal = Journal(path)
+    await BulkGenerator(journal, 1, 0, 10, 0).run(make_rows(4))
+
+    assert generator.calls == ["teaching my kid lesson 3"]
+    assert journal.entries["row-1"]["post_id"] == "chosen"
+    assert set(client.posts) == {
+        journal.entries[f"row-{i}"]["post_id"] for i in (1, 2, 3)
+    }
+
+
+async def test_crash_after_insert_does_not_duplicate_posts(tmp_path, services):
+    client, _ = services
+    path = str(tmp_path / "journal.jsonl")
+    journal = Journal(path)
+    bulk = BulkGenerator(journal, 1, 0, 10, 0)
+    await bulk.run(make_rows(2))
+    journal.close()
+    # Drop the "inserted" entries, as if the process died right after the insert
+    with open(path, "rb") as f:
+        lines = f.readlines()
+    with open(path, "wb") as f:
+        f.writelines(line for line in lines if b'"inserted"' not in line)
+
+    journal = Journal(path)
+    await BulkGenerator(journal, 1, 0, 10, 0).run(make_rows(2))
+
+    assert len(client.posts) == 2
+    assert client.upserts == 2
+    assert all(journal.status(f"row-{i}") == INSERTED for i in range(2))
+
+
+async def test_failed_batch_is_retried_by_the_next_flush(tmp_path, services):
+    client, _ = services
+    client.failures = 1
+    journal = Journal(str(tmp_path / "journal.jsonl"))
+
+    progress = await BulkGenerator(journal, 1, 0, 2, 0).run(make_rows(3))
+
+    assert progress.inserted == 3
+    assert len(client.posts) == 3
+    assert all(journal.status(f"row-{i}") == INSERTED for i in range(3))
+
+
+async def test_failed_final_flush_leaves_rows_for_the_next_run(tmp_path, services):
+    client, _ = services
+    client.failures = 1
+    journal = Journal(str(tmp_path / "journal.jsonl"))
+
+    progress = await BulkGenerator(journal, 1, 0, 10, 0).run(make_rows(2))
+
+    assert progress.inserted == 0 and not client.posts
+    assert all(journal.status(f"row-{i}") == GENERATED for i in range(2))
+
+
+async def test_rate_budget_spaces_out_starts():
+    budget = RateBudget(per_minute=600)  # One every 0.1 s
+    started = time.monotonic()
+    starts = []
+    for _ in range(4):
+        await budget.acquire()
+        starts.append(time.monotonic() - started)
+
+    assert starts[0] < 0.05
+    assert starts[-1] >= 0.29
+    assert all(b - a >= 0.09 for a, b in zip(starts, starts[1:]))
+
+
+async def test_unlimited_rate_budget_never_waits():
+    budget = RateBudget(per_minute=0)
+    started = time.monotonic()
+    for _ in range(100):
+        await budget.acquire()
+
+    assert time.monotonic() - started < 0.05
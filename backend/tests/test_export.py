@@ -0,0 +1,68 @@
+"""Table export: keyset pagination for full and incremental dumps"""
+
+from datetime import datetime, timezone
+
+from app.services.export import iter_table_rows
+
+
+class FakeQuery:
+    """Records the PostgREST builder calls of each query; serves scripted pages"""
+
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+        client.queries.append(self.calls)
+
+    def __getattr__(self, name):
+        def method(*args):
+            self.calls.append((name, *args))
+            return self
+
+        return method
+
+    def execute(self):
+        return type("Result", (), {"data": self.client.pages.pop(0)})()
+
+
+class FakeClient:
+    def __init__(self, *pages):
+        self.pages = list(pages)
+        self.queries = []
+
+    def table(self, name):
+        return FakeQuery(self)
+
+
+def rows(*keys):
+    return [{"id": post_id, "updated_at": updated_at} for updated_at, post_id in keys]
+
+
+def test_full_export_pages_by_id():
+    client = FakeClient(rows(("t1", "a"), ("t0", "b")), rows(("t2", "c")))
+
+    batches = list(iter_table_rows(client, "posts", batch_size=2))
+
+    assert [len(batch) for batch in batches] == [2, 1]
+    assert client.queries[0] == [("select", "*"), ("order", "id"), ("limit", 2)]
+    assert client.queries[1][1] == ("gt", "id", "b")
+
+
+def test_incremental_export_pages_by_updated_at_and_id():
+    since = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    client = FakeClient(
+        rows(("2025-01-02T00:00:00+00:00", "b"), ("2025-01-03T00:00:00+00:00", "a")),
+        rows(("2025-01-03T00:00:00+00:00", "c")),
+    )
+
+    batches = list(iter_table_rows(client, "comments", since=since, batch_size=2))
+
+    assert [len(batch) for batch in batches] == [2, 1]
+    first, second = client.queries
+    assert first[1] == ("gte", "updated_at", since.isoformat())
+    assert first[2:] == [("order", "updated_at"), ("order", "id"), ("limit", 2)]
+    # Ties on updated_at continue after the last id instead of being skipped
+    assert second[1] == (
+        "or_",
+        'updated_at.gt."2025-01-03T00:00:00+00:00",'
+        'and(updated_at.eq."2025-01-03T00:00:00+00:00",id.gt.a)',
+    )
@@ -0,0 +1,105 @@
+"""Idempotency-Key handling: replays, conflicts and a full store"""
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException, Request, Response
+
+from app.api.posts import _run_idempotent
+from app.services import idempotency
+
+
+@pytest.fixture(autouse=True)
+def store(monkeypatch):
+    store = idempotency.IdempotencyStore()
+    monkeypatch.setattr(idempotency, "_idempotency_store", store)
+    return store
+
+
+def make_request(client_ip: str, key: str) -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "POST",
+            "path": "/api/posts",
+            "headers": [(b"idempotency-key", key.encode())],
+            "client": (client_ip, 12345),
+        }
+    )
+
+
+def counter():
+    calls = []
+
+    async def operation():
+        calls.append(1)
+        return len(calls)
+
+    return calls, operation
+
+
+async def test_retry_from_same_client_is_replayed():
+    calls, operation = counter()
+    response = Response()
+    first = await _run_idempotent(
+        make_request("10.0.0.1", "abc"), Response(), "save", ("x",), operation
+    )
+    second = await _run_idempotent(
+        make_request("10.0.0.1", "abc"), response, "save", ("x",), operation
+    )
+    assert (first, second) == (1, 1)
+    assert response.headers["Idempotent-Replayed"] == "true"
+    assert len(calls) == 1
+
+
+async def test_retry_from_another_address_is_replayed():
+    calls, operation = counter()
+    await _run_idempotent(
+        make_request("10.0.0.1", "abc"), Response(), "save", ("x",), operation
+    )
+    # E.g. a phone that switched from wifi to cellular
+    second = await _run_idempotent(
+        make_request("10.0.0.2", "abc"), Response(), "save", ("x",), operation
+    )
+    assert second == 1
+    assert len(calls) == 1
+
+
+async def test_full_store_evicts_completed_entries_only(store):
+    store.max_entries = 2
+    release = asyncio.Event()
+
+    async def pending():
+        await release.wait()
+        return "pending"
+
+    async def done():
+        return "done"
+
+    in_flight = asyncio.create_task(store.run("a", "f", pending))
+    await asyncio.sleep(0)
+    await store.run("b", "f", done)
+    await store.run("c", "f", done)  # Evicts "b", not the older "a"
+    assert list(store.entries) == ["a", "c"]
+
+    store.max_entries = 1
+    with pytest.raises(HTTPException) as exc_info:
+        await _run_idempotent(
+            make_request("10.0.0.1", "d"), Response(), "save", ("x",), done
+        )
+    assert exc_info.value.status_code == 503
+
+    release.set()
+    assert await in_flight == ("pending", False)
+
+
+async def test_key_reused_with_other_payload_conflicts():
+    _, operation = counter()
+    await _run_idempotent(
+        make_request("10.0.0.1", "abc"), Response(), "save", ("x",), operation
+    )
+    with pytest.raises(HTTPException) as exc_info:
+        await _run_idempotent(
+            make_request("10.0.0.2", "abc"), Response(), "save", ("y",), operation
+        )
+    assert exc_info.value.status_code == 422
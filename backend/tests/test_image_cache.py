@@ -0,0 +1,111 @@
+"""Image cache: eviction order, grace period, and files evicted mid-request"""
+
+import os
+import time
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from app.api.images import _get_cached_file
+from app.services import image_cache
+from app.services.image_cache import ImageCache
+
+
+def png(width: int = 64, height: int = 32) -> bytes:
+    buffer = BytesIO()
+    Image.new("RGB", (width, height), "orange").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ImageCache(str(tmp_path), max_bytes=10**6, upstream_base="http://bucket", widths=[16])
+    cache.fetches = []
+
+    async def fetch(name):
+        cache.fetches.append(name)
+        return png()
+
+    cache._fetch = fetch
+    return cache
+
+
+def age(path: str, seconds: float) -> None:
+    stat = os.stat(path)
+    os.utime(path, ns=(time.time_ns() - int(seconds * 1e9), stat.st_mtime_ns))
+
+
+def test_evicts_least_recently_used_files_outside_the_grace_period(tmp_path):
+    cache = ImageCache(str(tmp_path), max_bytes=100, upstream_base="http://bucket", widths=[])
+    for name, seconds in (("old.png", 3600), ("older.png", 7200), ("recent.png", 1)):
+        path = tmp_path / name
+        path.write_bytes(b"x" * 100)
+        age(str(path), seconds)
+
+    assert cache.evict() == 2
+    # Still over budget, but the recently used file is kept
+    assert sorted(os.listdir(tmp_path)) == ["recent.png"]
+
+
+async def test_resize_refetches_an_original_evicted_meanwhile(cache, monkeypatch):
+    resize = image_cache._resize
+    calls = []
+
+    def evicting_resize(source, width):
+        calls.append(source)
+        if len(calls) == 1:
+            os.unlink(source)  # Another worker evicts it before we open it
+        return resize(source, width)
+
+    monkeypatch.setattr(image_cache, "_resize", evicting_resize)
+
+    path, stat = await cache.get("a.png", 16)
+
+    assert path.endswith("a@16.png")
+    assert stat.st_size == os.stat(path).st_size
+    assert cache.fetches == ["a.png", "a.png"]
+    with Image.open(path) as image:
+        assert image.width == 16
+
+
+async def test_route_refetches_a_file_evicted_after_get(cache):
+    first, _ = await cache.get("a.png")
+    get = cache.get
+
+    async def get_then_evict(name, width=None):
+        result = await get(name, width)
+        if len(cache.fetches) == 1:
+            os.unlink(result[0])
+        return result
+
+    cache.get = get_then_evict
+
+    path, stat = await _get_cached_file(cache, "a.png", None)
+
+    assert path == first and os.path.exists(path)
+    assert stat.st_size == os.stat(path).st_size
+    assert cache.fetches == ["a.png", "a.png"]
+
+
+async def test_only_cache_misses_are_charged_to_the_rate_limit(cache, monkeypatch):
+    from app.middleware import rate_limit_middleware
+    from app.middleware.rate_limit_middleware import is_image_cache_miss
+
+    monkeypatch.setattr(image_cache, "get_image_cache", lambda: cache)
+    await cache.get("a.png", 16)
+    await cache.get("b.png")
+
+    def scope(path, query=b""):
+        return {"type": "http", "method": "GET", "path": path, "query_string": query}
+
+    assert not is_image_cache_miss(scope("/img/a.png", b"w=10"))
+    assert not is_image_cache_miss(scope("/img/a.png"))
+    assert is_image_cache_miss(scope("/img/b.png", b"w=10"))  # Needs a resize
+    assert is_image_cache_miss(scope("/img/c.png"))
+    # Rejected by the route before any fetch
+    assert not is_image_cache_miss(scope("/img/../secret"))
+    assert not is_image_cache_miss(scope("/img/a.png", b"w=0"))
+
+    entry = next(e for e in rate_limit_middleware.ROUTE_COSTS if e.pattern.match("/img/a.png"))
+    assert entry.charges and entry.when is is_image_cache_miss
@@ -0,0 +1,69 @@
+"""Load shedding: what is spared under overload"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.middleware import load_shedding
+from app.middleware.load_shedding import LoadSheddingMiddleware, feed_cache_key
+from app.services.feed_cache import SharedResponseCache, post_key, posts_page_key
+from app.utils.serialization import POST_FIELDS
+
+POST_ID = "123e4567-e89b-12d3-a456-426614174000"
+
+
+class Overloaded:
+    lag = 1.0
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = SharedResponseCache(str(tmp_path / "cache"), slots=8, slot_size=4096)
+    monkeypatch.setattr(load_shedding, "get_feed_cache", lambda: cache)
+    return cache
+
+
+@pytest.fixture
+def client(cache):
+    app = FastAPI()
+
+    @app.get("/{path:path}")
+    async def ok():
+        return {}
+
+    return TestClient(LoadSheddingMiddleware(app, monitor=Overloaded(), max_lag_ms=250))
+
+
+def test_feed_reads_are_shed_on_a_cache_miss(client):
+    assert client.get("/api/posts").status_code == 503
+    assert client.get(f"/api/posts/{POST_ID}").status_code == 503
+    assert client.get("/api/posts/search?q=fishing").status_code == 503
+
+
+def test_feed_reads_are_served_on_a_cache_hit(client, cache):
+    cache.put(posts_page_key("popular", 2, 20, POST_FIELDS, False), b"{}", cache.generation)
+    cache.put(post_key(POST_ID), b"{}", cache.generation)
+
+    assert client.get("/api/posts?sort=popular&page=2").status_code == 200
+    assert client.get(f"/api/posts/{POST_ID}").status_code == 200
+    assert client.get("/api/posts?sort=popular&page=3").status_code == 503
+
+    cache.invalidate()
+    assert client.get(f"/api/posts/{POST_ID}").status_code == 503
+
+
+def test_health_checks_are_never_shed(client):
+    assert client.get("/health/live").status_code == 200
+
+
+def test_feed_cache_key_matches_the_handler():
+    assert feed_cache_key("/api/posts", b"") == posts_page_key(
+        "newest", 1, 20, POST_FIELDS, False
+    )
+    assert feed_cache_key(
+        "/api/posts", b"fields=id,text&compact=true&limit=5"
+    ) == posts_page_key("newest", 1, 5, ("text", "id"), True)
+    assert feed_cache_key("/api/posts", b"fields=nope") is None
+    assert feed_cache_key("/api/posts", b"page=x") is None
+    assert feed_cache_key("/api/posts/search", b"q=x") is None
+    assert feed_cache_key(f"/api/posts/{POST_ID}", b"") == post_key(POST_ID)
@@ -0,0 +1,84 @@
+"""Middleware stack: requests answered before routing are labelled and counted"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.middleware.rate_limiter import general_api_limiter
+from app.services.metrics import http_request_duration
+
+
+@pytest.fixture
+def client():
+    # Not entered as a context manager: the lifespan (database, background
+    # tasks) isn't needed for requests that never reach a handler
+    return TestClient(app)
+
+
+def test_rate_limited_request_is_recorded(client, monkeypatch):
+    monkeypatch.setattr(general_api_limiter, "max_requests", 0)
+    before = http_request_duration.series.get(("GET", "unmatched", "429"))
+    before_count = before.count if before is not None else 0
+
+    response = client.get("/api/posts")
+
+    assert response.status_code == 429
+    assert http_request_duration.series[("GET", "unmatched", "429")].count == before_count + 1
+
+
+def test_top_level_route_is_labelled_with_its_template(client):
+    response = client.get("/health/live")
+
+    assert response.status_code == 200
+    assert ("GET", "/health/live", "200") in http_request_duration.series
+
+
+@pytest.fixture
+def traced_client(monkeypatch):
+    from app.api import posts
+    from app.middleware.slow_request_tracing import SlowRequestTracingMiddleware
+    from app.services.profiler import SlowRequestTracer
+
+    pagination = {"page": 1, "limit": 20, "total": 0, "pages": 0}
+    monkeypatch.setattr(posts, "get_supabase_client", lambda: None)
+    monkeypatch.setattr(posts, "query_posts_page", lambda *args: ([], pagination))
+
+    # What main.py installs when PROFILE_SLOW_ROUTES is set
+    tracer = SlowRequestTracer(["/api/posts", "/api/posts/{post_id}"], threshold_ms=0)
+    return TestClient(SlowRequestTracingMiddleware(app, tracer)), tracer
+
+
+def test_traced_route_is_served(traced_client):
+    client, tracer = traced_client
+
+    response = client.get("/api/posts")
+
+    assert response.status_code == 200
+    assert [trace["route"] for trace in tracer.recent()] == ["GET /api/posts"]
+
+
+def test_trace_is_dropped_when_another_route_matches(traced_client):
+    client, tracer = traced_client
+
+    # Matches /api/posts/{post_id} as a pattern, but routes to search
+    client.get("/api/posts/search")
+
+    assert tracer.recent() == []
+
+
+def test_metrics_require_the_admin_key(client, monkeypatch):
+    monkeypatch.setattr(settings, "admin_api_key", "secret")
+
+    assert client.get("/metrics").status_code == 401
+    response = client.get("/metrics", headers={"X-Admin-Key": "secret"})
+    assert response.status_code == 200
+    assert "http_request_duration_seconds" in response.text
+
+
+def test_non_ascii_admin_key_is_rejected_not_an_error(client, monkeypatch):
+    monkeypatch.setattr(settings, "admin_api_key", "secret")
+
+    response = client.get("/metrics", headers={"X-Admin-Key": "sécret".encode()})
+
+    assert response.status_code == 401
@@ -0,0 +1,86 @@
+"""Blocked-term moderation: word boundaries, prefix terms, exceptions, reload"""
+
+import os
+
+import pytest
+
+from app.utils import clean_post_input
+from app.utils.moderation import BlockedTerms, TermMatcher
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "I hated my dad",
+        "he hates me",
+        "a serial killer dad",
+        "I was abused as a kid",
+        "deaths in the family",
+        "racists everywhere",
+        "druggie dad",
+        "violently happy",
+        "nazis",
+    ],
+)
+def test_inflected_terms_are_blocked(text):
+    with pytest.raises(ValueError, match="inappropriate"):
+        clean_post_input(text)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Picking up diapers at the drugstore",
+        "Drugstores at midnight with a newborn",
+        "The vase didn't shatter when he dropped it",
+        "Teaching him a new skill",
+        "Slurping noodles together",
+        "Whatever he needs",
+    ],
+)
+def test_benign_words_pass(text):
+    assert clean_post_input(text)[0] == text
+
+
+@pytest.mark.parametrize(
+    "text", ["HATE this", "Hate.", "(kill)", "no-drug zone", "death,taxes", "'slur'"]
+)
+def test_case_and_punctuation_are_boundaries(text):
+    with pytest.raises(ValueError, match="inappropriate"):
+        clean_post_input(text)
+
+
+def test_exceptions_only_cover_their_own_words():
+    matcher = TermMatcher(["drug*", "!drugstore"])
+    assert matcher.find("drugstore") is None
+    assert matcher.find("drugstores") == "drug"  # Exact exception, not a prefix
+    assert matcher.find("drugs") == "drug"
+
+    matcher = TermMatcher(["slur*", "!slurp*"])
+    assert matcher.find("slurpee") is None
+    assert matcher.find("slurred") == "slur"
+
+
+def test_term_file_is_reloaded_when_it_changes(tmp_path):
+    path = tmp_path / "terms.txt"
+    path.write_text("hate*\n")
+    terms = BlockedTerms(str(path), check_interval=0)
+    assert terms.find("so hated") == "hate"
+    assert terms.find("grumpy") is None
+
+    path.write_text("# comment\ngrump*  # inline comment\n")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert terms.find("grumpy") == "grump"
+    assert terms.find("so hated") is None
+
+
+def test_unreadable_term_file_keeps_the_last_list(tmp_path):
+    path = tmp_path / "terms.txt"
+    path.write_text("hate*\n")
+    terms = BlockedTerms(str(path), check_interval=0)
+    assert terms.find("hated") == "hate"
+
+    path.unlink()
+    assert terms.find("hated") == "hate"
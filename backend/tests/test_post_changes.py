@@ -0,0 +1,151 @@
+"""GET /api/posts/changes: cursors, 304s and (updated_at, id) ordering"""
+
+import re
+from datetime import datetime
+from types import SimpleNamespace
+
+import orjson
+import pytest
+from fastapi import HTTPException
+
+from app.api import posts
+from app.api.posts import get_post_changes
+from app.utils.cursors import encode_cursor
+
+T1 = "2025-01-01T10:00:00.5+00:00"
+T2 = "2025-01-01T10:00:01+00:00"
+IDS = [f"00000000-0000-0000-0000-00000000000{i}" for i in range(1, 6)]
+
+
+class FakePostsTable:
+    """Just enough of the PostgREST builder for the changes queries"""
+
+    KEYSET = re.compile(r'updated_at\.gt\."([^"]+)",and\(updated_at\.eq\."[^"]+",id\.gt\.(.+)\)')
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.filters = []
+        self.descending = False
+        self.page_size = None
+
+    def select(self, columns):
+        return self
+
+    def or_(self, expression):
+        updated_at, row_id = self.KEYSET.match(expression).groups()
+        self.filters.append(
+            lambda row: (parse(row["updated_at"]), row["id"]) > (parse(updated_at), row_id)
+        )
+        return self
+
+    def order(self, column, desc=False):
+        self.descending = desc
+        return self
+
+    def limit(self, count):
+        self.page_size = count
+        return self
+
+    def execute(self):
+        rows = [row for row in self.rows if all(f(row) for f in self.filters)]
+        rows.sort(key=lambda row: (parse(row["updated_at"]), row["id"]), reverse=self.descending)
+        return SimpleNamespace(data=rows[: self.page_size])
+
+
+def parse(timestamp: str) -> datetime:
+    return datetime.fromisoformat(timestamp)
+
+
+def row(row_id: str, updated_at: str, published: bool = True) -> dict:
+    return {
+        "id": row_id,
+        "text": row_id,
+        "image_url": "https://bucket/x.png",
+        "author_name": None,
+        "likes_count": 0,
+        "comments_count": 0,
+        "created_at": "2025-01-01T00:00:00+00:00",
+        "updated_at": updated_at,
+        "is_published": published,
+    }
+
+
+@pytest.fixture
+def rows(monkeypatch):
+    rows = []
+    client = SimpleNamespace(table=lambda name: FakePostsTable(rows))
+    monkeypatch.setattr(posts, "get_supabase_client", lambda: client)
+    return rows
+
+
+async def changes(since=None, limit=50):
+    response = await get_post_changes(since=since, limit=limit)
+    return response.status_code, orjson.loads(response.body) if response.body else None
+
+
+async def test_without_a_cursor_only_the_current_position_is_returned(rows):
+    rows += [row(IDS[0], T1), row(IDS[1], T2)]
+
+    status, body = await changes()
+
+    assert status == 200
+    assert (body["posts"], body["removed"], body["has_more"]) == ([], [], False)
+    assert body["cursor"] == encode_cursor(T2, IDS[1])
+
+
+async def test_unchanged_feed_is_a_304(rows):
+    rows.append(row(IDS[0], T1))
+
+    assert await changes(since=encode_cursor(T1, IDS[0])) == (304, None)
+
+
+async def test_empty_table_starts_from_the_epoch(rows):
+    _, body = await changes()
+
+    assert body["cursor"] == encode_cursor(*posts.EPOCH_CURSOR)
+    assert await changes(since=body["cursor"]) == (304, None)
+
+
+async def test_ties_on_updated_at_are_paged_by_id(rows):
+    # Several posts updated in the same statement share updated_at
+    rows += [row(IDS[3], T2), row(IDS[1], T1), row(IDS[2], T1), row(IDS[0], T1)]
+    cursor = encode_cursor(*posts.EPOCH_CURSOR)
+
+    pages = []
+    while True:
+        status, body = await changes(since=cursor, limit=2)
+        if status == 304:
+            break
+        pages.append([post["id"] for post in body["posts"]])
+        cursor = body["cursor"]
+
+    assert pages == [[IDS[0], IDS[1]], [IDS[2], IDS[3]]]
+    assert cursor == encode_cursor(T2, IDS[3])
+
+
+async def test_unpublished_posts_are_reported_as_removed(rows):
+    rows += [row(IDS[0], T1), row(IDS[1], T2, published=False)]
+
+    _, body = await changes(since=encode_cursor(*posts.EPOCH_CURSOR))
+
+    assert [post["id"] for post in body["posts"]] == [IDS[0]]
+    assert body["removed"] == [IDS[1]]
+    assert "is_published" not in body["posts"][0]
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not a cursor",
+        encode_cursor(T1),
+        encode_cursor(T1, IDS[0], "extra"),
+        encode_cursor("yesterday", IDS[0]),
+        encode_cursor(T1, "1) or (1=1"),
+        encode_cursor(f'{T1}",id.gt.0', IDS[0]),
+        encode_cursor(1, 2),
+    ],
+)
+async def test_malformed_cursor_is_rejected(rows, cursor):
+    with pytest.raises(HTTPException) as exc_info:
+        await get_post_changes(since=cursor, limit=50)
+    assert exc_info.value.status_code == 400
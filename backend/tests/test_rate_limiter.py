@@ -0,0 +1,170 @@
+"""Sliding-window rate limiter: weighting of the previous window and idle eviction"""
+
+import asyncio
+import fcntl
+import os
+
+import pytest
+
+from app.middleware import limiter_stores
+from app.middleware.limiter_stores import MemoryLimiterStore, SharedMemoryLimiterStore
+from app.middleware.rate_limiter import RateLimiter, hit_all
+from app.services import metrics
+
+WINDOW = 100.0
+
+
+class FakeClock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock(10 * WINDOW)  # Start of a window
+    monkeypatch.setattr(limiter_stores.time, "monotonic", clock)
+    return clock
+
+
+def make_limiter(max_requests: int = 10) -> RateLimiter:
+    return RateLimiter(
+        max_requests=max_requests,
+        window_minutes=WINDOW / 60,
+        store=MemoryLimiterStore(WINDOW),
+    )
+
+
+async def test_limit_within_one_window(clock):
+    limiter = make_limiter()
+    for _ in range(10):
+        assert (await limiter.hit("1.2.3.4")).allowed
+    result = await limiter.hit("1.2.3.4")
+    assert not result.allowed
+    assert result.remaining == 0
+    assert result.retry_after > 0
+
+    # Other keys are independent
+    assert (await limiter.hit("5.6.7.8")).allowed
+
+
+async def test_previous_window_is_weighted_by_remaining_fraction(clock):
+    limiter = make_limiter()
+    for _ in range(10):
+        await limiter.hit("1.2.3.4")
+
+    # Halfway through the next window the previous 10 hits count as 5
+    clock.now += 1.5 * WINDOW
+    allowed = 0
+    while (await limiter.hit("1.2.3.4")).allowed:
+        allowed += 1
+    assert allowed == 5
+
+    # Two windows later nothing from the first window counts any more
+    clock.now += WINDOW
+    assert (await limiter.hit("1.2.3.4")).allowed
+
+
+async def test_costs_are_charged_and_rejected_hits_are_free(clock):
+    limiter = make_limiter()
+    assert (await limiter.hit("1.2.3.4", cost=8)).allowed
+    assert not (await limiter.hit("1.2.3.4", cost=3)).allowed
+    assert (await limiter.hit("1.2.3.4", cost=2)).allowed
+    assert await limiter.get_remaining_requests("1.2.3.4") == 0
+
+
+async def test_idle_keys_are_evicted(clock):
+    store = MemoryLimiterStore(WINDOW)
+    await store.hit("idle", 1, 10)
+    clock.now += WINDOW
+    await store.hit("recent", 1, 10)
+
+    # One window later "idle" still weighs on the sliding window
+    assert store.evict_idle() == 0
+
+    clock.now += WINDOW
+    assert store.evict_idle() == 1
+    assert set(store.state) == {"recent"}
+
+    clock.now += WINDOW
+    assert store.evict_idle(["recent"]) == 1
+    assert store.state == {}
+
+
+async def test_hit_all_charges_nothing_when_any_limiter_rejects(clock):
+    store = MemoryLimiterStore(WINDOW)
+    strict = RateLimiter(max_requests=2, window_minutes=WINDOW / 60, name="strict", store=store)
+    budget = RateLimiter(max_requests=30, window_minutes=WINDOW / 60, name="budget", store=store)
+    charges = ((strict, 1), (budget, 20))
+
+    assert await hit_all("1.2.3.4", charges) is None
+
+    # The budget rejects: the strict limiter's token must not be spent
+    rejected = await hit_all("1.2.3.4", charges)
+    assert rejected is not None
+    limiter, result = rejected
+    assert limiter is budget
+    assert not result.allowed
+    assert await strict.get_remaining_requests("1.2.3.4") == 1
+    assert await budget.get_remaining_requests("1.2.3.4") == 10
+
+
+async def test_hit_all_uses_one_store_operation_per_store(clock, monkeypatch):
+    store = MemoryLimiterStore(WINDOW)
+    calls = []
+    original = store.hit_many
+    monkeypatch.setattr(store, "hit_many", lambda charges: calls.append(charges) or original(charges))
+    first = RateLimiter(max_requests=5, window_minutes=WINDOW / 60, name="first", store=store)
+    second = RateLimiter(max_requests=5, window_minutes=WINDOW / 60, name="second", store=store)
+
+    assert await hit_all("1.2.3.4", ((first, 1), (second, 2))) is None
+    assert calls == [[("first:1.2.3.4", 1, 5), ("second:1.2.3.4", 2, 5)]]
+
+
+def test_shared_memory_store_charges_all_or_nothing(clock, tmp_path):
+    store = SharedMemoryLimiterStore(WINDOW, str(tmp_path / "limits"), slots=64)
+    charges = [("strict:ip", 1, 2), ("budget:ip", 20, 30)]
+
+    assert all(counts.allowed for counts in store.hit_many_sync(charges))
+    counts = store.hit_many_sync(charges)
+    assert [c.allowed for c in counts] == [True, False]
+    assert store.hit_sync("strict:ip", 0, 0).current == 1
+    assert store.hit_sync("budget:ip", 0, 0).current == 20
+
+
+def test_shared_memory_store_never_resets_an_active_counter(clock, tmp_path):
+    # 8 slots: every key's probe sequence covers the whole table
+    store = SharedMemoryLimiterStore(WINDOW, str(tmp_path / "limits"), slots=8)
+    for i in range(8):
+        store.hit_sync(f"general:10.0.0.{i}", 3, 10)
+    overflows = metrics.rate_limit_store_overflows.values.get((), 0)
+
+    # The table is full of live counters: the new key is counted per process
+    assert store.hit_sync("general:10.0.0.99", 1, 10).current == 1
+    assert store.hit_sync("general:10.0.0.99", 1, 10).current == 2
+    assert metrics.rate_limit_store_overflows.values[()] == overflows + 2
+    for i in range(8):
+        assert store.hit_sync(f"general:10.0.0.{i}", 0, 0).current == 3
+
+    # Once those windows have expired their slots are reused
+    clock.now += 2 * WINDOW
+    assert store.hit_sync("general:10.0.0.100", 1, 10).current == 1
+    assert metrics.rate_limit_store_overflows.values[()] == overflows + 2
+
+
+async def test_shared_memory_store_waits_for_the_lock_without_blocking(tmp_path):
+    path = str(tmp_path / "limits")
+    store = SharedMemoryLimiterStore(WINDOW, path, slots=64)
+    other_worker = os.open(path, os.O_RDWR)
+    fcntl.flock(other_worker, fcntl.LOCK_EX)
+    try:
+        hit = asyncio.create_task(store.hit_many([("general:ip", 1, 10)]))
+        # The event loop keeps running while the hit waits for the lock
+        await asyncio.sleep(0.01)
+        assert not hit.done()
+    finally:
+        fcntl.flock(other_worker, fcntl.LOCK_UN)
+        os.close(other_worker)
+    assert (await hit)[0].current == 1
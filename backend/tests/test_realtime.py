@@ -0,0 +1,139 @@
+"""Realtime subscriptions: input validation, per-process limits and the change feed"""
+
+import re
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.realtime import stream_comments
+from app.services.broadcaster import (
+    POSTS_TOPIC,
+    Broadcaster,
+    ChangeFeed,
+    _Cursor,
+    comments_topic,
+)
+
+
+async def test_stream_comments_rejects_malformed_post_id():
+    with pytest.raises(HTTPException) as exc_info:
+        await stream_comments("1) or (1=1", request=None)
+    assert exc_info.value.status_code == 404
+
+
+def test_distinct_topics_are_capped():
+    broadcaster = Broadcaster(max_subscribers=100, max_topics=3)
+    broadcaster.subscribe(POSTS_TOPIC)
+    broadcaster.subscribe(comments_topic("a"))
+    broadcaster.subscribe(comments_topic("b"))
+
+    # Joining an existing topic is still allowed, a new one is not
+    broadcaster.subscribe(comments_topic("a"))
+    with pytest.raises(OverflowError):
+        broadcaster.subscribe(comments_topic("c"))
+
+
+def test_slow_consumer_is_evicted():
+    broadcaster = Broadcaster(queue_size=2)
+    slow = broadcaster.subscribe(POSTS_TOPIC)
+
+    assert broadcaster.publish(POSTS_TOPIC, {"n": 1}) == 1
+    assert broadcaster.publish(POSTS_TOPIC, {"n": 2}) == 1
+    assert broadcaster.publish(POSTS_TOPIC, {"n": 3}) == 0
+
+    assert slow.evicted
+    assert broadcaster.subscriber_count == 0
+    assert slow.queue.get_nowait() is None  # Eviction sentinel
+
+
+class FakePostsTable:
+    """Just enough of the PostgREST builder for ChangeFeed's posts query"""
+
+    KEYSET = re.compile(r'created_at\.gt\."([^"]+)",and\(created_at\.eq\."[^"]+",id\.gt\.(.+)\)')
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.filters = []
+        self.page_size = None
+        self.descending = False
+
+    def select(self, columns):
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row[column] == value)
+        return self
+
+    def gte(self, column, value):
+        self.filters.append(lambda row: parse(row[column]) >= parse(value))
+        return self
+
+    def or_(self, expression):
+        created_at, row_id = self.KEYSET.match(expression).groups()
+        self.filters.append(
+            lambda row: (parse(row["created_at"]), row["id"]) > (parse(created_at), row_id)
+        )
+        return self
+
+    def order(self, column, desc=False):
+        self.descending = desc
+        return self
+
+    def limit(self, count):
+        self.page_size = count
+        return self
+
+    def execute(self):
+        rows = [row for row in self.rows if all(f(row) for f in self.filters)]
+        rows.sort(key=lambda row: (parse(row["created_at"]), row["id"]), reverse=self.descending)
+        return SimpleNamespace(data=rows[: self.page_size])
+
+
+def parse(timestamp: str) -> datetime:
+    return datetime.fromisoformat(timestamp)
+
+
+def post(row_id: str, second: float) -> dict:
+    created_at = datetime(2025, 1, 1, tzinfo=timezone.utc) + timedelta(seconds=second)
+    return {
+        "id": row_id,
+        "created_at": created_at.isoformat(),
+        "is_published": True,
+        "text": row_id,
+        "image_url": "https://bucket/x.png",
+        "author_name": None,
+        "likes_count": 0,
+        "comments_count": 0,
+    }
+
+
+def test_change_feed_publishes_late_commits_once(monkeypatch):
+    rows = [post("a", 0)]
+    client = SimpleNamespace(table=lambda name: FakePostsTable(rows))
+    broadcaster = Broadcaster()
+    broadcaster.subscribe(POSTS_TOPIC)
+    feed = ChangeFeed(broadcaster, overlap=5)
+    monkeypatch.setattr(feed, "PAGE_SIZE", 2)
+    published = []
+    monkeypatch.setattr(feed, "_publish", lambda topic, event: published.append(event["data"]["id"]))
+
+    feed._poll(client)  # Starts at the newest row
+    rows += [post("c", 2), post("d", 2), post("e", 3)]
+    feed._poll(client)
+    # Its transaction started before "c" but committed after the last poll
+    rows.append(post("b", 1))
+    feed._poll(client)
+    feed._poll(client)
+
+    assert published == ["c", "d", "e", "b"]
+
+
+def test_change_feed_forgets_rows_outside_the_overlap():
+    cursor = _Cursor(post("a", 0)["created_at"])
+    overlap = timedelta(seconds=5)
+
+    assert [row["id"] for row in cursor.take([post("b", 1), post("c", 10)], overlap)] == ["b", "c"]
+    assert set(cursor.seen) == {"c"}
+    assert cursor.window_start(overlap) == post("x", 5)["created_at"]
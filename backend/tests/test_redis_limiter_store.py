@@ -0,0 +1,72 @@
+"""RedisLimiterStore: the Lua script, run by fakeredis's embedded Lua"""
+
+import asyncio
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")  # fakeredis needs it for EVAL
+
+from redis.crc import key_slot  # noqa: E402
+
+from app.middleware.limiter_stores import RedisLimiterStore  # noqa: E402
+
+
+@pytest.fixture
+def make_store(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        "redis.asyncio.from_url",
+        lambda url: fakeredis.FakeAsyncRedis(server=server),
+    )
+
+    def make_store(window_seconds: float = 3600.0) -> RedisLimiterStore:
+        return RedisLimiterStore(window_seconds, "redis://test", "3600s")
+
+    return make_store
+
+
+async def test_limit_is_enforced(make_store):
+    store = make_store()
+    for used in range(1, 4):
+        counts = await store.hit("general:1.2.3.4", 1, 3)
+        assert counts.allowed and counts.current == used
+    counts = await store.hit("general:1.2.3.4", 1, 3)
+    assert not counts.allowed and counts.current == 3
+    assert (await store.hit("general:5.6.7.8", 1, 3)).allowed
+
+
+async def test_nothing_is_charged_unless_every_key_fits(make_store):
+    store = make_store()
+    charges = [("strict:ip", 1, 2), ("budget:ip", 20, 30)]
+
+    assert all(counts.allowed for counts in await store.hit_many(charges))
+    counts = await store.hit_many(charges)
+    assert [c.allowed for c in counts] == [True, False]
+    assert (await store.peek("strict:ip")).current == 1
+    assert (await store.peek("budget:ip")).current == 20
+
+
+async def test_counters_roll_over_with_the_window(make_store):
+    store = make_store(window_seconds=0.1)
+    await store.hit("general:ip", 5, 5)
+    assert not (await store.hit("general:ip", 1, 5)).allowed
+
+    # Two windows later the old hits no longer count
+    await asyncio.sleep(0.25)
+    counts = await store.hit("general:ip", 1, 5)
+    assert counts.allowed and (counts.previous, counts.current) == (0, 1)
+
+
+async def test_keys_stay_apart_across_namespaces(make_store):
+    hourly = make_store()
+    minutely = RedisLimiterStore(60.0, "redis://test", "60s")
+    await hourly.hit("general:ip", 3, 10)
+    assert (await minutely.peek("general:ip")).current == 0
+
+
+def test_keys_of_one_client_share_a_cluster_slot(make_store):
+    store = make_store()
+    keys = [store.redis_key(f"{name}:2001:db8::1") for name in ("post_creation", "general_api")]
+    assert keys[0] == "ratelimit:{2001:db8::1}:3600s:post_creation"
+    assert len({key_slot(key.encode()) for key in keys}) == 1
@@ -0,0 +1,101 @@
+"""Related posts index: queries, file growth, restarts and removed posts"""
+
+import uuid
+
+from app.services.related_index import RelatedPostsIndex
+
+TEXTS = {
+    "bike": "teaching my daughter to ride her bike in the park",
+    "bike2": "she rode her bike without training wheels in the park today",
+    "fishing": "first fishing trip with my son at the lake",
+    "fishing2": "caught our first fish at the lake this morning",
+    "bedtime": "bedtime story marathon with three kids",
+}
+IDS = {name: str(uuid.uuid5(uuid.NAMESPACE_URL, name)) for name in TEXTS}
+
+
+def fill(index: RelatedPostsIndex, *names: str) -> None:
+    index.add_many((IDS[name], TEXTS[name]) for name in names or TEXTS)
+
+
+def related_names(index: RelatedPostsIndex, name: str, k: int = 2) -> list:
+    names = {post_id: name for name, post_id in IDS.items()}
+    return [names[post_id] for post_id, _ in index.related(IDS[name], k)]
+
+
+def test_most_similar_post_comes_first(tmp_path):
+    index = RelatedPostsIndex(str(tmp_path))
+    fill(index)
+
+    assert related_names(index, "bike")[0] == "bike2"
+    assert related_names(index, "fishing")[0] == "fishing2"
+    assert index.related(str(uuid.uuid4()), 2) is None
+    matches = index.related(str(uuid.uuid4()), 1, text="a fishing trip to the lake")
+    assert matches[0][0] in (IDS["fishing"], IDS["fishing2"])
+
+
+def test_adding_an_indexed_post_again_is_a_no_op(tmp_path):
+    index = RelatedPostsIndex(str(tmp_path))
+    fill(index, "bike", "fishing")
+
+    assert index.add_many([(IDS["bike"], TEXTS["bike"]), (IDS["bike2"], TEXTS["bike2"])]) == 1
+    assert index.count == 3
+
+
+def test_files_grow_past_the_initial_capacity(tmp_path):
+    index = RelatedPostsIndex(str(tmp_path), initial_capacity=2)
+    # Opened before the files grow, like another worker
+    other = RelatedPostsIndex(str(tmp_path), initial_capacity=2)
+    fill(index)
+
+    assert index.count == len(TEXTS)
+    assert related_names(other, "bike")[0] == "bike2"
+    assert related_names(other, "fishing2")[0] == "fishing"
+
+
+def test_rows_appended_after_the_map_was_checked_are_ignored(tmp_path):
+    reader = RelatedPostsIndex(str(tmp_path), initial_capacity=2)
+    fill(reader, "bike", "bike2")
+    # Another process grows the files between the reader's _remap() and its
+    # read of the row count
+    reader._remap = lambda: None
+    fill(RelatedPostsIndex(str(tmp_path), initial_capacity=2), "fishing", "fishing2")
+
+    assert reader.count == 4
+    assert related_names(reader, "bike", k=5) == ["bike2"]
+
+
+def test_index_and_cursor_survive_a_restart(tmp_path):
+    index = RelatedPostsIndex(str(tmp_path))
+    index.add_many(
+        ((IDS[name], TEXTS[name]) for name in TEXTS),
+        cursor=("2024-01-15T10:30:00+00:00", IDS["bedtime"]),
+    )
+    before = index.related(IDS["bike"], 3)
+
+    restarted = RelatedPostsIndex(str(tmp_path))
+
+    assert restarted.count == len(TEXTS)
+    assert restarted.related(IDS["bike"], 3) == before
+    assert restarted._cursor() == ("2024-01-15T10:30:00+00:00", IDS["bedtime"])
+
+
+def test_other_dimensions_rebuild_the_index(tmp_path):
+    fill(RelatedPostsIndex(str(tmp_path)))
+
+    rebuilt = RelatedPostsIndex(str(tmp_path), dims=64)
+
+    assert rebuilt.count == 0
+    assert rebuilt._cursor() is None
+
+
+def test_removed_posts_stop_matching(tmp_path):
+    index = RelatedPostsIndex(str(tmp_path))
+    fill(index)
+
+    assert index.remove_many([IDS["bike2"], str(uuid.uuid4())]) == 1
+
+    assert "bike2" not in related_names(index, "bike", k=4)
+    assert index.related(IDS["bike2"], 4) == []
+    # Also for workers that mapped the files before the removal
+    assert "bike2" not in related_names(RelatedPostsIndex(str(tmp_path)), "bike", k=4)
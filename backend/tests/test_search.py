@@ -0,0 +1,88 @@
+"""Search pagination: the (rank, id) keyset cursor walks every match once"""
+
+import struct
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import posts
+from app.main import app
+
+
+def real(value: float) -> float:
+    """Round to float4, like the REAL rank column and after_rank parameter"""
+    return struct.unpack("f", struct.pack("f", value))[0]
+
+
+class FakeSearch:
+    """Implements search_posts() as migration 005 defines it"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.params = None
+
+    def rpc(self, name, params):
+        assert name == "search_posts"
+        self.params = params
+        return self
+
+    def execute(self):
+        params = self.params
+        rows = sorted(self.rows, key=lambda row: (row["rank"], row["id"]), reverse=True)
+        if params["after_rank"] is not None:
+            after = (real(params["after_rank"]), params["after_id"])
+            rows = [row for row in rows if (row["rank"], row["id"]) < after]
+
+        class Result:
+            data = rows[: min(max(params["result_limit"], 1), 100)]
+
+        return Result
+
+
+@pytest.fixture
+def search(monkeypatch):
+    # Few distinct ranks, so most page boundaries fall inside a tie
+    rows = [
+        {
+            "id": str(uuid.UUID(int=i * 7919 % 1000)),
+            "text": f"teaching my kid number {i} to fish",
+            "image_url": f"https://example.test/{i}.png",
+            "author_name": None,
+            "likes_count": 0,
+            "comments_count": 0,
+            "created_at": "2024-01-15T10:30:00+00:00",
+            "rank": real(0.0607927 * (1 + i % 4)),
+        }
+        for i in range(45)
+    ]
+    fake = FakeSearch(rows)
+    monkeypatch.setattr(posts, "get_supabase_client", lambda: fake)
+    return rows
+
+
+@pytest.mark.parametrize("limit", [1, 7, 45, 50])
+def test_cursor_pages_without_duplicates_or_gaps(search, limit):
+    client = TestClient(app)
+    seen, cursor = [], None
+    for _ in range(100):
+        params = {"q": "fish", "limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/posts/search", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page["posts"]) <= limit
+        seen.extend(post["id"] for post in page["posts"])
+        cursor = page["next_cursor"]
+        assert page["has_more"] == (cursor is not None)
+        if cursor is None:
+            break
+
+    expected = sorted(search, key=lambda row: (row["rank"], row["id"]), reverse=True)
+    assert seen == [row["id"] for row in expected]
+
+
+def test_invalid_cursor_is_rejected(search):
+    response = TestClient(app).get("/api/posts/search", params={"q": "fish", "cursor": "nope"})
+    assert response.status_code == 400
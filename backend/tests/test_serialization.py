@@ -0,0 +1,85 @@
+"""The orjson fast path must produce the same JSON as the response models"""
+
+import orjson
+
+from app.models import (
+    CommentResponse,
+    CommentsListResponse,
+    PostResponse,
+    PostsListResponse,
+)
+from app.utils.serialization import (
+    POST_FIELDS,
+    comment_row_to_dict,
+    fast_list_response,
+    parse_fields,
+    post_row_to_dict,
+)
+
+POST_ROW = {
+    "id": "0b8f2a4e-5c1d-4e8a-9f6b-2d3c4e5f6a7b",
+    "text": "teaching my daughter to ride a bike",
+    "image_url": "https://images.test/0b8f2a4e.png",
+    "author_name": None,
+    "likes_count": 3,
+    "comments_count": 1,
+    # PostgREST trims trailing zeros from fractional seconds
+    "created_at": "2024-01-15T10:30:00.12345+00:00",
+    "is_published": True,
+}
+
+COMMENT_ROW = {
+    "id": "5a6b7c8d-9e0f-4a1b-8c2d-3e4f5a6b7c8d",
+    "post_id": POST_ROW["id"],
+    "user_id": "1c2d3e4f-5a6b-4c7d-8e9f-0a1b2c3d4e5f",
+    "content": "So true",
+    "is_deleted": False,
+    "created_at": "2024-01-16T08:00:00+00:00",
+    "updated_at": "2024-01-16T08:05:00.5+00:00",
+    "users": {"username": "dad", "display_name": None, "avatar_url": None},
+}
+
+PAGINATION = {"page": 1, "limit": 20, "total": 1, "pages": 1}
+
+
+def model_json(model) -> dict:
+    return orjson.loads(model.model_dump_json())
+
+
+def test_post_row_matches_post_response():
+    expected = model_json(PostResponse(**POST_ROW))
+    assert orjson.loads(orjson.dumps(post_row_to_dict(POST_ROW))) == expected
+
+
+def test_comment_row_matches_comment_response():
+    row = {**COMMENT_ROW, **COMMENT_ROW["users"]}
+    expected = model_json(CommentResponse(**row))
+    assert orjson.loads(orjson.dumps(comment_row_to_dict(COMMENT_ROW))) == expected
+
+
+def test_fast_list_response_matches_list_models():
+    posts = fast_list_response("posts", [post_row_to_dict(POST_ROW)], PAGINATION)
+    expected = model_json(
+        PostsListResponse(posts=[PostResponse(**POST_ROW)], pagination=PAGINATION)
+    )
+    assert orjson.loads(posts.body) == expected
+
+    comments = fast_list_response(
+        "comments", [comment_row_to_dict(COMMENT_ROW)], PAGINATION
+    )
+    row = {**COMMENT_ROW, **COMMENT_ROW["users"]}
+    expected = model_json(
+        CommentsListResponse(comments=[CommentResponse(**row)], pagination=PAGINATION)
+    )
+    assert orjson.loads(comments.body) == expected
+
+
+def test_sparse_and_compact_fields_are_a_subset_of_the_full_response():
+    full = model_json(PostResponse(**POST_ROW))
+    fields = parse_fields("created_at,id,author_name", POST_FIELDS)
+
+    sparse = orjson.loads(orjson.dumps(post_row_to_dict(POST_ROW, fields)))
+    assert sparse == {name: full[name] for name in ("id", "author_name", "created_at")}
+
+    compact = orjson.loads(orjson.dumps(post_row_to_dict(POST_ROW, fields, compact=True)))
+    assert compact == {"id": full["id"], "created_at": full["created_at"]}
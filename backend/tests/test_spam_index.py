@@ -0,0 +1,69 @@
+"""Near-duplicate prompt index: cluster threshold, eviction and flood cost"""
+
+import time
+
+from app.services.spam_index import NearDuplicateIndex
+
+TEXT = "Fatherhood is teaching my son to fish on a Sunday morning"
+
+
+def test_copies_beyond_max_cluster_are_rejected():
+    index = NearDuplicateIndex(max_cluster=3)
+    sizes = [index.add(variant, now=0.0) for variant in (
+        TEXT,
+        TEXT + "!!",
+        TEXT.upper(),
+        TEXT + " :)",
+    )]
+    assert sizes == [1, 2, 3, 4]
+
+    # Unrelated texts are unaffected
+    assert index.add("Holding my newborn daughter for the first time", now=0.0) == 1
+
+
+def test_rejected_texts_are_not_recorded():
+    index = NearDuplicateIndex(max_cluster=3)
+    for _ in range(10):
+        index.add(TEXT, now=0.0)
+    assert len(index.entries) == 3
+
+
+def test_entries_expire_after_the_window():
+    index = NearDuplicateIndex(window_seconds=60.0, max_cluster=2)
+    index.add(TEXT, now=0.0)
+    index.add(TEXT, now=30.0)
+    assert index.add(TEXT, now=45.0) == 3  # Rejected
+
+    # The first copy has expired, so there is room for one more
+    assert index.add(TEXT, now=61.0) == 2
+    assert index.add(TEXT, now=200.0) == 1
+    assert len(index.entries) == 1
+    assert all(len(bucket) == 1 for bucket in index.bands.values())
+
+
+def test_entries_are_evicted_beyond_max_entries():
+    index = NearDuplicateIndex(max_entries=10)
+    for i in range(25):
+        index.add(f"distinct prompt number {i} about a different day", now=0.0)
+    assert len(index.entries) <= 11
+    indexed = set().union(*index.bands.values())
+    assert indexed == set(index.entries)
+
+
+def test_flood_of_copies_stays_cheap():
+    index = NearDuplicateIndex(max_cluster=5)
+    started = time.perf_counter()
+    for _ in range(50_000):
+        index.add(TEXT, now=0.0)
+    elapsed = time.perf_counter() - started
+
+    assert len(index.entries) == 5
+    # Dominated by hashing the text: well under a millisecond per copy
+    assert elapsed < 10.0
+
+
+def test_full_buckets_still_find_near_duplicates():
+    index = NearDuplicateIndex(max_bucket_size=1)
+    index.add("some unrelated text that fills buckets", now=0.0)
+    index.add(TEXT, now=0.0)
+    assert index.add(TEXT + "!", now=0.0) == 2
@@ -0,0 +1,24 @@
+"""Startup cost: heavy, rarely needed packages stay off the import path"""
+
+import os
+import subprocess
+import sys
+
+# Loaded when the clients are built (in the lifespan) or on first use
+DEFERRED_MODULES = ("numpy", "google.genai", "supabase", "PIL", "boto3")
+
+
+def test_importing_the_app_defers_heavy_packages():
+    # A fresh interpreter: this one has already imported everything
+    code = (
+        "import sys, app.main; "
+        f"print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        check=True,
+    )
+    assert result.stdout.strip() == ""
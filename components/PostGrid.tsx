@@ -2,6 +2,7 @@
 
 import { useState } from 'react';
 import { PostCard } from './PostCard';
+import { getFeedPage } from '@/lib/api';
 import type { Post } from '@/types';
 
 interface PostGridProps {
@@ -18,10 +19,7 @@ export function PostGrid({ initialPosts, initialPage, totalPages }: PostGridProp
   const loadPage = async (page: number) => {
     setIsLoading(true);
     try {
-      const response = await fetch(
-        `/api/posts?page=${page}&limit=20&sort=newest`
-      );
-      const data = await response.json();
+      const data = await getFeedPage(page, 'newest');
       setPosts(data.posts);
       setCurrentPage(page);
 
@@ -5,6 +5,7 @@
 import type {
   Post,
   PostsListResponse,
+  PostSearchResponse,
   CreatePostRequest,
   ImageGenerationResponse,
   SavePostRequest,
@@ -14,6 +15,9 @@ import type {
 } from '@/types';
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
+// Prerendered feed pages in the storage bucket, e.g.
+// https://<project>.supabase.co/storage/v1/object/public/fatherhood-images/feed
+const FEED_SNAPSHOT_URL = process.env.NEXT_PUBLIC_FEED_SNAPSHOT_URL;
 
 /**
  * Fetch all posts with pagination
@@ -40,6 +44,77 @@ export async function getPosts(
   return response.json();
 }
 
+/**
+ * Fetch a feed page from its prerendered snapshot, falling back to the API
+ * for pages without a snapshot or when the snapshot can't be read
+ */
+export async function getFeedPage(
+  page: number = 1,
+  sort: 'newest' | 'popular' = 'newest'
+): Promise<PostsListResponse> {
+  if (FEED_SNAPSHOT_URL) {
+    try {
+      const response = await fetch(`${FEED_SNAPSHOT_URL}/${sort}-${page}.json.gz`, {
+        next: { revalidate: 60 },
+      });
+
+      if (response.ok && response.body) {
+        // Stored as plain gzip objects (no Content-Encoding), so decompress here
+        const json = response.body.pipeThrough(new DecompressionStream('gzip'));
+        return await new Response(json).json();
+      }
+    } catch {
+      // Fall through to the API
+    }
+  }
+
+  return getPosts(page, 20, sort);
+}
+
+/**
+ * Search posts by text, best matches first
+ */
+export async function searchPosts(
+  query: string,
+  limit: number = 20,
+  cursor?: string
+): Promise<PostSearchResponse> {
+  const url = new URL(`${API_URL}/api/posts/search`);
+  url.searchParams.set('q', query);
+  url.searchParams.set('limit', limit.toString());
+  if (cursor) {
+    url.searchParams.set('cursor', cursor);
+  }
+
+  const response = await fetch(url.toString(), { cache: 'no-store' });
+
+  if (!response.ok) {
+    throw new Error(`Failed to search posts: ${response.statusText}`);
+  }
+
+  return response.json();
+}
+
+/**
+ * Fetch posts with text similar to a post (empty list on failure)
+ */
+export async function getRelatedPosts(id: string, limit: number = 6): Promise<Post[]> {
+  try {
+    const response = await fetch(`${API_URL}/api/posts/${id}/related?limit=${limit}`, {
+      next: { revalidate: 300 },
+    });
+
+    if (!response.ok) {
+      return [];
+    }
+
+    const data: { posts: Post[] } = await response.json();
+    return data.posts;
+  } catch {
+    return [];
+  }
+}
+
 /**
  * Fetch a single post by ID
  */
@@ -73,8 +148,8 @@ export async function generateImage(data: CreatePostRequest): Promise<ImageGener
   if (!response.ok) {
     const error = await response.json().catch(() => ({ error: 'Unknown error' }));
 
-    // Handle rate limiting (429) with detailed error message
-    if (response.status === 429 && error.detail) {
+    // Handle rate limiting (429) and generation capacity (503) with detailed error message
+    if ((response.status === 429 || response.status === 503) && error.detail) {
       const message = typeof error.detail === 'string'
         ? error.detail
         : error.detail.message || 'Too many requests. Please try again later.';
@@ -101,6 +176,15 @@ export async function savePost(data: SavePostRequest): Promise<Post> {
 
   if (!response.ok) {
     const error = await response.json().catch(() => ({ error: 'Unknown error' }));
+
+    // Handle rate limiting (429) and server overload (503) with detailed error message
+    if ((response.status === 429 || response.status === 503) && error.detail) {
+      const message = typeof error.detail === 'string'
+        ? error.detail
+        : error.detail.message || 'Too many requests. Please try again later.';
+      throw new Error(message);
+    }
+
     throw new Error(error.error || error.detail || 'Failed to save post');
   }
 
@@ -0,0 +1,18 @@
+/**
+ * next/image loader serving bucket images through the backend image proxy
+ * (GET /img/{name}?w=), which caches and resizes them on local disk.
+ * Enabled in next.config.ts when NEXT_PUBLIC_IMAGE_PROXY_URL is set.
+ */
+
+const IMAGE_PROXY_URL = process.env.NEXT_PUBLIC_IMAGE_PROXY_URL;
+const BUCKET_PATH = '/storage/v1/object/public/fatherhood-images/';
+
+export default function imageLoader({ src, width }: { src: string; width: number }): string {
+  const index = src.indexOf(BUCKET_PATH);
+  if (!IMAGE_PROXY_URL || index === -1) {
+    return src;
+  }
+
+  const name = src.slice(index + BUCKET_PATH.length);
+  return `${IMAGE_PROXY_URL}/img/${encodeURIComponent(name)}?w=${width}`;
+}
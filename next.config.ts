@@ -3,17 +3,23 @@ import type { NextConfig } from "next";
 const nextConfig: NextConfig = {
   /* config options here */
   reactCompiler: true,
-  images: {
-    remotePatterns: [
-      {
-        protocol: "https",
-        hostname: "*.supabase.co",
-        pathname: "/storage/v1/object/public/**",
+  images: process.env.NEXT_PUBLIC_IMAGE_PROXY_URL
+    ? {
+        // Resized and cached by the backend image proxy (lib/imageLoader.ts)
+        loader: "custom",
+        loaderFile: "./lib/imageLoader.ts",
+      }
+    : {
+        remotePatterns: [
+          {
+            protocol: "https",
+            hostname: "*.supabase.co",
+            pathname: "/storage/v1/object/public/**",
+          },
+        ],
+        // Disable optimization for localhost in development
+        unoptimized: process.env.NODE_ENV === "development",
       },
-    ],
-    // Disable optimization for localhost in development
-    unoptimized: process.env.NODE_ENV === "development",
-  },
 };
 
 export default nextConfig;
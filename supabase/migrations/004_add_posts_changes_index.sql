@@ -0,0 +1,6 @@
+-- Migration 004: Index for the delta feed (GET /api/posts/changes)
+-- The endpoint walks posts by (updated_at, id) after a client-supplied cursor.
+-- updated_at is maintained by the update_posts_updated_at trigger, so likes and
+-- comment counter updates also surface as changes.
+
+CREATE INDEX IF NOT EXISTS idx_posts_updated_at_id ON posts(updated_at, id);
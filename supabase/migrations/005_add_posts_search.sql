@@ -0,0 +1,51 @@
+-- Migration 005: Full-text search over posts (GET /api/posts/search)
+-- search_vector is a generated column, so it is kept up to date on every
+-- insert and update without triggers. Post text is weighted above the author
+-- name. The GIN index only covers published posts, the only ones searched.
+
+ALTER TABLE posts ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(text, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(author_name, '')), 'B')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_posts_search_vector ON posts
+    USING GIN (search_vector) WHERE is_published = true;
+
+-- Ranked search with keyset pagination on (rank, id): pass the rank and id of
+-- the last row of a page to get the next one. Accepts web-search syntax
+-- ("quoted phrases", -excluded, or).
+CREATE OR REPLACE FUNCTION search_posts(
+    query TEXT,
+    after_rank REAL DEFAULT NULL,
+    after_id UUID DEFAULT NULL,
+    result_limit INTEGER DEFAULT 20
+)
+RETURNS TABLE (
+    id UUID,
+    text VARCHAR,
+    image_url TEXT,
+    author_name VARCHAR,
+    likes_count INTEGER,
+    comments_count INTEGER,
+    created_at TIMESTAMP WITH TIME ZONE,
+    rank REAL
+) AS $$
+    WITH matches AS (
+        SELECT p.id, p.text, p.image_url, p.author_name, p.likes_count,
+               p.comments_count, p.created_at,
+               ts_rank(p.search_vector, q) AS rank
+        FROM posts p, websearch_to_tsquery('english', query) q
+        WHERE p.is_published = true
+          AND p.search_vector @@ q
+    )
+    SELECT *
+    FROM matches m
+    WHERE after_rank IS NULL OR (m.rank, m.id) < (after_rank, after_id)
+    ORDER BY m.rank DESC, m.id DESC
+    LIMIT least(greatest(result_limit, 1), 100);
+$$ LANGUAGE sql STABLE;
+
+COMMENT ON COLUMN posts.search_vector IS 'Full-text search document (text weighted A, author name B)';
+
+GRANT EXECUTE ON FUNCTION search_posts(TEXT, REAL, UUID, INTEGER) TO anon, authenticated;
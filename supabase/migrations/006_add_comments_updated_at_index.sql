@@ -0,0 +1,5 @@
+-- Migration 006: Index for incremental exports of comments
+-- GET /api/admin/export/{table}?since=... walks rows by (updated_at, id);
+-- posts already have this index (migration 004).
+
+CREATE INDEX IF NOT EXISTS idx_comments_updated_at_id ON comments(updated_at, id);
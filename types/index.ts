@@ -54,6 +54,12 @@ export interface PostsListResponse {
   };
 }
 
+export interface PostSearchResponse {
+  posts: (Post & { rank: number })[];
+  next_cursor: string | null;
+  has_more: boolean;
+}
+
 /**
  * API error response
  */